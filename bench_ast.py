@@ -0,0 +1,114 @@
+"""
+Benchmark de memória e travessia dos nós de langAST.
+
+Compara as classes atuais (com __slots__) com cópias equivalentes baseadas em
+__dict__, construídas aqui com os mesmos campos, e com a mesma árvore depois
+de passar por um langAST.Interner, sobre programas gerados por
+bench_parser.generate_program:
+
+    python bench_ast.py [funções]
+"""
+
+import sys
+import time
+import tracemalloc
+from dataclasses import MISSING, fields, make_dataclass
+from typing import Dict
+
+import langAST
+from bench_parser import generate_program
+from lang_parser import parse_code
+
+NODE_CLASSES = (
+    langAST.Literal, langAST.Variable, langAST.BinaryOp, langAST.UnaryOp,
+    langAST.Assignment, langAST.FunctionCall, langAST.ExprStmt, langAST.VarDecl,
+    langAST.Block, langAST.If, langAST.While, langAST.For, langAST.Return,
+    langAST.Print, langAST.Function, langAST.Program,
+)
+
+
+def dict_classes() -> Dict[type, type]:
+    """Plain (__dict__-based) dataclasses with the same fields as each node class."""
+    result = {}
+    for cls in NODE_CLASSES:
+        spec = [(f.name, f.type) if f.default is MISSING else (f.name, f.type, f.default)
+                for f in fields(cls)]
+        result[cls] = make_dataclass(cls.__name__, spec)
+    return result
+
+
+def rebuild(node, classes: Dict[type, type]):
+    """Copy of the tree `node` built from `classes` (node class -> class to use)."""
+    cls = classes.get(node.__class__)
+    if cls is not None:
+        return cls(*[rebuild(getattr(node, f), classes) for f in node.__dataclass_fields__])
+    if node.__class__ is list:
+        return [rebuild(child, classes) for child in node]
+    return node
+
+
+def count_nodes(node) -> int:
+    """Visit every node through plain attribute reads, as the evaluators do."""
+    kind = node.__class__.__name__
+    if kind == 'BinaryOp':
+        return 1 + count_nodes(node.left) + count_nodes(node.right)
+    if kind in ('Literal', 'Variable'):
+        return 1
+    if kind in ('UnaryOp', 'Assignment', 'ExprStmt', 'Print'):
+        return 1 + count_nodes(node.expr)
+    if kind == 'FunctionCall':
+        return 1 + sum(count_nodes(arg) for arg in node.args)
+    if kind == 'VarDecl':
+        return 1 + (count_nodes(node.init) if node.init is not None else 0)
+    if kind == 'Block':
+        return 1 + sum(count_nodes(stmt) for stmt in node.statements)
+    if kind == 'If':
+        n = 1 + count_nodes(node.condition) + count_nodes(node.then_branch)
+        return n + (count_nodes(node.else_branch) if node.else_branch is not None else 0)
+    if kind == 'While':
+        return 1 + count_nodes(node.condition) + count_nodes(node.body)
+    if kind == 'For':
+        return (1 + count_nodes(node.init) + count_nodes(node.condition)
+                + count_nodes(node.increment) + count_nodes(node.body))
+    if kind == 'Return':
+        return 1 + (count_nodes(node.value) if node.value is not None else 0)
+    if kind == 'Function':
+        return 1 + sum(count_nodes(p) for p in node.params) + count_nodes(node.body)
+    return 1 + sum(count_nodes(f) for f in node.functions)
+
+
+def measure(program, classes: Dict[type, type], repeat: int = 5,
+            intern: bool = False) -> Dict[str, float]:
+    tracemalloc.start()
+    try:
+        tree = rebuild(program, classes)
+        if intern:
+            # a tabela do Interner conta para a memória, tal como a árvore
+            interner = langAST.Interner()
+            tree = interner.tree(tree)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    nodes = count_nodes(tree)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        count_nodes(tree)
+        best = min(best, time.process_time() - start)
+    return {'nodes': nodes, 'bytes_per_node': size / nodes, 'traversal': best}
+
+
+def run(functions: int = 64) -> Dict[str, Dict[str, float]]:
+    program = parse_code(generate_program(functions=functions, statements=100, depth=6))
+    return {
+        '__dict__': measure(program, dict_classes()),
+        '__slots__': measure(program, {cls: cls for cls in NODE_CLASSES}),
+        'interned': measure(program, {cls: cls for cls in NODE_CLASSES}, intern=True),
+    }
+
+
+if __name__ == "__main__":
+    results = run(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
+    print(f"{'classes':<10} {'nós':>9} {'bytes/nó':>9} {'travessia (ms)':>15}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['nodes']:>9} {r['bytes_per_node']:>9.1f} {r['traversal'] * 1000:>15.1f}")
@@ -0,0 +1,106 @@
+"""
+Benchmark dos backends de execução.
+
+Corre programa2 (Fibonacci com ciclo) e programa3 (isPrime) de testcases com
+entradas grandes em cada backend, com o output de print descartado, e
+compara os tempos com os do interpretador de lang_evaluate (o backend python
+guarda o código gerado em cache, pelo que a melhor repetição não inclui a
+geração; o lexical é o mesmo interpretador com endereços resolvidos e
+frames em lista). O débito é dado
+em instruções executadas por segundo, contadas uma vez pelo interpretador
+(os Block não contam):
+
+    python bench_evaluate.py [repetições]
+"""
+
+import contextlib
+import functools
+import io
+import sys
+import time
+from typing import Callable, Dict
+
+import lang_codegen
+import lang_compile
+import lang_evaluate
+import lang_vm
+from langAST import Block, Stmt
+from lang_parser import parse_code
+from testcases import programa2, programa3
+
+BACKENDS: Dict[str, Callable] = {
+    'interpreter': lang_evaluate.evaluate,
+    'lexical': functools.partial(lang_evaluate.evaluate, lexical=True),
+    'closures': lang_compile.evaluate,
+    'bytecode': lang_vm.evaluate,
+    'python': lang_codegen.evaluate,
+}
+
+WORKLOADS = [
+    ('programa2', programa2, [('n', 2000)]),
+    ('programa3', programa3, [('number', 1000000007)]),
+]
+
+
+class StatementCounter(lang_evaluate.Interpreter):
+    def __init__(self, program, env):
+        super().__init__(program, env)
+        self.statements = 0
+
+    def visit(self, node):
+        if isinstance(node, Stmt) and not isinstance(node, Block):
+            self.statements += 1
+        return super().visit(node)
+
+
+def count_statements(ast, inputs) -> int:
+    """Statements the interpreter executes for evaluate(ast, inputs)."""
+    env = lang_evaluate.Environment()
+    for name, value in inputs:
+        env.declare(name, value)
+    counter = StatementCounter(ast, env)
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            counter.run_block(ast.function('main').body, env)
+        except lang_evaluate.ReturnException:
+            pass
+    return counter.statements
+
+
+def measure(evaluate, ast, inputs, repeat: int = 3):
+    """(best time, result, printed output) of evaluate(ast, inputs)."""
+    best = float('inf')
+    for _ in range(repeat):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            start = time.process_time()
+            result = evaluate(ast, inputs)
+            best = min(best, time.process_time() - start)
+    return best, result, output.getvalue()
+
+
+def run(workloads=WORKLOADS, repeat: int = 3) -> Dict[str, Dict[str, dict]]:
+    results = {}
+    for name, code, inputs in workloads:
+        ast = parse_code(code)
+        statements = count_statements(ast, inputs)
+        rows = {}
+        for backend, evaluate in BACKENDS.items():
+            elapsed, result, output = measure(evaluate, ast, inputs, repeat)
+            rows[backend] = {'time': elapsed, 'result': result, 'output': output}
+        reference = rows['interpreter']['time']
+        for row in rows.values():
+            row['speedup'] = reference / row['time'] if row['time'] else float('inf')
+            row['statements'] = statements
+            row['statements_per_second'] = statements / row['time'] if row['time'] else float('inf')
+        results[name] = rows
+    return results
+
+
+if __name__ == "__main__":
+    results = run(repeat=int(sys.argv[1]) if len(sys.argv) > 1 else 3)
+    print(f"{'programa':<10} {'backend':<12} {'instruções':>10} {'tempo (ms)':>11} {'instr/s':>11} {'speedup':>8}")
+    for name, rows in results.items():
+        for backend, r in rows.items():
+            print(f"{name:<10} {backend:<12} {r['statements']:>10} {r['time'] * 1000:>11.1f} "
+                  f"{r['statements_per_second']:>11.0f} {r['speedup']:>7.1f}x")
@@ -0,0 +1,195 @@
+"""
+Benchmark de escalabilidade do parse_code.
+
+Gera programas sintéticos ao longo de vários eixos (número de funções,
+statements por bloco, profundidade das expressões e comprimento dos
+identificadores), mede tempo e pico de memória para cada tamanho e estima o
+expoente de crescimento em função do tamanho do código. Os resultados são
+comparados com bench_parser_baseline.json:
+
+    python bench_parser.py                    # compara com o baseline
+    python bench_parser.py --update-baseline  # grava um novo baseline
+
+Cada tempo é a mediana de várias repetições, normalizada pela mediana de um
+ciclo de calibração. As tolerâncias ficam acima do ruído medido entre
+execuções nesta máquina (até ~30% na soma de um eixo, e o expoente do eixo
+depth, ~1.15, já chegou a 1.34), para que só uma regressão real falhe.
+"""
+
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from lang_parser import parse_code
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_parser_baseline.json')
+
+BASE = {'functions': 8, 'statements': 40, 'depth': 4, 'ident_len': 6}
+AXES = {
+    'functions': [8, 16, 32, 64, 128],
+    'statements': [25, 50, 100, 200, 400],
+    'depth': [5, 10, 20, 40, 80],
+    'ident_len': [8, 32, 128, 512, 2048],
+}
+
+MAX_EXPONENT = 1.5       # acima disto o crescimento conta como super-linear
+TIME_TOLERANCE = 1.5     # soma dos tempos normalizados de um eixo face ao baseline
+MEMORY_TOLERANCE = 1.2   # pico de memória face ao baseline (é determinístico)
+REPEAT = 9
+
+
+# ------ GERADOR ------
+
+def _name(prefix: str, i: int, length: int) -> str:
+    name = f"{prefix}{i}_"
+    return (name * (length // len(name) + 1))[:max(length, len(name))]
+
+
+def _expr(names: List[str], depth: int, i: int) -> str:
+    ops = ['+', '*', '-', '<', '&&', '%']
+    expr = names[i % len(names)]
+    for level in range(depth):
+        operand = names[(i + level) % len(names)] if level % 3 else str(level)
+        expr = f"({operand} {ops[(i + level) % len(ops)]} {expr})"
+    return expr
+
+
+def generate_program(functions: int = 1, statements: int = 10, depth: int = 2,
+                     ident_len: int = 4) -> str:
+    """Deterministic valid program with the given shape."""
+    fnames = [_name('f', i, ident_len) for i in range(functions)]
+    out = []
+    for f, fname in enumerate(fnames):
+        params = [_name('p', j, ident_len) for j in range(2)]
+        names = params + [_name('v', j, ident_len) for j in range(3)]
+        body = [f"int {name} = {j};" for j, name in enumerate(names[2:])]
+        for s in range(statements):
+            target = names[2 + s % 3]
+            expr = _expr(names, depth, s)
+            kind = s % 4
+            if kind == 0:
+                body.append(f"{target} = {expr};")
+            elif kind == 1:
+                body.append(f"if ({expr}) {{ {target} = {target} + 1; }} else {{ print({target}); }}")
+            elif kind == 2:
+                body.append(f"while ({target} < {s}) {{ {target}++; }}")
+            else:
+                callee = fnames[(f + 1) % functions]
+                body.append(f"{target} = {callee}({expr}, {names[s % len(names)]});")
+        body.append(f"return {names[2]};")
+        out.append(f"int {fname}(int {params[0]}, int {params[1]}) {{\n    "
+                   + "\n    ".join(body) + "\n}")
+    return "\n\n".join(out) + "\n"
+
+
+# ------ MEDIÇÃO ------
+
+def calibrate(repeat: int = REPEAT) -> float:
+    """Time of a fixed pure-Python loop, used to normalise timings across machines."""
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        times.append(time.process_time() - start)
+    return statistics.median(times)
+
+
+def measure(code: str, repeat: int = REPEAT) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        parse_code(code)
+        times.append(time.process_time() - start)
+    tracemalloc.start()
+    try:
+        parse_code(code)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'size': len(code), 'time': statistics.median(times), 'peak': peak}
+
+
+def growth_exponent(sizes: List[float], values: List[float]) -> float:
+    """Least-squares slope of log(value) against log(size): 1.0 is linear."""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(v) for v in values]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    den = sum((x - mx) ** 2 for x in xs)
+    return num / den
+
+
+def run(axes: Dict[str, List[int]] = AXES, repeat: int = REPEAT) -> dict:
+    unit = calibrate(repeat)
+    results = {'unit': unit, 'axes': {}}
+    for axis, values in axes.items():
+        points = []
+        for value in values:
+            code = generate_program(**dict(BASE, **{axis: value}))
+            point = measure(code, repeat)
+            point['value'] = value
+            point['time'] /= unit
+            points.append(point)
+        sizes = [p['size'] for p in points]
+        results['axes'][axis] = {
+            'points': points,
+            'time_exponent': growth_exponent(sizes, [p['time'] for p in points]),
+            'memory_exponent': growth_exponent(sizes, [p['peak'] for p in points]),
+        }
+    return results
+
+
+def check(results: dict, baseline: dict = None) -> List[str]:
+    """Problems found: super-linear curves and regressions against `baseline`."""
+    problems = []
+    for axis, data in results['axes'].items():
+        for kind in ('time_exponent', 'memory_exponent'):
+            if data[kind] > MAX_EXPONENT:
+                problems.append(f"{axis}: {kind} {data[kind]:.2f} > {MAX_EXPONENT}")
+        if not baseline or axis not in baseline['axes']:
+            continue
+        old_points = {p['value']: p for p in baseline['axes'][axis]['points']}
+        # o tempo compara-se pela soma do eixo, menos sensível ao ruído de um ponto
+        pairs = [(p, old_points[p['value']]) for p in data['points'] if p['value'] in old_points]
+        new_time = sum(p['time'] for p, _ in pairs)
+        old_time = sum(old['time'] for _, old in pairs)
+        if pairs and new_time > old_time * TIME_TOLERANCE:
+            problems.append(f"{axis}: tempo {new_time / old_time:.2f}x o baseline")
+        for point, old in pairs:
+            if point['peak'] > old['peak'] * MEMORY_TOLERANCE:
+                problems.append(f"{axis}={point['value']}: memória {point['peak'] / old['peak']:.2f}x o baseline")
+    return problems
+
+
+def report(results: dict) -> str:
+    lines = [f"{'axis':<11} {'value':>6} {'chars':>9} {'time (units)':>13} {'peak (KiB)':>11}"]
+    for axis, data in results['axes'].items():
+        for p in data['points']:
+            lines.append(f"{axis:<11} {p['value']:>6} {p['size']:>9} {p['time']:>13.3f} {p['peak'] / 1024:>11.1f}")
+        lines.append(f"{axis:<11} expoente: tempo {data['time_exponent']:.2f}, memória {data['memory_exponent']:.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    results = run()
+    print(report(results))
+    if '--update-baseline' in sys.argv:
+        with open(BASELINE, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline gravado em {BASELINE}")
+        sys.exit(0)
+    baseline = None
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    problems = check(results, baseline)
+    for problem in problems:
+        print("FALHA:", problem)
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,149 @@
+"""
+Benchmark do custo de despacho por nó.
+
+Conta os nós de um programa gerado por bench_parser.generate_program de três
+formas, com o mesmo trabalho por nó: a cadeia de isinstance usada em
+eval_expr/exec_stmt, o getattr com o nome do método construído em cada nó
+(como o antigo PrettyPrinter.pprint) e langAST.Visitor com a tabela de
+despacho em cache:
+
+    python bench_visitor.py [funções]
+"""
+
+import sys
+import time
+from typing import Dict
+
+from langAST import *
+from bench_parser import generate_program
+from lang_parser import parse_code
+
+
+def count_chain(node) -> int:
+    if isinstance(node, Literal):
+        return 1
+    elif isinstance(node, Variable):
+        return 1
+    elif isinstance(node, Assignment):
+        return 1 + count_chain(node.expr)
+    elif isinstance(node, BinaryOp):
+        return 1 + count_chain(node.left) + count_chain(node.right)
+    elif isinstance(node, UnaryOp):
+        return 1 + count_chain(node.expr)
+    elif isinstance(node, FunctionCall):
+        return 1 + sum(count_chain(arg) for arg in node.args)
+    elif isinstance(node, VarDecl):
+        return 1 + (count_chain(node.init) if node.init is not None else 0)
+    elif isinstance(node, ExprStmt):
+        return 1 + count_chain(node.expr)
+    elif isinstance(node, Print):
+        return 1 + count_chain(node.expr)
+    elif isinstance(node, Return):
+        return 1 + (count_chain(node.value) if node.value is not None else 0)
+    elif isinstance(node, Block):
+        return 1 + sum(count_chain(stmt) for stmt in node.statements)
+    elif isinstance(node, If):
+        n = 1 + count_chain(node.condition) + count_chain(node.then_branch)
+        return n + (count_chain(node.else_branch) if node.else_branch is not None else 0)
+    elif isinstance(node, While):
+        return 1 + count_chain(node.condition) + count_chain(node.body)
+    elif isinstance(node, For):
+        return (1 + count_chain(node.init) + count_chain(node.condition)
+                + count_chain(node.increment) + count_chain(node.body))
+    elif isinstance(node, Function):
+        return 1 + sum(count_chain(p) for p in node.params) + count_chain(node.body)
+    return 1 + sum(count_chain(f) for f in node.functions)
+
+
+class _Counter:
+    """The same pass written with one method per class."""
+
+    def count_Literal(self, node):
+        return 1
+
+    def count_Variable(self, node):
+        return 1
+
+    def count_Assignment(self, node):
+        return 1 + self.visit(node.expr)
+
+    def count_BinaryOp(self, node):
+        return 1 + self.visit(node.left) + self.visit(node.right)
+
+    def count_UnaryOp(self, node):
+        return 1 + self.visit(node.expr)
+
+    def count_FunctionCall(self, node):
+        return 1 + sum(self.visit(arg) for arg in node.args)
+
+    def count_VarDecl(self, node):
+        return 1 + (self.visit(node.init) if node.init is not None else 0)
+
+    def count_ExprStmt(self, node):
+        return 1 + self.visit(node.expr)
+
+    count_Print = count_ExprStmt
+
+    def count_Return(self, node):
+        return 1 + (self.visit(node.value) if node.value is not None else 0)
+
+    def count_Block(self, node):
+        return 1 + sum(self.visit(stmt) for stmt in node.statements)
+
+    def count_If(self, node):
+        n = 1 + self.visit(node.condition) + self.visit(node.then_branch)
+        return n + (self.visit(node.else_branch) if node.else_branch is not None else 0)
+
+    def count_While(self, node):
+        return 1 + self.visit(node.condition) + self.visit(node.body)
+
+    def count_For(self, node):
+        return (1 + self.visit(node.init) + self.visit(node.condition)
+                + self.visit(node.increment) + self.visit(node.body))
+
+    def count_Function(self, node):
+        return 1 + sum(self.visit(p) for p in node.params) + self.visit(node.body)
+
+    def count_Program(self, node):
+        return 1 + sum(self.visit(f) for f in node.functions)
+
+
+class GetattrCounter(_Counter):
+    def visit(self, node):
+        return getattr(self, 'count_' + node.__class__.__name__)(node)
+
+
+class VisitorCounter(_Counter, Visitor):
+    prefix = 'count_'
+
+
+def measure(count, program, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        count(program)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def run(functions: int = 32, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    program = parse_code(generate_program(functions=functions, statements=100, depth=6))
+    nodes = count_chain(program)
+    passes = {
+        'isinstance': count_chain,
+        'getattr': GetattrCounter().visit,
+        'Visitor': VisitorCounter().visit,
+    }
+    results = {}
+    for name, count in passes.items():
+        assert count(program) == nodes
+        elapsed = measure(count, program, repeat)
+        results[name] = {'nodes': nodes, 'time': elapsed, 'ns_per_node': elapsed / nodes * 1e9}
+    return results
+
+
+if __name__ == "__main__":
+    results = run(int(sys.argv[1]) if len(sys.argv) > 1 else 32)
+    print(f"{'despacho':<11} {'nós':>8} {'tempo (ms)':>11} {'ns/nó':>8}")
+    for name, r in results.items():
+        print(f"{name:<11} {r['nodes']:>8} {r['time'] * 1000:>11.1f} {r['ns_per_node']:>8.0f}")
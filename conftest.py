@@ -0,0 +1,19 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", default=False,
+                     help="corre também os testes marcados slow (benchmarks contra o baseline)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: teste demorado e dependente da máquina; só corre com --runslow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip = pytest.mark.skip(reason="precisa de --runslow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
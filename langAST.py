@@ -1,72 +1,100 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union, Any
+from array import array
+from dataclasses import dataclass, replace
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+# Os nós são imutáveis (frozen): para alterar uma árvore usa-se replace_at,
+# que reconstrói só o caminho até à raiz e partilha o resto.
+#
+# A igualdade e o hash são estruturais e vêm de Node (as dataclasses usam
+# eq=False): o hash de cada nó é calculado uma vez, a partir do dos filhos, e
+# fica guardado no slot `_hash`; a igualdade compara primeiro identidade e
+# hash e só depois os campos. Como os literais guardam o tipo do valor,
+# Literal(1) e Literal(True) são diferentes.
+
+class Node:
+    """Base of every AST node: cached structural __hash__ and structural __eq__."""
+
+    __slots__ = ('_hash',)
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:
+            return _structural_hash(self)
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return _structural_eq(self, other)
 
 # Expressões
-@dataclass
-class Expr:
+@dataclass(frozen=True, slots=True, eq=False)
+class Expr(Node):
     pass
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Literal(Expr):
     value: Union[int, float, bool, str]
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Variable(Expr):
     name: str
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class BinaryOp(Expr):
     left: Expr
     op: str  # "+", "-", "*", "/", "%", "==", "!=", ">", "<", ">=", "<=", "&&", "||"
     right: Expr
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class UnaryOp(Expr):
     op: str  # "-", "!", "++"
     expr: Expr
     prefix: bool = True  # True para prefixo (++x), False para sufixo (x++)
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Assignment(Expr):
     var: str
     expr: Expr
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class FunctionCall(Expr):
     name: str
     args: List[Expr]
 
 # Statements
-@dataclass
-class Stmt:
+@dataclass(frozen=True, slots=True, eq=False)
+class Stmt(Node):
     pass
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class ExprStmt(Stmt):
     expr: Expr
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class VarDecl(Stmt):
     type: str
     name: str
     init: Optional[Expr] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Block(Stmt):
     statements: List[Stmt]
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class If(Stmt):
     condition: Expr
     then_branch: Stmt
     else_branch: Optional[Stmt] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class While(Stmt):
     condition: Expr
     body: Stmt
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class For(Stmt):
 
     init: Optional[Union[Expr, VarDecl]]
@@ -74,30 +102,490 @@ class For(Stmt):
     increment: Optional[Expr]
     body: Stmt
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Return(Stmt):
     value: Optional[Expr] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Print(Stmt):
     expr: Expr
 
 # Definição de função
-@dataclass
-class Function:
+@dataclass(frozen=True, eq=False)
+class Function(Node):
+    # slots declarados à mão para incluir `_body_loader`, que não é um campo
+    __slots__ = ('return_type', 'name', 'params', 'body', '_body_loader')
 
     return_type: str
     name: str
     params: List[VarDecl]
     body: Block
 
+    # Modo lazy do parser: a função é criada sem `body` e com `_body_loader`;
+    # o corpo só é parseado no primeiro acesso e fica depois guardado.
+    def __getattr__(self, name):
+        if name == 'body':
+            loader = getattr(self, '_body_loader', None)
+            if loader is not None:
+                body = loader()
+                object.__delattr__(self, '_body_loader')
+                object.__setattr__(self, 'body', body)
+                return body
+        raise AttributeError(name)
+
+    @property
+    def body_loaded(self) -> bool:
+        """False while a lazy body has not been read (and so not produced) yet."""
+        return not hasattr(self, '_body_loader')
+
+    def __reduce__(self):
+        # pickle/deepcopy levam sempre o corpo já materializado
+        return Function, (self.return_type, self.name, self.params, self.body)
+
+
+def lazy_function(return_type: str, name: str, params: List[VarDecl], load_body) -> Function:
+    """Function whose body is `load_body()`, called on the first read of `body`."""
+    function = Function(return_type, name, params, None)
+    # os nós são frozen: o corpo pendente é instalado por baixo de __setattr__
+    object.__delattr__(function, 'body')
+    object.__setattr__(function, '_body_loader', load_body)
+    return function
+
 # Programa completo
-@dataclass
-class Program:
+@dataclass(frozen=True, eq=False)
+class Program(Node):
+    # slots à mão para os índices: o de nomes é feito na construção; chamadas e
+    # declarações precisam dos corpos e só são calculadas no primeiro uso
+    __slots__ = ('functions', 'global_vars', '_by_name', '_symbols')
+
     functions: List[Function]
     global_vars: List[VarDecl]
-    
+
+    def __post_init__(self):
+        by_name = {}
+        for function in self.functions:
+            by_name.setdefault(function.name, function)
+        object.__setattr__(self, '_by_name', by_name)
+
+    def __reduce__(self):
+        return Program, (self.functions, self.global_vars)
+
+    def function(self, name: str) -> Optional['Function']:
+        """The function called `name` (the first one, if repeated), or None."""
+        return self._by_name.get(name)
+
+    def calls_to(self, name: str) -> List[Tuple['Function', 'FunctionCall']]:
+        """(caller, call) for every call to `name`, in source order."""
+        return self._symbol_index()[0].get(name, [])
+
+    def declarations(self, name: str) -> List['VarDecl']:
+        """Parameters and local variable declarations of function `name`."""
+        return self._symbol_index()[1].get(name, [])
+
+    def _symbol_index(self):
+        try:
+            return self._symbols
+        except AttributeError:
+            pass
+        calls = {}
+        decls = {}
+        for function in self.functions:
+            own = function is self._by_name[function.name]
+            if own:
+                decls[function.name] = list(function.params)
+            # pré-ordem numa pilha simples: walk() criaria um caminho por nó
+            stack = [function.body]
+            while stack:
+                node = stack.pop()
+                if node.__class__ is FunctionCall:
+                    calls.setdefault(node.name, []).append((function, node))
+                elif own and node.__class__ is VarDecl:
+                    decls[function.name].append(node)
+                children = [child for _, child in child_nodes(node)]
+                stack.extend(reversed(children))
+        object.__setattr__(self, '_symbols', (calls, decls))
+        return self._symbols
+
     def __str__(self) -> str:
         from prettyPrinting import PrettyPrinter
         return PrettyPrinter(indent_size=2).pprint(self)
-        
\ No newline at end of file
+        
+
+
+# ------ EDIÇÃO PERSISTENTE ------
+
+NODE_TYPES = (Expr, Stmt, Function, Program)
+
+# Caminho desde a raiz: um passo (campo, índice) por nível; o índice é None
+# nos campos que guardam um único nó.
+Path = Tuple[Tuple[str, Optional[int]], ...]
+
+
+def child_nodes(node) -> Iterator[Tuple[Tuple[str, Optional[int]], Any]]:
+    """((field, index), child) for every direct child node of `node`."""
+    for name in node.__dataclass_fields__:
+        value = getattr(node, name)
+        if value.__class__ is list:
+            for i, item in enumerate(value):
+                if isinstance(item, NODE_TYPES):
+                    yield (name, i), item
+        elif isinstance(value, NODE_TYPES):
+            yield (name, None), value
+
+
+def walk(root) -> Iterator[Tuple[Path, Any]]:
+    """(path, node) for every node under `root`, in pre-order."""
+    stack = [((), root)]
+    while stack:
+        path, node = stack.pop()
+        yield path, node
+        children = [(path + (step,), child) for step, child in child_nodes(node)]
+        stack.extend(reversed(children))
+
+
+def get_at(root, path: Path):
+    node = root
+    for name, index in path:
+        node = getattr(node, name)
+        if index is not None:
+            node = node[index]
+    return node
+
+
+def replace_at(root, path: Path, new_node, interner: Optional['Interner'] = None):
+    """Copy of `root` with the node at `path` replaced by `new_node`.
+
+    Only the nodes (and lists) on the path are rebuilt; every other subtree
+    is shared with `root`, so an edit costs O(depth) instead of a deepcopy.
+    With an `interner` (whose canonical tree `root` should be) `new_node`
+    and the rebuilt nodes are made canonical in it.
+    """
+    if interner is not None:
+        new_node = interner.tree(new_node)
+    ancestors = []
+    node = root
+    for name, index in path:
+        ancestors.append(node)
+        node = getattr(node, name)
+        if index is not None:
+            node = node[index]
+    for parent, (name, index) in zip(reversed(ancestors), reversed(path)):
+        if index is not None:
+            items = list(getattr(parent, name))
+            items[index] = new_node
+            new_node = items
+        new_node = replace(parent, **{name: new_node})
+        if interner is not None and isinstance(new_node, (Expr, Stmt)):
+            new_node = interner.node(new_node)
+    return new_node
+
+
+class NodeTable:
+    """Stable integer ids for the nodes under `root`: their post-order position.
+
+    Children are numbered before their parent and the root gets the last id,
+    the same numbering lang_parser.SourceMap uses for the nodes of a parse.
+    Per id it keeps the node, the parent id and the step (field, index) from
+    the parent in parallel arrays, so node_at and parent_of are O(1) and
+    path_to costs O(depth), without reflection or building a path per node.
+    """
+
+    def __init__(self, root):
+        self.nodes = []
+        self.parents = array('i')
+        self.fields = array('B')      # índice em field_names
+        self.indices = array('i')     # posição na lista, -1 num campo de um só nó
+        self.field_names: List[str] = []
+        self._ids = None
+        codes = {}
+        # [nó, campo, índice, entrada do pai, ids dos filhos]; a lista de ids
+        # é None até o nó ser expandido, e o nó só é numerado depois dos filhos
+        stack = [[root, None, -1, None, None]]
+        while stack:
+            entry = stack[-1]
+            node, name, index, parent, children = entry
+            if children is None:
+                entry[4] = []
+                stack.extend(reversed([[child, field, -1 if at is None else at, entry, None]
+                                       for (field, at), child in child_nodes(node)]))
+                continue
+            stack.pop()
+            i = len(self.nodes)
+            self.nodes.append(node)
+            self.parents.append(-1)
+            for child in children:
+                self.parents[child] = i
+            if parent is not None:
+                parent[4].append(i)
+            if name is None:
+                self.fields.append(0)
+            else:
+                code = codes.get(name)
+                if code is None:
+                    code = codes[name] = len(self.field_names)
+                    self.field_names.append(name)
+                self.fields.append(code)
+            self.indices.append(index)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def node_at(self, node_id: int):
+        return self.nodes[node_id]
+
+    def parent_of(self, node_id: int) -> Optional[int]:
+        """Id of the parent of `node_id`, or None for the root."""
+        parent = self.parents[node_id]
+        return parent if parent >= 0 else None
+
+    def path_to(self, node_id: int) -> Path:
+        """Path from the root to `node_id`, for get_at/replace_at."""
+        steps = []
+        while self.parents[node_id] >= 0:
+            index = self.indices[node_id]
+            steps.append((self.field_names[self.fields[node_id]], index if index >= 0 else None))
+            node_id = self.parents[node_id]
+        return tuple(reversed(steps))
+
+    def id_of(self, node) -> Optional[int]:
+        """Id of `node` (its first occurrence, if the tree shares it), or None."""
+        if self._ids is None:
+            ids = {}
+            for i, n in enumerate(self.nodes):
+                ids.setdefault(id(n), i)
+            self._ids = ids
+        return self._ids.get(id(node))
+
+
+# ------ HASH E IGUALDADE ESTRUTURAIS ------
+
+def _structural_hash(root: Node) -> int:
+    # pilha iterativa: um nó só é fechado quando todos os filhos já têm _hash;
+    # senão os filhos em falta vão para a pilha e o nó volta a ser visto depois
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        parts = [node.__class__]
+        missing = False
+        for name in node.__dataclass_fields__:
+            value = getattr(node, name)
+            if value.__class__ is list:
+                hashes = [getattr(item, '_hash', None) for item in value]
+                if None in hashes:
+                    missing = True
+                    stack.extend([item for item, h in zip(value, hashes) if h is None])
+                parts.append(tuple(hashes))
+            elif isinstance(value, Node):
+                h = getattr(value, '_hash', None)
+                if h is None:
+                    missing = True
+                    stack.append(value)
+                parts.append(h)
+            else:
+                parts.append((value.__class__, value))
+        if not missing:
+            stack.pop()
+            object.__setattr__(node, '_hash', hash(tuple(parts)))
+    return root._hash
+
+
+def _structural_eq(a: Node, b: Node) -> bool:
+    if hash(a) != hash(b):
+        return False
+    # depois de hash(a) e hash(b) todos os nós das duas árvores têm _hash
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if x is y:
+            continue
+        if x.__class__ is not y.__class__ or x._hash != y._hash:
+            return False
+        for name in x.__dataclass_fields__:
+            u = getattr(x, name)
+            v = getattr(y, name)
+            if u.__class__ is list:
+                if v.__class__ is not list or len(u) != len(v):
+                    return False
+                stack.extend(zip(u, v))
+            elif isinstance(u, Node):
+                stack.append((u, v))
+            elif u.__class__ is not v.__class__ or u != v:
+                return False
+    return True
+
+# ------ VISITORS ------
+#
+# O handler de cada classe de nó é resolvido uma só vez por subclasse de
+# Visitor e guardado numa tabela (classe do nó -> função), em vez de testar
+# isinstance em cadeia ou construir o nome do método em cada nó.
+
+class _Handlers(dict):
+    """Dispatch table of a Visitor class: node class -> handler, filled on first use."""
+
+    def __init__(self, visitor: type):
+        super().__init__()
+        self.visitor = visitor
+
+    def __missing__(self, node_class: type):
+        for klass in node_class.__mro__:
+            handler = getattr(self.visitor, self.visitor.prefix + klass.__name__, None)
+            if handler is not None:
+                break
+        else:
+            handler = self.visitor.generic_visit
+        self[node_class] = handler
+        return handler
+
+
+class Visitor:
+    """Base for AST passes: visit(node) calls `<prefix><Class>(node)`.
+
+    Handlers are looked up along the node class MRO (so `visit_Expr` catches
+    every expression without its own handler); nodes with none go to
+    generic_visit, which visits the children. State a pass needs (an
+    environment, an indentation level) lives on the visitor, so a visit is
+    a single table lookup and call.
+    """
+
+    prefix = 'visit_'
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = _Handlers(cls)
+
+    def visit(self, node):
+        return self._handlers[node.__class__](self, node)
+
+    def generic_visit(self, node):
+        for _, child in child_nodes(node):
+            self.visit(child)
+
+
+Visitor._handlers = _Handlers(Visitor)
+
+
+class Transformer(Visitor):
+    """Visitor whose handlers return the node to put in place of the visited one.
+
+    generic_visit transforms the children and returns the node itself when
+    none of them changed, so untouched subtrees are shared, not copied. In a
+    list field a None result removes the item.
+
+    With an `interner`, every node visit() returns is canonical in it: the
+    nodes a pass builds go through Interner.tree, which stops at the
+    subtrees that already are, so the input may be canonical or not.
+    """
+
+    interner = None
+
+    def __init__(self, interner: Optional['Interner'] = None):
+        self.interner = interner
+
+    def visit(self, node):
+        if self.interner is None:
+            return self._handlers[node.__class__](self, node)
+        new = self._handlers[node.__class__](self, node)
+        return new if new is None else self.interner.tree(new)
+
+    def generic_visit(self, node):
+        changes = {}
+        for name in node.__dataclass_fields__:
+            value = getattr(node, name)
+            if value.__class__ is list:
+                items = []
+                changed = False
+                for item in value:
+                    new = self.visit(item) if isinstance(item, NODE_TYPES) else item
+                    if new is not item:
+                        changed = True
+                    if new is not None:
+                        items.append(new)
+                if changed:
+                    changes[name] = items
+            elif isinstance(value, NODE_TYPES):
+                new = self.visit(value)
+                if new is not value:
+                    changes[name] = new
+        return replace(node, **changes) if changes else node
+
+
+# ------ INTERNING ------
+#
+# Hash-consing: um Interner guarda uma instância canónica por cada nó
+# estruturalmente igual. A chave de um nó é a classe, os valores primitivos
+# (com o tipo, para não confundir Literal(1) com Literal(True)) e o id dos
+# filhos, que já são canónicos; dentro do mesmo Interner, `a is b` passa a
+# ser um teste de igualdade válido. Só Expr e Stmt são partilhados: Function
+# (com corpo lazy) e Program ficam sempre únicos. O Parser (com `interner`),
+# o Transformer e replace_at constroem os nós já pelo Interner; tree() fica
+# para as árvores feitas sem ele.
+
+def _intern_key(value):
+    if value.__class__ is list:
+        return tuple([id(item) for item in value])
+    if isinstance(value, NODE_TYPES):
+        return id(value)
+    return value.__class__, value
+
+
+class Interner:
+    """Table of canonical nodes; identical Expr/Stmt subtrees become one object."""
+
+    def __init__(self):
+        self._table = {}
+        self._canonical = set()   # ids dos nós da tabela, que ela mantém vivos
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __call__(self, cls, *args, **kwargs):
+        """Factory: the canonical `cls(*args, **kwargs)`, children must be canonical."""
+        return self.node(cls(*args, **kwargs))
+
+    def node(self, node):
+        """Canonical instance equal to `node`, whose children must already be canonical."""
+        key = (node.__class__,) + tuple([_intern_key(getattr(node, name))
+                                         for name in node.__dataclass_fields__])
+        canonical = self._table.setdefault(key, node)
+        if canonical is not node:
+            self.hits += 1
+        else:
+            self._canonical.add(id(node))
+        return canonical
+
+    def tree(self, root):
+        """Copy of `root` built from canonical nodes, sharing every repeated subtree.
+
+        Nodes are rebuilt only when one of their children was replaced by an
+        existing instance, and subtrees that are already canonical are not
+        walked; the walk is iterative, so depth is not limited.
+        """
+        canonical_ids = self._canonical
+        done = {}
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in done:
+                continue
+            if id(node) in canonical_ids:
+                done[id(node)] = node
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend([(child, False) for _, child in child_nodes(node)])
+                continue
+            changes = {}
+            for name in node.__dataclass_fields__:
+                value = getattr(node, name)
+                if value.__class__ is list:
+                    items = [done.get(id(item), item) for item in value]
+                    if any(new is not old for new, old in zip(items, value)):
+                        changes[name] = items
+                elif isinstance(value, NODE_TYPES) and done[id(value)] is not value:
+                    changes[name] = done[id(value)]
+            canonical = replace(node, **changes) if changes else node
+            if isinstance(canonical, (Expr, Stmt)):
+                canonical = self.node(canonical)
+            done[id(node)] = canonical
+        return done[id(root)]
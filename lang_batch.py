@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from langAST import *
+from lang_flat import from_bytes, to_bytes
+from lang_parser import parse_code_with_diagnostics
+
+# ------ FORMATO COMPACTO ------
+#
+# Cada Program é enviado entre processos no formato binário de lang_flat
+# (tabela de strings + stream de varints), bem mais pequeno e rápido de
+# serializar do que o pickle das dataclasses aninhadas.
+
+def encode(program: Optional[Program]) -> Optional[bytes]:
+    return to_bytes(program) if program is not None else None
+
+
+def decode(data: Optional[bytes]) -> Optional[Program]:
+    return from_bytes(data) if data is not None else None
+
+
+# ------ PARSING EM LOTE ------
+
+@dataclass
+class FileResult:
+    path: str
+    program: Optional[Program]
+    diagnostics: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.diagnostics
+
+
+def _parse_file(path: str):
+    try:
+        with open(path, encoding='utf-8') as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return None, [str(e)]
+    # o aninhamento profundo não falha: parse_tokens passa ao StackParser
+    program, errors = parse_code_with_diagnostics(code)
+    return encode(program), [str(e) for e in errors]
+
+
+def parse_files(paths: Sequence[str], workers: Optional[int] = None) -> List[FileResult]:
+    """Parse many files on a process pool, returning results in input order.
+
+    A file that cannot be read or has syntax errors does not abort the batch:
+    its FileResult carries the diagnostics (and the partial Program, if any).
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        results = list(map(_parse_file, paths))
+    else:
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_file, paths, chunksize=chunksize))
+    return [
+        FileResult(path, decode(program), diagnostics)
+        for path, (program, diagnostics) in zip(paths, results)
+    ]
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Optional
+
+from langAST import Program
+from lang_flat import dump, load
+from lang_parser import GRAMMAR_VERSION, parse_code
+
+
+def cache_key(code: str) -> str:
+    """Content address of `code` for the current grammar."""
+    h = hashlib.sha256(f"{GRAMMAR_VERSION}\0".encode())
+    h.update(code.encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+
+class ParseCache:
+    """parse_code behind a bounded in-memory LRU and an optional on-disk store.
+
+    Cached Programs are shared between callers. Nodes are frozen, so edits
+    go through langAST.replace_at, which leaves the cached tree untouched.
+    """
+
+    SUFFIX = '.ast'
+
+    def __init__(self, maxsize: int = 128, cache_dir: Optional[str] = None,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def parse(self, code: str) -> Program:
+        key = cache_key(code)
+        program = self.memory.get(key)
+        if program is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return program
+        program = self._load(key)
+        if program is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            program = parse_code(code)
+            self._store(key, program)
+        self.memory[key] = program
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+        return program
+
+    def clear(self):
+        self.memory.clear()
+        if self.cache_dir:
+            for entry in self._entries():
+                _remove(entry.path)
+
+    # ------ DISCO ------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _entries(self):
+        return [e for e in os.scandir(self.cache_dir) if e.name.endswith(self.SUFFIX)]
+
+    def _load(self, key: str) -> Optional[Program]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            program = load(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # entrada corrompida ou de uma versão incompatível
+            _remove(path)
+            return None
+        _touch(path)  # o mtime serve de ordem LRU para a evicção
+        return program
+
+    def _store(self, key: str, program: Program):
+        if not self.cache_dir:
+            return
+        # escrita atómica: ficheiro temporário na mesma diretoria + os.replace
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            dump(program, tmp)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            _remove(tmp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in self._entries():
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _touch(path: str):
+    # outro processo pode ter removido a entrada entretanto
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+# Cache partilhada; MES_PARSE_CACHE_DIR ativa a camada em disco entre processos.
+default_cache = ParseCache(cache_dir=os.environ.get('MES_PARSE_CACHE_DIR') or None)
+
+
+def cached_parse_code(code: str) -> Program:
+    return default_cache.parse(code)
@@ -0,0 +1,399 @@
+import ast as pyast
+import contextlib
+import io
+from collections import OrderedDict
+from typing import List, Optional
+
+import lang_evaluate
+from langAST import *
+from lang_parser import parse_code
+from testcases import programa1, programa2, programa3, programa4
+
+# Backend que traduz cada Function para uma função Python (via ast do
+# Python e compile()): while/for são ciclos nativos, return é um return e
+# cada variável declarada é uma variável local, com um nome único por
+# declaração (v<n>_<nome>), pelo que as sombras de um Block não se misturam.
+#
+# O que não tem tradução direta fica com o interpretador: um VarDecl solto
+# como ramo de if/while (só declara se for executado) ou uma função que o
+# compile() do Python recusa (demasiados blocos aninhados) passa a ser
+# interpretada, e o main corre no interpretador quando lhe falta uma das
+# entradas que lê. Cada função só é gerada na primeira chamada: até lá o seu
+# nome no namespace é um stub que a gera e se substitui por ela.
+
+CACHE_SIZE = 128
+
+_CACHE = OrderedDict()
+
+
+class Unsupported(Exception):
+    """Construct the Python backend leaves to the interpreter."""
+
+
+def _div(left, right):
+    return left // right if isinstance(left, int) else left / right
+
+
+def _fail(message, *operands):
+    # os operandos já foram avaliados, como no interpretador
+    raise Exception(message)
+
+
+HELPERS = {'_div': _div, '_fail': _fail}
+
+_ARITHMETIC = {'+': pyast.Add, '-': pyast.Sub, '*': pyast.Mult, '%': pyast.Mod}
+_COMPARE = {'==': pyast.Eq, '!=': pyast.NotEq, '<': pyast.Lt, '>': pyast.Gt,
+            '<=': pyast.LtE, '>=': pyast.GtE}
+_LOGIC = {'&&': pyast.BitAnd, '||': pyast.BitOr}
+
+
+def _load(name: str) -> pyast.Name:
+    return pyast.Name(name, pyast.Load())
+
+
+def _store(name: str) -> pyast.Name:
+    return pyast.Name(name, pyast.Store())
+
+
+def _call(name: str, *args) -> pyast.Call:
+    return pyast.Call(_load(name), list(args), [])
+
+
+def _fail_call(message: str, *operands) -> pyast.Call:
+    return _call('_fail', pyast.Constant(message), *operands)
+
+
+def _function_name(name: str) -> str:
+    return 'f_' + name
+
+
+class FunctionGenerator(Visitor):
+    """Builds the Python FunctionDef of one Function.
+
+    Expressions give a Python expression node, statements a list of
+    statement nodes. In `entry` mode the function is main as evaluate runs
+    it: names it does not declare are inputs and become its parameters.
+    """
+
+    prefix = 'gen_'
+
+    def __init__(self, function: Function, program: Program, entry: bool = False):
+        self.function = function
+        self.program = program
+        self.scopes = [{}]
+        self.inputs = {} if entry else None     # nome da entrada -> variável Python
+        self.counter = 0
+
+    def generate(self) -> pyast.FunctionDef:
+        params = []
+        if self.inputs is None:
+            for param in self.function.params:
+                # parâmetros repetidos: vale o último, como em Environment.declare
+                params.append(self.fresh(param.name))
+                self.scopes[-1][param.name] = params[-1]
+        body = self.statements(self.function.body.statements)
+        if not (body and isinstance(body[-1], pyast.Return)):
+            body.append(pyast.Return(pyast.Constant(0 if self.inputs is None else -1)))
+        if self.inputs is not None:
+            params = list(self.inputs.values())
+        tree = pyast.parse("def f(): pass").body[0]
+        tree.name = '_entry' if self.inputs is not None else _function_name(self.function.name)
+        tree.args.args = [pyast.arg(name) for name in params]
+        tree.body = body
+        return tree
+
+    # ------ NOMES ------
+
+    def fresh(self, name: str) -> str:
+        self.counter += 1
+        return f"v{self.counter}_{name}"
+
+    def declare(self, name: str) -> str:
+        scope = self.scopes[-1]
+        if name not in scope:
+            scope[name] = self.fresh(name)
+        return scope[name]
+
+    def resolve(self, name: str) -> Optional[str]:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        if self.inputs is None:
+            return None
+        if name not in self.inputs:
+            self.inputs[name] = self.fresh(name)
+        return self.inputs[name]
+
+    # ------ INSTRUÇÕES ------
+
+    def statements(self, statements) -> List[pyast.stmt]:
+        body = []
+        for stmt in statements:
+            body.extend(self.visit(stmt))
+        return body
+
+    def scoped(self, statements) -> List[pyast.stmt]:
+        self.scopes.append({})
+        try:
+            return self.statements(statements)
+        finally:
+            self.scopes.pop()
+
+    def branch(self, stmt) -> List[pyast.stmt]:
+        if isinstance(stmt, VarDecl):
+            raise Unsupported(f"declaração solta num ramo: {stmt.name}")
+        return self.visit(stmt) or [pyast.Pass()]
+
+    def gen_VarDecl(self, stmt):
+        value = self.visit(stmt.init) if stmt.init else pyast.Constant(0)
+        return [pyast.Assign([_store(self.declare(stmt.name))], value)]
+
+    def gen_ExprStmt(self, stmt):
+        expr = stmt.expr
+        if isinstance(expr, Assignment):
+            value = self.visit(expr.expr)
+            target = self.resolve(expr.var)
+            if target is not None:
+                return [pyast.Assign([_store(target)], value)]
+        elif isinstance(expr, UnaryOp) and expr.op == '++' and isinstance(expr.expr, Variable):
+            target = self.resolve(expr.expr.name)
+            if target is not None:
+                return [pyast.Assign([_store(target)],
+                                     pyast.BinOp(_load(target), pyast.Add(), pyast.Constant(1)))]
+        return [pyast.Expr(self.visit(expr))]
+
+    def gen_Print(self, stmt):
+        return [pyast.Expr(_call('print', self.visit(stmt.expr)))]
+
+    def gen_Return(self, stmt):
+        return [pyast.Return(self.visit(stmt.value) if stmt.value else pyast.Constant(0))]
+
+    def gen_Block(self, stmt):
+        return self.scoped(stmt.statements)
+
+    def gen_If(self, stmt):
+        test = self.visit(stmt.condition)
+        orelse = self.branch(stmt.else_branch) if stmt.else_branch else []
+        return [pyast.If(test, self.branch(stmt.then_branch), orelse)]
+
+    def gen_While(self, stmt):
+        return [pyast.While(self.visit(stmt.condition), self.branch(stmt.body), [])]
+
+    def gen_For(self, stmt):
+        self.scopes.append({})
+        try:
+            init = self.visit(stmt.init) if isinstance(stmt.init, (VarDecl, ExprStmt)) else []
+            test = self.visit(stmt.condition)
+            body = self.branch(stmt.body)
+            if stmt.increment:
+                body = body + self.visit(ExprStmt(stmt.increment))
+            return init + [pyast.While(test, body, [])]
+        finally:
+            self.scopes.pop()
+
+    # ------ EXPRESSÕES ------
+
+    def gen_Literal(self, expr):
+        return pyast.Constant(expr.value)
+
+    def gen_Variable(self, expr):
+        name = self.resolve(expr.name)
+        if name is None:
+            return _fail_call(f"Variável '{expr.name}' não definida.")
+        return _load(name)
+
+    def gen_Assignment(self, expr):
+        value = self.visit(expr.expr)
+        target = self.resolve(expr.var)
+        if target is None:
+            return _fail_call(f"Variável '{expr.var}' não definida para atribuição.", value)
+        return pyast.NamedExpr(_store(target), value)
+
+    def gen_BinaryOp(self, expr):
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        op = expr.op
+        if op in _ARITHMETIC:
+            return pyast.BinOp(left, _ARITHMETIC[op](), right)
+        if op in _COMPARE:
+            return pyast.Compare(left, [_COMPARE[op]()], [right])
+        if op in _LOGIC:
+            # bool & bool: os dois lados são sempre avaliados, como no interpretador
+            return pyast.BinOp(_call('bool', left), _LOGIC[op](), _call('bool', right))
+        if op == '/':
+            return _call('_div', left, right)
+        return _fail_call(f"Operador binário inválido: {op}", left, right)
+
+    def gen_UnaryOp(self, expr):
+        operand = self.visit(expr.expr)
+        if expr.op == '-':
+            return pyast.UnaryOp(pyast.USub(), operand)
+        if expr.op == '!':
+            return pyast.UnaryOp(pyast.Not(), operand)
+        if expr.op != '++':
+            return _fail_call(f"Operador unário inválido: {expr.op}", operand)
+        if not isinstance(expr.expr, Variable):
+            return _fail_call("++ só pode ser aplicado a variáveis.", operand)
+        target = self.resolve(expr.expr.name)
+        if target is None:
+            return operand
+        if expr.prefix:
+            return pyast.NamedExpr(_store(target),
+                                   pyast.BinOp(_load(target), pyast.Add(), pyast.Constant(1)))
+        # i++: (t := i, i := t + 1)[0]
+        self.counter += 1
+        old = f"t{self.counter}"
+        pair = pyast.Tuple([
+            pyast.NamedExpr(_store(old), _load(target)),
+            pyast.NamedExpr(_store(target), pyast.BinOp(_load(old), pyast.Add(), pyast.Constant(1))),
+        ], pyast.Load())
+        return pyast.Subscript(pair, pyast.Constant(0), pyast.Load())
+
+    def gen_FunctionCall(self, expr):
+        func = self.program.function(expr.name)
+        if not func:
+            return _fail_call(f"Função '{expr.name}' não definida.")
+        if len(func.params) != len(expr.args):
+            return _fail_call("Número incorreto de argumentos.")
+        return _call(_function_name(expr.name), *[self.visit(arg) for arg in expr.args])
+
+    def generic_visit(self, node):
+        raise Unsupported(f"nó sem tradução: {node.__class__.__name__}")
+
+
+def _compile(tree: pyast.FunctionDef, namespace: dict):
+    module = pyast.fix_missing_locations(pyast.Module([tree], []))
+    exec(compile(module, f"<mes {tree.name}>", 'exec'), namespace)
+
+
+def _interpreted(program: Program, func: Function):
+    """Python callable that runs `func` in lang_evaluate's Interpreter."""
+    def call(*args):
+        env = lang_evaluate.Environment()
+        for param, value in zip(func.params, args):
+            env.declare(param.name, value)
+        try:
+            lang_evaluate.Interpreter(program, env).run_block(func.body, env)
+        except lang_evaluate.ReturnException as r:
+            return r.value
+        return 0
+    return call
+
+
+class PythonProgram:
+    """Result of compile_program: native functions plus the fallbacks.
+
+    Functions are generated on their first call (source() generates the
+    rest), so `interpreted` lists the fallbacks among those generated.
+    """
+
+    def __init__(self, program: Program):
+        self.program = program
+        self.namespace = dict(HELPERS)
+        self.trees = []               # FunctionDef gerados, para source()
+        self.interpreted = []         # funções que ficaram no interpretador
+        self.pending = {}             # nome Python -> Function ainda por gerar
+        for func in program.functions:
+            if program.function(func.name) is not func:
+                continue
+            name = _function_name(func.name)
+            self.pending[name] = func
+            self.namespace[name] = self._on_first_call(name)
+        self.entry = None
+        self.inputs = []
+        main_func = program.function('main')
+        if main_func:
+            generator = FunctionGenerator(main_func, program, entry=True)
+            if self._generate(generator) is not None:
+                self.entry = self.namespace['_entry']
+                self.inputs = list(generator.inputs)
+
+    def _on_first_call(self, name: str):
+        def first_call(*args):
+            self._define(name)
+            return self.namespace[name](*args)
+        return first_call
+
+    def _define(self, name: str):
+        func = self.pending.pop(name)
+        if self._generate(FunctionGenerator(func, self.program)) is None:
+            self.interpreted.append(func.name)
+            self.namespace[name] = _interpreted(self.program, func)
+
+    def _generate(self, generator: FunctionGenerator) -> Optional[pyast.FunctionDef]:
+        try:
+            tree = generator.generate()
+            _compile(tree, self.namespace)
+        except (Unsupported, SyntaxError, RecursionError):
+            return None
+        self.trees.append(tree)
+        return tree
+
+    def source(self) -> str:
+        for name in list(self.pending):
+            self._define(name)
+        return '\n\n'.join(pyast.unparse(tree) for tree in self.trees)
+
+    def evaluate(self, inputs: list[tuple[str, int]]) -> int:
+        values = dict(inputs)
+        if self.entry is None or any(name not in values for name in self.inputs):
+            # sem main, main sem tradução ou uma entrada em falta: o
+            # interpretador dá o resultado (ou o erro) no ponto certo
+            return lang_evaluate.evaluate(self.program, inputs)
+        return self.entry(*[values[name] for name in self.inputs])
+
+
+def compile_program(ast: Program) -> PythonProgram:
+    """PythonProgram for `ast`, cached by the Program's structural hash."""
+    if not all(func.body_loaded for func in ast.functions):
+        # o hash estrutural leria (e parsearia) os corpos que ainda não foram lidos
+        return PythonProgram(ast)
+    compiled = _CACHE.get(ast)
+    if compiled is not None:
+        _CACHE.move_to_end(ast)
+        return compiled
+    compiled = _CACHE[ast] = PythonProgram(ast)
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return compiled
+
+
+def evaluate(ast: Program, inputs: list[tuple[str, int]]) -> int:
+    """Same contract as lang_evaluate.evaluate, through generated Python code."""
+    return compile_program(ast).evaluate(inputs)
+
+
+def _outcome(run, ast, inputs):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            result = run(ast, inputs)
+        except Exception as e:
+            result = ('erro', str(e))
+    return result, output.getvalue()
+
+
+def differential_check(ast: Program, inputs_list) -> List[str]:
+    """Runs where this backend and lang_evaluate.evaluate differ in result, output or error."""
+    problems = []
+    for inputs in inputs_list:
+        expected = _outcome(lang_evaluate.evaluate, ast, inputs)
+        got = _outcome(evaluate, ast, inputs)
+        if got != expected:
+            problems.append(f"inputs {inputs}: esperado {expected}, obtido {got}")
+    return problems
+
+
+if __name__ == "__main__":
+    programas = [
+        ("programa1", programa1, [[("num", 1)], [("num", 5)], [("num", 10)]]),
+        ("programa2", programa2, [[("n", 2)], [("n", 5)], [("n", 30)]]),
+        ("programa3", programa3, [[("number", 2)], [("number", 15)], [("number", 97)]]),
+        ("programa4", programa4, [[("x", 10), ("y", 5), ("z", 0)], [("x", -5), ("y", 2), ("z", 10)]]),
+    ]
+
+    for nome, codigo, inputs_list in programas:
+        ast = parse_code(codigo)
+        print(f"{nome}:\n{compile_program(ast).source()}\n")
+        problems = differential_check(ast, inputs_list)
+        print(f"{nome}: " + ("igual ao interpretador" if not problems else "\n".join(problems)) + "\n")
@@ -0,0 +1,338 @@
+import operator
+from typing import Callable, Dict, Optional
+
+from langAST import *
+from lang_evaluate import Environment
+
+# Backend de closures: cada Function é traduzida, na primeira chamada, numa
+# árvore de funções Python especializadas para o nó que representam (operador já
+# resolvido para a função de `operator`, ramos vazios já eliminados), pelo
+# que a execução não volta a despachar por classe nem a comparar strings.
+#
+# Uma expressão compilada é `f(env) -> valor`. Uma instrução compilada é
+# `f(env) -> None | (valor,)`: o tuplo é um `return` a propagar até à
+# chamada, sem o custo de levantar uma exceção. A semântica (ambientes,
+# mensagens de erro, `&&`/`||` sem curto-circuito) é a de lang_evaluate; só
+# os blocos e ciclos que não declaram nada deixam de criar um Environment,
+# que ficaria sempre vazio. Uma função que nunca é chamada não é compilada
+# (nem, vinda de parse_code_lazy, parseada).
+
+_BINARY = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': lambda left, right: left // right if isinstance(left, int) else left / right,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '&&': lambda left, right: bool(left) and bool(right),
+    '||': lambda left, right: bool(left) or bool(right),
+}
+
+_UNARY = {
+    '-': operator.neg,
+    '!': operator.not_,
+}
+
+_RETURN_ZERO = (0,)
+
+
+def _declares(statements) -> bool:
+    """Whether running `statements` can declare a variable in the current Environment."""
+    for stmt in statements:
+        if isinstance(stmt, VarDecl):
+            return True
+        # um VarDecl solto como ramo de um if/while declara no ambiente atual
+        if isinstance(stmt, If) and _declares([stmt.then_branch, stmt.else_branch]):
+            return True
+        if isinstance(stmt, While) and _declares([stmt.body]):
+            return True
+    return False
+
+
+def _getter(name: str):
+    def get(env):
+        scope = env.vars
+        if name in scope:
+            return scope[name]
+        env = env.parent
+        while env is not None:
+            scope = env.vars
+            if name in scope:
+                return scope[name]
+            env = env.parent
+        raise Exception(f"Variável '{name}' não definida.")
+    return get
+
+
+def _setter(name: str):
+    def set(env, value):
+        while env is not None:
+            scope = env.vars
+            if name in scope:
+                scope[name] = value
+                return
+            env = env.parent
+        raise Exception(f"Variável '{name}' não definida para atribuição.")
+    return set
+
+
+def _failing(message: str, *operands):
+    """Closure that evaluates `operands` (as the interpreter would) and then raises."""
+    def fail(env):
+        for operand in operands:
+            operand(env)
+        raise Exception(message)
+    return fail
+
+
+class CompiledFunction:
+    """A Function whose body is compiled to closures on its first call."""
+
+    __slots__ = ('function', 'params', 'body')
+
+    def __init__(self, function: Function):
+        self.function = function
+        self.params = tuple(param.name for param in function.params)
+        self.body: Optional[Callable] = None
+
+    def __call__(self, *args):
+        env = Environment()
+        env.vars = dict(zip(self.params, args))
+        result = self.body(env)
+        return 0 if result is None else result[0]
+
+
+class CompiledProgram:
+    """Result of compile_program: run it with evaluate(inputs)."""
+
+    def __init__(self, program: Program, functions: Dict[str, CompiledFunction]):
+        self.program = program
+        self.functions = functions
+
+    def evaluate(self, inputs: list[tuple[str, int]]) -> int:
+        global_env = Environment()
+        for name, value in inputs:
+            global_env.declare(name, value)
+
+        main_func = self.functions.get('main')
+        if main_func is None:
+            raise Exception("Função main não encontrada.")
+
+        result = main_func.body(global_env)
+        return -1 if result is None else result[0]
+
+
+class Compiler(Visitor):
+    """Translates statements and expressions of a Program into closures."""
+
+    prefix = 'compile_'
+
+    def __init__(self, program: Program):
+        self.program = program
+        # a função que program.function(nome) devolve é a que as chamadas usam
+        self.functions = {func.name: CompiledFunction(program.function(func.name))
+                          for func in program.functions}
+
+    def compile(self) -> CompiledProgram:
+        for compiled in self.functions.values():
+            compiled.body = self.on_first_call(compiled)
+        return CompiledProgram(self.program, self.functions)
+
+    def on_first_call(self, compiled: CompiledFunction):
+        """Body that compiles the real one, puts it in its place and runs it."""
+        def first_call(env):
+            compiled.body = self.sequence(compiled.function.body.statements)
+            return compiled.body(env)
+        return first_call
+
+    def sequence(self, statements):
+        """Closure running `statements` in the environment it is given."""
+        compiled = tuple(self.visit(stmt) for stmt in statements)
+        if not compiled:
+            return lambda env: None
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run(env):
+            for stmt in compiled:
+                result = stmt(env)
+                if result is not None:
+                    return result
+        return run
+
+    # ------ EXPRESSÕES ------
+
+    def compile_Literal(self, expr):
+        value = expr.value
+        return lambda env: value
+
+    def compile_Variable(self, expr):
+        return _getter(expr.name)
+
+    def compile_Assignment(self, expr):
+        value = self.visit(expr.expr)
+        set = _setter(expr.var)
+
+        def assign(env):
+            result = value(env)
+            set(env, result)
+            return result
+        return assign
+
+    def compile_BinaryOp(self, expr):
+        left = self.visit(expr.left)
+        op = _BINARY.get(expr.op)
+        if op is None:
+            right = self.visit(expr.right)
+            return _failing(f"Operador binário inválido: {expr.op}", left, right)
+        if isinstance(expr.right, Literal):
+            # o operando constante fica ligado na closure
+            constant = expr.right.value
+            return lambda env: op(left(env), constant)
+        right = self.visit(expr.right)
+        return lambda env: op(left(env), right(env))
+
+    def compile_UnaryOp(self, expr):
+        operand = self.visit(expr.expr)
+        if expr.op == '++':
+            if not isinstance(expr.expr, Variable):
+                return _failing("++ só pode ser aplicado a variáveis.", operand)
+            set = _setter(expr.expr.name)
+            if expr.prefix:
+                def increment(env):
+                    updated = operand(env) + 1
+                    set(env, updated)
+                    return updated
+            else:
+                def increment(env):
+                    current = operand(env)
+                    set(env, current + 1)
+                    return current
+            return increment
+        op = _UNARY.get(expr.op)
+        if op is None:
+            return _failing(f"Operador unário inválido: {expr.op}", operand)
+        return lambda env: op(operand(env))
+
+    def compile_FunctionCall(self, expr):
+        target = self.functions.get(expr.name)
+        if target is None:
+            return _failing(f"Função '{expr.name}' não definida.")
+        if len(target.params) != len(expr.args):
+            return _failing("Número incorreto de argumentos.")
+        args = tuple(self.visit(arg) for arg in expr.args)
+        params = target.params
+
+        def call(env):
+            new_env = Environment()
+            new_env.vars = dict(zip(params, [arg(env) for arg in args]))
+            result = target.body(new_env)
+            return 0 if result is None else result[0]
+        return call
+
+    # ------ INSTRUÇÕES ------
+
+    def compile_VarDecl(self, stmt):
+        name = stmt.name
+        if not stmt.init:
+            def declare(env):
+                env.vars[name] = 0
+            return declare
+        init = self.visit(stmt.init)
+
+        def declare(env):
+            env.vars[name] = init(env)
+        return declare
+
+    def compile_ExprStmt(self, stmt):
+        expr = self.visit(stmt.expr)
+
+        def run(env):
+            expr(env)
+        return run
+
+    def compile_Print(self, stmt):
+        expr = self.visit(stmt.expr)
+
+        def run(env):
+            print(expr(env))
+        return run
+
+    def compile_Return(self, stmt):
+        if not stmt.value:
+            return lambda env: _RETURN_ZERO
+        value = self.visit(stmt.value)
+        return lambda env: (value(env),)
+
+    def compile_Block(self, stmt):
+        body = self.sequence(stmt.statements)
+        if not _declares(stmt.statements):
+            # um bloco que não declara nada teria sempre um Environment vazio
+            return body
+        return lambda env: body(Environment(env))
+
+    def compile_If(self, stmt):
+        condition = self.visit(stmt.condition)
+        then_branch = self.visit(stmt.then_branch)
+        if not stmt.else_branch:
+            def run(env):
+                if condition(env):
+                    return then_branch(env)
+            return run
+        else_branch = self.visit(stmt.else_branch)
+
+        def run(env):
+            if condition(env):
+                return then_branch(env)
+            return else_branch(env)
+        return run
+
+    def compile_While(self, stmt):
+        condition = self.visit(stmt.condition)
+        body = self.visit(stmt.body)
+
+        def run(env):
+            while condition(env):
+                result = body(env)
+                if result is not None:
+                    return result
+        return run
+
+    def compile_For(self, stmt):
+        init = self.visit(stmt.init) if isinstance(stmt.init, (VarDecl, ExprStmt)) else None
+        condition = self.visit(stmt.condition)
+        body = self.visit(stmt.body)
+        increment = self.visit(stmt.increment) if stmt.increment else None
+
+        scoped = _declares([stmt.init, stmt.body])
+
+        def run(env):
+            loop_env = Environment(env) if scoped else env
+            if init is not None:
+                init(loop_env)
+            while condition(loop_env):
+                result = body(loop_env)
+                if result is not None:
+                    return result
+                if increment is not None:
+                    increment(loop_env)
+        return run
+
+    def generic_visit(self, node):
+        if isinstance(node, Expr):
+            raise Exception(f"Expressão desconhecida: {node}")
+        raise Exception(f"Instrução desconhecida: {node}")
+
+
+def compile_program(ast: Program) -> CompiledProgram:
+    return Compiler(ast).compile()
+
+
+def evaluate(ast: Program, inputs: list[tuple[str, int]]) -> int:
+    """Same contract as lang_evaluate.evaluate, through the closure backend."""
+    return compile_program(ast).evaluate(inputs)
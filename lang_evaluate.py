@@ -1,6 +1,7 @@
 from langAST import *
 
 from lang_parser import parse_code
+from lang_resolve import FrameScopes, resolve
 from testcases import programa1, programa2, programa3, programa4
 
 class ReturnException(Exception):
@@ -31,18 +32,33 @@ class Environment:
     def declare(self, name, value):
         self.vars[name] = value
 
-def eval_expr(expr, env, functions):
-    if isinstance(expr, Literal):
+class Interpreter(Visitor):
+    """Tree-walking evaluator: expressions return their value, statements run.
+
+    The current Environment is `self.env`; blocks, loops and calls replace it
+    while they run and put the previous one back at the end. New scopes and
+    declarations go through scope/declare/call_scope, which FrameScopes
+    replaces to run a lexically resolved program.
+    """
+
+    def __init__(self, program: Program, env):
+        self.program = program
+        self.env = env
+
+    def visit_Literal(self, expr):
         return expr.value
-    elif isinstance(expr, Variable):
-        return env.get(expr.name)
-    elif isinstance(expr, Assignment):
-        value = eval_expr(expr.expr, env, functions)
-        env.set(expr.var, value)
+
+    def visit_Variable(self, expr):
+        return self.env.get(expr.name)
+
+    def visit_Assignment(self, expr):
+        value = self.visit(expr.expr)
+        self.env.set(expr.var, value)
         return value
-    elif isinstance(expr, BinaryOp):
-        left = eval_expr(expr.left, env, functions)
-        right = eval_expr(expr.right, env, functions)
+
+    def visit_BinaryOp(self, expr):
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
         op = expr.op
         if op == '+': return left + right
         elif op == '-': return left - right
@@ -59,96 +75,150 @@ def eval_expr(expr, env, functions):
         elif op == '||': return bool(left) or bool(right)
         else:
             raise Exception(f"Operador binário inválido: {op}")
-    elif isinstance(expr, UnaryOp):
-        value = eval_expr(expr.expr, env, functions)
+
+    def visit_UnaryOp(self, expr):
+        value = self.visit(expr.expr)
         if expr.op == '-': return -value
         elif expr.op == '!': return not value
         elif expr.op == '++':
             if isinstance(expr.expr, Variable):
-                current = env.get(expr.expr.name)
+                current = self.env.get(expr.expr.name)
                 updated = current + 1
-                env.set(expr.expr.name, updated)
+                self.env.set(expr.expr.name, updated)
                 return updated if expr.prefix else current
             else:
                 raise Exception("++ só pode ser aplicado a variáveis.")
         else:
             raise Exception(f"Operador unário inválido: {expr.op}")
-    elif isinstance(expr, FunctionCall):
-        func = next((f for f in functions if f.name == expr.name), None)
+
+    def visit_FunctionCall(self, expr):
+        func = self.program.function(expr.name)
         if not func:
             raise Exception(f"Função '{expr.name}' não definida.")
         if len(func.params) != len(expr.args):
             raise Exception("Número incorreto de argumentos.")
-        args = [eval_expr(arg, env, functions) for arg in expr.args]
-        new_env = Environment()
-        for param, arg_val in zip(func.params, args):
-            new_env.declare(param.name, arg_val)
+        args = [self.visit(arg) for arg in expr.args]
+        new_env = self.call_scope(func, args)
         try:
-            exec_block(func.body, new_env, functions)
+            self.run_block(func.body, new_env)
         except ReturnException as r:
             return r.value
         return 0
-    else:
-        raise Exception(f"Expressão desconhecida: {expr}")
 
-def exec_stmt(stmt, env, functions):
-    if isinstance(stmt, VarDecl):
-        value = eval_expr(stmt.init, env, functions) if stmt.init else 0
-        env.declare(stmt.name, value)
-    elif isinstance(stmt, ExprStmt):
-        eval_expr(stmt.expr, env, functions)
-    elif isinstance(stmt, Print):
-        val = eval_expr(stmt.expr, env, functions)
+    def visit_VarDecl(self, stmt):
+        value = self.visit(stmt.init) if stmt.init else 0
+        self.declare(stmt, value)
+
+    def visit_ExprStmt(self, stmt):
+        self.visit(stmt.expr)
+
+    def visit_Print(self, stmt):
+        val = self.visit(stmt.expr)
         print(val)
-    elif isinstance(stmt, Return):
-        value = eval_expr(stmt.value, env, functions) if stmt.value else 0
+
+    def visit_Return(self, stmt):
+        value = self.visit(stmt.value) if stmt.value else 0
         raise ReturnException(value)
-    elif isinstance(stmt, Block):
-        new_env = Environment(parent=env)
-        exec_block(stmt, new_env, functions)
-    elif isinstance(stmt, If):
-        cond = eval_expr(stmt.condition, env, functions)
-        if cond:
-            exec_stmt(stmt.then_branch, env, functions)
+
+    def visit_Block(self, stmt):
+        self.run_block(stmt, self.scope(stmt))
+
+    def visit_If(self, stmt):
+        if self.visit(stmt.condition):
+            self.visit(stmt.then_branch)
         elif stmt.else_branch:
-            exec_stmt(stmt.else_branch, env, functions)
-    elif isinstance(stmt, While):
-        while eval_expr(stmt.condition, env, functions):
-            try:
-                exec_stmt(stmt.body, env, functions)
-            except ReturnException as r:
-                raise r
-    elif isinstance(stmt, For):
-        loop_env = Environment(parent=env)
-        if isinstance(stmt.init, VarDecl):
-            exec_stmt(stmt.init, loop_env, functions)
-        elif isinstance(stmt.init, ExprStmt):
-            eval_expr(stmt.init.expr, loop_env, functions)
-        while eval_expr(stmt.condition, loop_env, functions):
-            try:
-                exec_stmt(stmt.body, loop_env, functions)
-            except ReturnException as r:
-                raise r
-            if stmt.increment:
-                eval_expr(stmt.increment, loop_env, functions)
-    else:
-        raise Exception(f"Instrução desconhecida: {stmt}")
+            self.visit(stmt.else_branch)
+
+    def visit_While(self, stmt):
+        while self.visit(stmt.condition):
+            self.visit(stmt.body)
+
+    def visit_For(self, stmt):
+        saved = self.env
+        self.env = self.scope(stmt)
+        try:
+            if isinstance(stmt.init, VarDecl):
+                self.visit(stmt.init)
+            elif isinstance(stmt.init, ExprStmt):
+                self.visit(stmt.init.expr)
+            while self.visit(stmt.condition):
+                self.visit(stmt.body)
+                if stmt.increment:
+                    self.visit(stmt.increment)
+        finally:
+            self.env = saved
+
+    def run_block(self, block: Block, env: Environment):
+        """Run the statements of `block` directly in `env`."""
+        saved = self.env
+        self.env = env
+        try:
+            for stmt in block.statements:
+                self.visit(stmt)
+        finally:
+            self.env = saved
+
+    # ------ ÂMBITOS ------
+
+    def scope(self, node):
+        """Environment for the Block or For `node`."""
+        return Environment(parent=self.env)
+
+    def declare(self, stmt, value):
+        self.env.declare(stmt.name, value)
+
+    def call_scope(self, func, args):
+        """Environment of a call to `func`, with its parameters declared."""
+        new_env = Environment()
+        for param, arg_val in zip(func.params, args):
+            new_env.declare(param.name, arg_val)
+        return new_env
+
+    def generic_visit(self, node):
+        if isinstance(node, Expr):
+            raise Exception(f"Expressão desconhecida: {node}")
+        raise Exception(f"Instrução desconhecida: {node}")
+
+
+class FrameInterpreter(FrameScopes, Interpreter):
+    """Interpreter over a lang_resolve.Resolution: `env` is a frame list."""
+
+
+# `functions` pode ser o Program ou só a lista das suas funções
+def _program(functions) -> Program:
+    return functions if isinstance(functions, Program) else Program(list(functions), [])
+
+def eval_expr(expr, env, functions):
+    return Interpreter(_program(functions), env).visit(expr)
+
+def exec_stmt(stmt, env, functions):
+    Interpreter(_program(functions), env).visit(stmt)
 
 def exec_block(block: Block, env: Environment, functions):
-    for stmt in block.statements:
-        exec_stmt(stmt, env, functions)
+    Interpreter(_program(functions), env).run_block(block, env)
 
-def evaluate(ast: Program, inputs: list[tuple[str, int]]) -> int:
+def evaluate(ast: Program, inputs: list[tuple[str, int]], lexical: bool = False) -> int:
+    """Run main with `inputs`; `lexical` uses resolved addresses and frames.
+
+    Programs lang_resolve cannot address run with Environments either way.
+    """
     global_env = Environment()
     for name, value in inputs:
         global_env.declare(name, value)
     
-    main_func = next((f for f in ast.functions if f.name == 'main'), None)
+    main_func = ast.function('main')
     if not main_func:
         raise Exception("Função main não encontrada.")
     
+    resolution = resolve(ast) if lexical else None
+    if resolution is not None:
+        env = resolution.entry_frame(inputs)
+        interpreter, body = FrameInterpreter(resolution.program, env), resolution.entry
+    else:
+        env = global_env
+        interpreter, body = Interpreter(ast, global_env), main_func.body
     try:
-        exec_block(main_func.body, global_env, ast.functions)
+        interpreter.run_block(body, env)
     except ReturnException as r:
         return r.value # retorna o valor do programa
     return -1
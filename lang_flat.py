@@ -0,0 +1,370 @@
+import mmap
+import struct
+from array import array
+from typing import Any, Dict, Iterator, List
+
+from langAST import *
+
+# ------ FORMATO PLANO ------
+#
+# Uma árvore é guardada em pré-ordem, um índice por nó, em buffers `array`:
+#
+#   kinds[i]     código da classe do nó (índice em _CLASSES)
+#   ends[i]      fim (exclusivo) da subárvore de i: o primeiro filho é i + 1
+#                e o irmão seguinte de um filho c é ends[c]
+#   attrs_at[i]  onde começam os atributos de i em `attrs`
+#
+# Os atributos de cada classe seguem _LAYOUT, um carácter por campo:
+#   'v'  valor primitivo: índice em `pool` (literais e identificadores, sem repetidos)
+#   'n'  nó obrigatório: sem atributo, é o filho seguinte
+#   'o'  nó opcional: 1 se está presente, 0 se é None
+#   'l'  lista de nós: o número de elementos
+# Os filhos aparecem pela ordem dos campos. Percorrer todos os nós é um ciclo
+# sobre range(len(kinds)); saltar uma subárvore é ir para ends[i].
+
+_CLASSES = (
+    Literal, Variable, BinaryOp, UnaryOp, Assignment, FunctionCall,
+    ExprStmt, VarDecl, Block, If, While, For, Return, Print, Function, Program,
+)
+_KINDS = {cls: kind for kind, cls in enumerate(_CLASSES)}
+_LAYOUT = {
+    Literal: 'v', Variable: 'v', BinaryOp: 'nvn', UnaryOp: 'vnv', Assignment: 'vn',
+    FunctionCall: 'vl', ExprStmt: 'n', VarDecl: 'vvo', Block: 'l', If: 'nno',
+    While: 'nn', For: 'onon', Return: 'o', Print: 'n', Function: 'vvln', Program: 'll',
+}
+_FIELDS = [tuple(zip(cls.__dataclass_fields__, _LAYOUT[cls])) for cls in _CLASSES]
+
+
+class FlatProgram:
+    """A node tree stored as parallel arrays in pre-order (see the layout above)."""
+
+    def __init__(self, kinds: array, ends: array, attrs_at: array, attrs: array, pool: List[Any]):
+        self.kinds = kinds
+        self.ends = ends
+        self.attrs_at = attrs_at
+        self.attrs = attrs
+        self.pool = pool
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, i: int) -> type:
+        return _CLASSES[self.kinds[i]]
+
+    def children(self, i: int) -> Iterator[int]:
+        """Indices of the direct children of node `i`, in field order."""
+        child = i + 1
+        end = self.ends[i]
+        while child < end:
+            yield child
+            child = self.ends[child]
+
+    def values(self, i: int) -> List[Any]:
+        """Primitive field values of node `i`, in field order."""
+        at = self.attrs_at[i]
+        result = []
+        for _, code in _FIELDS[self.kinds[i]]:
+            if code == 'v':
+                result.append(self.pool[self.attrs[at]])
+            if code != 'n':
+                at += 1
+        return result
+
+    def count(self, *classes: type) -> int:
+        """Number of nodes of the given classes, by a single scan of `kinds`."""
+        wanted = {_KINDS[cls] for cls in classes}
+        return sum(1 for kind in self.kinds if kind in wanted)
+
+    def kind_counts(self) -> Dict[str, int]:
+        counts = [0] * len(_CLASSES)
+        for kind in self.kinds:
+            counts[kind] += 1
+        return {cls.__name__: n for cls, n in zip(_CLASSES, counts) if n}
+
+
+def flatten(root) -> FlatProgram:
+    """FlatProgram for the tree under `root` (a Program or any node)."""
+    kinds = array('B')
+    ends = array('I')
+    attrs_at = array('I')
+    attrs = array('I')
+    pool: List[Any] = []
+    pool_index: Dict[Any, int] = {}
+    # pilha de nós por visitar e marcas (None, i) para fechar a subárvore de i
+    stack = [(root, None)]
+    while stack:
+        node, opened = stack.pop()
+        if node is None:
+            ends[opened] = len(kinds)
+            continue
+        i = len(kinds)
+        kind = _KINDS[node.__class__]
+        kinds.append(kind)
+        ends.append(0)
+        attrs_at.append(len(attrs))
+        stack.append((None, i))
+        children = []
+        for name, code in _FIELDS[kind]:
+            value = getattr(node, name)
+            if code == 'v':
+                key = (value.__class__, value)
+                index = pool_index.get(key)
+                if index is None:
+                    index = pool_index[key] = len(pool)
+                    pool.append(value)
+                attrs.append(index)
+            elif code == 'n':
+                children.append(value)
+            elif code == 'o':
+                attrs.append(value is not None)
+                if value is not None:
+                    children.append(value)
+            else:
+                attrs.append(len(value))
+                children.extend(value)
+        stack.extend([(child, None) for child in reversed(children)])
+    return FlatProgram(kinds, ends, attrs_at, attrs, pool)
+
+
+def unflatten(flat: FlatProgram):
+    """The langAST tree encoded by `flat` (inverse of flatten)."""
+    return _build(flat.kinds, flat.attrs_at, flat.attrs, flat.pool)
+
+
+def _build(kinds, attrs_at, attrs, pool):
+    # em pré-ordem invertida os filhos de i já estão construídos no topo da
+    # pilha, com o primeiro filho por cima
+    built = []
+    for i in range(len(kinds) - 1, -1, -1):
+        kind = kinds[i]
+        at = attrs_at[i]
+        args = []
+        for _, code in _FIELDS[kind]:
+            if code == 'v':
+                args.append(pool[attrs[at]])
+                at += 1
+            elif code == 'n':
+                args.append(built.pop())
+            elif code == 'o':
+                args.append(built.pop() if attrs[at] else None)
+                at += 1
+            else:
+                args.append([built.pop() for _ in range(attrs[at])])
+                at += 1
+        built.append(_CLASSES[kind](*args))
+    return built[0]
+
+
+class FlatVisitor:
+    """Non-recursive visitor over a FlatProgram.
+
+    `visit` scans the nodes in pre-order and calls `visit_<Class>(flat, i)`
+    when the subclass defines it; returning False from it skips the subtree.
+    """
+
+    def visit(self, flat: FlatProgram):
+        handlers = [getattr(self, 'visit_' + cls.__name__, None) for cls in _CLASSES]
+        kinds, ends = flat.kinds, flat.ends
+        i = 0
+        n = len(kinds)
+        while i < n:
+            handler = handlers[kinds[i]]
+            if handler is not None and handler(flat, i) is False:
+                i = ends[i]
+            else:
+                i += 1
+        return self
+
+
+# ------ FORMATO BINÁRIO ------
+#
+# A serialização é o formato plano escrito em bytes, com inteiros em varint
+# (LEB128 sem sinal):
+#
+#   MAGIC, varint FORMAT_VERSION
+#   tabela de strings: varint n, e por entrada um byte de tipo e o valor
+#   índice: varint n, e o offset (no stream) de cada filho direto da raiz
+#   stream: por nó, em pré-ordem, o byte de kind e os seus attrs em varint
+#
+# A tabela de strings é o `pool` do FlatProgram (identificadores e literais).
+# O índice permite a load(lazy=True) ler só as assinaturas das funções e
+# deixar cada corpo no mmap até ao primeiro acesso.
+
+MAGIC = b'MESAST'
+FORMAT_VERSION = 1      # incrementar quando _LAYOUT ou a codificação mudarem
+
+_STR, _INT, _FLOAT, _FALSE, _TRUE, _NONE = range(6)
+_DOUBLE = struct.Struct('<d')
+_ATTR_CODES = [''.join(code for _, code in fields if code != 'n') for fields in _FIELDS]
+_REQUIRED = [sum(code == 'n' for _, code in fields) for fields in _FIELDS]
+
+
+def _write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_value(out: bytearray, value):
+    if value is None:
+        out.append(_NONE)
+    elif value is True or value is False:
+        out.append(_TRUE if value else _FALSE)
+    elif value.__class__ is int:
+        out.append(_INT)
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+    elif value.__class__ is float:
+        out.append(_FLOAT)
+        out += _DOUBLE.pack(value)
+    else:
+        data = value.encode('utf-8', 'surrogatepass')
+        out.append(_STR)
+        _write_varint(out, len(data))
+        out += data
+
+
+def _read_value(buf, pos: int):
+    tag = buf[pos]
+    pos += 1
+    if tag == _STR:
+        size, pos = _read_varint(buf, pos)
+        return bytes(buf[pos:pos + size]).decode('utf-8', 'surrogatepass'), pos + size
+    if tag == _INT:
+        z, pos = _read_varint(buf, pos)
+        return (z >> 1) if not z & 1 else -((z + 1) >> 1), pos
+    if tag == _FLOAT:
+        return _DOUBLE.unpack_from(buf, pos)[0], pos + _DOUBLE.size
+    if tag == _NONE:
+        return None, pos
+    return tag == _TRUE, pos
+
+
+def to_bytes(root) -> bytes:
+    """Binary encoding of the tree under `root` (a Program or any node)."""
+    flat = flatten(root)
+    kinds, attrs = flat.kinds, flat.attrs
+    top = set(flat.children(0))
+    stream = bytearray()
+    index = []
+    at = 0
+    for i, kind in enumerate(kinds):
+        if i in top:
+            index.append(len(stream))
+        stream.append(kind)
+        for _ in _ATTR_CODES[kind]:
+            _write_varint(stream, attrs[at])
+            at += 1
+    out = bytearray(MAGIC)
+    _write_varint(out, FORMAT_VERSION)
+    _write_varint(out, len(flat.pool))
+    for value in flat.pool:
+        _write_value(out, value)
+    _write_varint(out, len(index))
+    for offset in index:
+        _write_varint(out, offset)
+    return bytes(out + stream)
+
+
+def _read_header(buf):
+    """(pool, offsets of the root's children, start of the node stream)."""
+    if buf[:len(MAGIC)] != MAGIC:
+        raise ValueError("não é um AST serializado")
+    version, pos = _read_varint(buf, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise ValueError(f"versão do formato não suportada: {version}")
+    count, pos = _read_varint(buf, pos)
+    pool = []
+    for _ in range(count):
+        value, pos = _read_value(buf, pos)
+        pool.append(value)
+    count, pos = _read_varint(buf, pos)
+    index = []
+    for _ in range(count):
+        offset, pos = _read_varint(buf, pos)
+        index.append(offset)
+    return pool, index, pos
+
+
+def _read_tree(buf, pos: int, pool: List[Any]):
+    """(node, position after it) for the subtree whose stream starts at `pos`."""
+    kinds = []
+    attrs_at = []
+    attrs = []
+    pending = 1
+    while pending:
+        kind = buf[pos]
+        pos += 1
+        kinds.append(kind)
+        attrs_at.append(len(attrs))
+        pending += _REQUIRED[kind] - 1
+        for code in _ATTR_CODES[kind]:
+            value = buf[pos]
+            if value < 0x80:
+                pos += 1
+            else:
+                value, pos = _read_varint(buf, pos)
+            attrs.append(value)
+            if code != 'v':
+                pending += value
+    return _build(kinds, attrs_at, attrs, pool), pos
+
+
+def from_bytes(data):
+    """The tree encoded by to_bytes (`data` may be any buffer, e.g. an mmap)."""
+    pool, _, start = _read_header(data)
+    return _read_tree(data, start, pool)[0]
+
+
+def dump(root, path: str):
+    with open(path, 'wb') as f:
+        f.write(to_bytes(root))
+
+
+def load(path: str, lazy: bool = False):
+    """Read a tree written by dump.
+
+    With `lazy`, the file is memory-mapped and, for a Program, only the
+    signatures and global variables are decoded: each function body is read
+    from the mapping on first access (see langAST.Function).
+    """
+    if not lazy:
+        with open(path, 'rb') as f:
+            return from_bytes(f.read())
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    pool, index, start = _read_header(buf)
+    if buf[start] != _KINDS[Program]:
+        return _read_tree(buf, start, pool)[0]
+    functions = []
+    at = start + 1
+    count, at = _read_varint(buf, at)
+    for offset in index[:count]:
+        functions.append(_lazy_function(buf, start + offset, pool))
+    global_vars = [_read_tree(buf, start + offset, pool)[0] for offset in index[count:]]
+    return Program(functions, global_vars)
+
+
+def _lazy_function(buf, pos: int, pool: List[Any]) -> Function:
+    pos += 1    # kind de Function
+    return_type, pos = _read_varint(buf, pos)
+    name, pos = _read_varint(buf, pos)
+    count, pos = _read_varint(buf, pos)
+    params = []
+    for _ in range(count):
+        param, pos = _read_tree(buf, pos, pool)
+        params.append(param)
+    return lazy_function(pool[return_type], pool[name], params,
+                         lambda: _read_tree(buf, pos, pool)[0])
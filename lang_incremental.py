@@ -0,0 +1,98 @@
+import re
+from typing import List, Optional, Tuple
+
+from langAST import *
+from lang_parser import Lexer, ParseError, parse_code, parse_tokens
+
+# Chavetas fora de strings: chega para delimitar as funções de topo sem
+# tokenizar o ficheiro inteiro.
+_BRACES_RE = re.compile(r'"[^"]*"|[{}]')
+_NON_WS_RE = re.compile(r'\S')
+_IDENT_CHAR_RE = re.compile(r'[a-zA-Z0-9_]')
+
+
+def function_spans(code: str) -> Optional[List[Tuple[int, int]]]:
+    """(start, end) offsets of every top-level function in `code`.
+
+    Returns None when the braces are unbalanced.
+    """
+    spans = []
+    depth = 0
+    start = 0
+    last_end = 0
+    for m in _BRACES_RE.finditer(code):
+        brace = m.group()
+        if brace == '{':
+            if depth == 0:
+                start = _NON_WS_RE.search(code, last_end).start()
+            depth += 1
+        elif brace == '}':
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0:
+                last_end = m.end()
+                spans.append((start, last_end))
+    return spans if depth == 0 else None
+
+
+def _changed_region(old_text: str, new_text: str) -> Tuple[int, int, int]:
+    """Common prefix length and the end of the changed region in both texts."""
+    # pesquisa binária sobre comparações de slices, feitas em C
+    lo, hi = 0, min(len(old_text), len(new_text))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old_text[:mid] == new_text[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    lo, hi = 0, min(len(old_text), len(new_text)) - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old_text[len(old_text) - mid:] == new_text[len(new_text) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix, len(old_text) - lo, len(new_text) - lo
+
+
+def reparse(old_program: Program, old_text: str, new_text: str) -> Program:
+    """Parse `new_text` reusing the functions of `old_program` that did not change.
+
+    Only the top-level functions touched by the edit (plus any new text
+    between them) are parsed again; every other Function object is carried
+    over by identity into the returned Program. Falls back to a full
+    parse_code when `old_program` does not match the layout of `old_text`.
+    """
+    if old_text == new_text:
+        return old_program
+    spans = function_spans(old_text)
+    if spans is None or len(spans) != len(old_program.functions):
+        return parse_code(new_text)
+
+    prefix, old_end, new_end = _changed_region(old_text, new_text)
+    delta = len(new_text) - len(old_text)
+
+    # funções intactas antes e depois da edição
+    first = 0
+    while first < len(spans) and spans[first][1] < prefix:
+        first += 1
+    last = first
+    while last < len(spans) and spans[last][0] <= old_end:
+        last += 1
+    # `}xint f()` juntaria a edição ao nome do tipo da função seguinte
+    while last < len(spans) and _IDENT_CHAR_RE.match(new_text, spans[last][0] + delta - 1):
+        last += 1
+
+    region_start = spans[first - 1][1] if first > 0 else 0
+    region_end = spans[last][0] + delta if last < len(spans) else len(new_text)
+    region = new_text[region_start:region_end]
+    try:
+        functions = parse_tokens(Lexer(region).tokenize(), region)[0].functions
+    except ParseError:
+        # volta a parsear tudo para o erro apontar para a posição certa
+        return parse_code(new_text)
+
+    old_functions = old_program.functions
+    return Program(old_functions[:first] + functions + old_functions[last:], old_program.global_vars)
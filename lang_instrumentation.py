@@ -1,5 +1,6 @@
 from langAST import *
-from lang_parser import parse_code
+from lang_parser import SourceMap, parse_code_with_spans
+from lang_resolve import FrameScopes, resolve
 from testcases import programa1, programa2, programa3, programa4
 
 class ReturnException(Exception):
@@ -53,18 +54,50 @@ def expr_to_str(expr):
     else:
         return f"<expr desconhecido: {expr}>"
 
-def _eval_expr_trace(expr, env, functions, trace_log, current_func_name=None):
-    if isinstance(expr, Literal):
+class TraceInterpreter(Visitor):
+    """Evaluator that logs every statement it runs into `trace_log`.
+
+    Statements are numbered per function call: `instr_id` is the number of
+    the statement about to run, and each statement handler leaves it at the
+    number of the next one. Scopes go through scope/declare/call_scope, as
+    in lang_evaluate.Interpreter. With a SourceMap in `spans`, each line also
+    gets the 'line:column' of its statement, when the statement has a span.
+    """
+
+    def __init__(self, program: Program, env, trace_log, current_func_name=None, instr_id=1,
+                 spans: SourceMap = None):
+        self.program = program
+        self.env = env
+        self.trace_log = trace_log
+        self.current_func_name = current_func_name
+        self.instr_id = instr_id
+        self.spans = spans
+
+    def log(self, msg, stmt=None):
+        self.trace_log.append(f"[{self.current_func_name}] Instrução {self.instr_id}: {msg}"
+                              f"{self.where(stmt)}")
+
+    def where(self, stmt):
+        # nós criados depois do parse (p.ex. os Print da instrumentação) não têm span
+        location = self.spans.location(stmt) if self.spans is not None else None
+        return f" @ {location}" if location is not None else ""
+
+    # Expressões
+
+    def visit_Literal(self, expr):
         return expr.value
-    elif isinstance(expr, Variable):
-        return env.get(expr.name)
-    elif isinstance(expr, Assignment):
-        value = _eval_expr_trace(expr.expr, env, functions, trace_log, current_func_name)
-        env.set(expr.var, value)
+
+    def visit_Variable(self, expr):
+        return self.env.get(expr.name)
+
+    def visit_Assignment(self, expr):
+        value = self.visit(expr.expr)
+        self.env.set(expr.var, value)
         return value
-    elif isinstance(expr, BinaryOp):
-        left = _eval_expr_trace(expr.left, env, functions, trace_log, current_func_name)
-        right = _eval_expr_trace(expr.right, env, functions, trace_log, current_func_name)
+
+    def visit_BinaryOp(self, expr):
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
         if expr.op == '+': return left + right
         elif expr.op == '-': return left - right
         elif expr.op == '*': return left * right
@@ -79,126 +112,151 @@ def _eval_expr_trace(expr, env, functions, trace_log, current_func_name=None):
         elif expr.op == '&&': return bool(left) and bool(right)
         elif expr.op == '||': return bool(left) or bool(right)
         else: raise Exception(f"Operador binário inválido: {expr.op}")
-    elif isinstance(expr, UnaryOp):
-        value = _eval_expr_trace(expr.expr, env, functions, trace_log, current_func_name)
+
+    def visit_UnaryOp(self, expr):
+        value = self.visit(expr.expr)
         if expr.op == '-': return -value
         elif expr.op == '!': return not value
         elif expr.op == '++':
             if isinstance(expr.expr, Variable):
-                current = env.get(expr.expr.name)
+                current = self.env.get(expr.expr.name)
                 updated = current + 1
-                env.set(expr.expr.name, updated)
+                self.env.set(expr.expr.name, updated)
                 return updated if expr.prefix else current
             else:
                 raise Exception("++ só pode ser aplicado a variáveis.")
-    elif isinstance(expr, FunctionCall):
-        func = next((f for f in functions if f.name == expr.name), None)
+
+    def visit_FunctionCall(self, expr):
+        func = self.program.function(expr.name)
         if not func:
             raise Exception(f"Função '{expr.name}' não definida.")
-        args = [_eval_expr_trace(arg, env, functions, trace_log, current_func_name) for arg in expr.args]
-        call_env = Environment()
-        for param, val in zip(func.params, args):
-            call_env.declare(param.name, val)
+        args = [self.visit(arg) for arg in expr.args]
+        call_env = self.call_scope(func, args)
+        saved = self.env, self.current_func_name, self.instr_id
+        # Reinicia instr_id para cada chamada de função e usa o nome correto na trace
+        self.env, self.current_func_name, self.instr_id = call_env, expr.name, 1
         try:
-            # Reinicia instr_id para cada chamada de função e usa o nome correto na trace
-            _exec_block_trace(func.body, call_env, functions, trace_log, current_func_name=expr.name, start_id=1)
+            for stmt in func.body.statements:
+                self.visit(stmt)
         except ReturnException as r:
             return r.value
+        finally:
+            self.env, self.current_func_name, self.instr_id = saved
         return 0
-    else:
-        raise Exception(f"Expressão desconhecida: {expr}")
 
-def _exec_stmt_trace(stmt, env, functions, trace_log, current_func_name=None, instr_id=1):
-    prefix = f"[{current_func_name}] "
+    # Instruções
 
-    def log(msg):
-        trace_log.append(f"{prefix}Instrução {instr_id}: {msg}")
+    def visit_VarDecl(self, stmt):
+        value = self.visit(stmt.init) if stmt.init else 0
+        self.declare(stmt, value)
+        self.log(f"VarDecl {stmt.type} {stmt.name} = {value}", stmt)
+        self.instr_id += 1
 
-    if isinstance(stmt, VarDecl):
-        value = _eval_expr_trace(stmt.init, env, functions, trace_log, current_func_name) if stmt.init else 0
-        env.declare(stmt.name, value)
-        log(f"VarDecl {stmt.type} {stmt.name} = {value}")
-
-    elif isinstance(stmt, ExprStmt):
+    def visit_ExprStmt(self, stmt):
         expr_str = expr_to_str(stmt.expr)
-        val = _eval_expr_trace(stmt.expr, env, functions, trace_log, current_func_name)
-        log(f"ExprStmt {expr_str} = {val}")
-
-    elif isinstance(stmt, Print):
-        val = _eval_expr_trace(stmt.expr, env, functions, trace_log, current_func_name)
-        log(f"Print {val}")
-        trace_log.append(f"{prefix}{val}")
-
-    elif isinstance(stmt, Return):
-        value = _eval_expr_trace(stmt.value, env, functions, trace_log, current_func_name) if stmt.value else 0
-        log(f"Return {value}")
+        val = self.visit(stmt.expr)
+        self.log(f"ExprStmt {expr_str} = {val}", stmt)
+        self.instr_id += 1
+
+    def visit_Print(self, stmt):
+        val = self.visit(stmt.expr)
+        self.log(f"Print {val}", stmt)
+        self.trace_log.append(f"[{self.current_func_name}] {val}")
+        self.instr_id += 1
+
+    def visit_Return(self, stmt):
+        value = self.visit(stmt.value) if stmt.value else 0
+        self.log(f"Return {value}", stmt)
         raise ReturnException(value)
 
-    elif isinstance(stmt, Block):
+    def visit_Block(self, stmt):
         # Sem logs de entrada/saída de bloco para simplicidade
-        next_id = _exec_block_trace(stmt, Environment(env), functions, trace_log, current_func_name, start_id=instr_id + 1)
-        return next_id
+        saved = self.env
+        self.env = self.scope(stmt)
+        self.instr_id += 1
+        try:
+            for inner in stmt.statements:
+                self.visit(inner)
+        finally:
+            self.env = saved
 
-    elif isinstance(stmt, If):
-        cond_val = _eval_expr_trace(stmt.condition, env, functions, trace_log, current_func_name)
+    def visit_If(self, stmt):
+        cond_val = self.visit(stmt.condition)
         cond_str = expr_to_str(stmt.condition)
-        trace_log.append(f"{prefix}If cond: {cond_str} → {cond_val}")
+        self.trace_log.append(f"[{self.current_func_name}] If cond: {cond_str} → {cond_val}{self.where(stmt)}")
+        self.instr_id += 1
         if cond_val:
-            next_id = _exec_stmt_trace(stmt.then_branch, env, functions, trace_log, current_func_name, instr_id + 1)
+            self.visit(stmt.then_branch)
         elif stmt.else_branch:
-            next_id = _exec_stmt_trace(stmt.else_branch, env, functions, trace_log, current_func_name, instr_id + 1)
-        else:
-            next_id = instr_id + 1
-        return next_id
+            self.visit(stmt.else_branch)
 
-    elif isinstance(stmt, While):
-        cond_str = expr_to_str(stmt.condition)
-        loop_id = instr_id + 1
-        while _eval_expr_trace(stmt.condition, env, functions, trace_log, current_func_name):
-            try:
-                loop_id = _exec_stmt_trace(stmt.body, env, functions, trace_log, current_func_name, loop_id)
-            except ReturnException as r:
-                raise r
-        return loop_id
-
-    elif isinstance(stmt, For):
-        loop_env = Environment(env)
-        next_id = instr_id
-        if stmt.init:
-            next_id = _exec_stmt_trace(stmt.init, loop_env, functions, trace_log, current_func_name, next_id)
-        cond_str = expr_to_str(stmt.condition)
-        while _eval_expr_trace(stmt.condition, loop_env, functions, trace_log, current_func_name):
-            try:
-                next_id = _exec_stmt_trace(stmt.body, loop_env, functions, trace_log, current_func_name, next_id)
-            except ReturnException as r:
-                raise r
-            if stmt.increment:
-                _eval_expr_trace(stmt.increment, loop_env, functions, trace_log, current_func_name)
-        return next_id
+    def visit_While(self, stmt):
+        self.instr_id += 1
+        while self.visit(stmt.condition):
+            self.visit(stmt.body)
 
-    else:
-        raise Exception(f"Instrução desconhecida: {stmt}")
+    def visit_For(self, stmt):
+        saved = self.env
+        self.env = self.scope(stmt)
+        try:
+            if stmt.init:
+                self.visit(stmt.init)
+            while self.visit(stmt.condition):
+                self.visit(stmt.body)
+                if stmt.increment:
+                    self.visit(stmt.increment)
+        finally:
+            self.env = saved
 
-    return instr_id + 1
+    # Âmbitos
 
-def _exec_block_trace(block, env, functions, trace_log, current_func_name=None, start_id=1):
-    instr_id = start_id
-    for stmt in block.statements:
-        instr_id = _exec_stmt_trace(stmt, env, functions, trace_log, current_func_name, instr_id)
-    return instr_id
+    def scope(self, node):
+        return Environment(self.env)
 
-def evaluate_with_trace(ast: Program, inputs: list[tuple[str, int]]) -> tuple[int, list[str]]:
+    def declare(self, stmt, value):
+        self.env.declare(stmt.name, value)
+
+    def call_scope(self, func, args):
+        call_env = Environment()
+        for param, val in zip(func.params, args):
+            call_env.declare(param.name, val)
+        return call_env
+
+    def generic_visit(self, node):
+        if isinstance(node, Expr):
+            raise Exception(f"Expressão desconhecida: {node}")
+        raise Exception(f"Instrução desconhecida: {node}")
+
+
+class FrameTraceInterpreter(FrameScopes, TraceInterpreter):
+    """TraceInterpreter over a lang_resolve.Resolution: `env` is a frame list."""
+
+
+def evaluate_with_trace(ast: Program, inputs: list[tuple[str, int]],
+                        lexical: bool = False, spans: SourceMap = None) -> tuple[int, list[str]]:
     global_env = Environment()
     for name, val in inputs:
         global_env.declare(name, val)
 
-    main = next((f for f in ast.functions if f.name == 'main'), None)
+    main = ast.function('main')
     if not main:
         raise Exception("Função main não encontrada.")
 
     trace_log = []
+    # com `lexical`, corre a árvore resolvida sobre frames (se resolve() a aceitar);
+    # os spans são dos nós de `ast`, por isso só entram na trace sem `lexical`
+    resolution = resolve(ast, partial_calls=True) if lexical else None
+    if resolution is not None:
+        interpreter = FrameTraceInterpreter(resolution.program, resolution.entry_frame(inputs),
+                                            trace_log, current_func_name='main')
+        body = resolution.entry
+    else:
+        interpreter = TraceInterpreter(ast, global_env, trace_log, current_func_name='main',
+                                       spans=spans)
+        body = main.body
     try:
-        _exec_block_trace(main.body, global_env, ast.functions, trace_log, current_func_name='main', start_id=1)
+        for stmt in body.statements:
+            interpreter.visit(stmt)
     except ReturnException as r:
         return r.value, trace_log
     return 0, trace_log
@@ -221,13 +279,14 @@ def instrumentation(ast: Program) -> Program:
 
     return Program(new_functions, ast.global_vars)
 
-def instrumentedTestSuite(ast: Program, testCases: list[tuple[dict, int]]) -> bool:
+def instrumentedTestSuite(ast: Program, testCases: list[tuple[dict, int]],
+                          spans: SourceMap = None) -> bool:
     instrumented_ast = instrumentation(ast)
     all_passed = True
 
     for i, (inputs_dict, expected) in enumerate(testCases):
         inputs = list(inputs_dict.items())
-        result, trace_log = evaluate_with_trace(instrumented_ast, inputs)
+        result, trace_log = evaluate_with_trace(instrumented_ast, inputs, spans=spans)
 
         print(f"\nTeste {i+1} com inputs {inputs_dict}: Esperado={expected}, Obtido={result}")
         print("Log da execução:")
@@ -274,8 +333,8 @@ programas = [
 def run_all_tests():
     for name, program_code, test_cases in programas:
         print(f"\nExecutando testes para {name}...")
-        ast = parse_code(program_code)
-        passed = instrumentedTestSuite(ast, test_cases)
+        ast, spans = parse_code_with_spans(program_code)
+        passed = instrumentedTestSuite(ast, test_cases, spans)
         print(f"Todos testes passaram: {passed}\n{'='*50}")
 
 if __name__ == "__main__":
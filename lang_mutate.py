@@ -1,12 +1,12 @@
-import copy
 import random
 import signal
+from dataclasses import replace
 
-from lang_parser import parse_code
+from lang_parser import parse_code_with_spans
 from lang_test import runTestSuite
 from prettyPrinting import PrettyPrinter
 from testcases import programa1, programa2, programa3, programa4
-from langAST import Literal, BinaryOp, Return, Assignment, If
+from langAST import Literal, BinaryOp, Return, Assignment, If, NodeTable, get_at, replace_at
 
 # --- Timeout para abortar testes demorados ---
 class TimeoutException(Exception):
@@ -17,34 +17,44 @@ def timeout_handler(signum, frame):
 
 signal.signal(signal.SIGALRM, timeout_handler)
 
-# --- Coleta nós mutáveis do AST ---
-def collect_mutable_nodes(node, collected):
-    if node is None:
-        return
-    for attr in dir(node):
-        if attr.startswith('_'):
+# --- Coleta nós mutáveis do AST (ids na NodeTable da árvore) ---
+# A ordem é a da versão original, que percorria dir(node): campos por ordem
+# alfabética e filhos antes do pai. Assim a mesma semente dá os mesmos mutantes.
+def collect_mutable_nodes(table: NodeTable):
+    children = [[] for _ in range(len(table))]
+    root = None
+    for i in range(len(table)):
+        parent = table.parent_of(i)
+        if parent is None:
+            root = i
+        else:
+            children[parent].append(i)
+    collected = []
+    stack = [(root, False)]
+    while stack:
+        node_id, expanded = stack.pop()
+        if expanded:
+            if isinstance(table.node_at(node_id), (Literal, BinaryOp, Return, Assignment, If)):
+                collected.append(node_id)
             continue
-        child = getattr(node, attr)
-        if isinstance(child, list):
-            for c in child:
-                collect_mutable_nodes(c, collected)
-        elif hasattr(child, '__dict__'):
-            collect_mutable_nodes(child, collected)
-    if isinstance(node, (Literal, BinaryOp, Return, Assignment, If)):
-        collected.append(node)
+        stack.append((node_id, True))
+        ordered = sorted(children[node_id],
+                         key=lambda i: (table.field_names[table.fields[i]], table.indices[i]))
+        stack.extend((i, False) for i in reversed(ordered))
+    return collected
 
 # --- Aplica mutação válida num nó do AST ---
+# Os nós são imutáveis: devolve o nó mutado, ou None se não houver mutação.
 def mutate_node(node, ast_str_hint=""):
     if isinstance(node, Literal):
         if isinstance(node.value, int):
             if node.value in [0, 1]:
-                return False
+                return None
             delta = random.choice([-2, -1, 1, 2])
             novo_valor = node.value + delta
             if novo_valor <= 0:
-                return False
-            node.value = novo_valor
-            return True
+                return None
+            return replace(node, value=novo_valor)
 
     elif isinstance(node, BinaryOp):
         # Apenas operadores seguros para troca (sem / e %)
@@ -53,27 +63,22 @@ def mutate_node(node, ast_str_hint=""):
             ops = [op for op in aritmeticos if op != node.op]
 
             if not ops:
-                return False
+                return None
 
             new_op = random.choice(ops)
-            node.op = new_op
-            return True
+            return replace(node, op=new_op)
 
         # Troca sinais em condições if para isPrime (opcional)
         if 'isPrime' in ast_str_hint:
             if node.op == '==':
-                node.op = '!='
-                return True
+                return replace(node, op='!=')
             elif node.op == '!=':
-                node.op = '=='
-                return True
+                return replace(node, op='==')
             elif node.op == '%':
-                node.op = '*'
-                return True
+                return replace(node, op='*')
             elif node.op in ['<=', '<', '>=', '>']:
                 inversoes = {'<=':'>', '<':'>=', '>=':'<', '>':'<='}
-                node.op = inversoes.get(node.op, node.op)
-                return True
+                return replace(node, op=inversoes.get(node.op, node.op))
 
     elif isinstance(node, If):
         cond = getattr(node, 'cond', None)
@@ -81,30 +86,30 @@ def mutate_node(node, ast_str_hint=""):
             if cond.op in ['<=', '<', '>=', '>']:
                 if isinstance(cond.right, Literal):
                     if cond.right.value in [0,1] and ('factorial' in ast_str_hint or 'soma' in ast_str_hint):
-                        return False
+                        return None
                     if isinstance(cond.right.value, int):
                         novo_valor = cond.right.value + random.choice([-1, 1])
                         if novo_valor >= 0:
-                            cond.right.value = novo_valor
-                            return True
+                            right = replace(cond.right, value=novo_valor)
+                            return replace(node, cond=replace(cond, right=right))
 
     elif isinstance(node, Assignment):
         lit = getattr(node, 'value', None)
         if isinstance(lit, Literal):
             if lit.value in [0, 1]:
-                return False
+                return None
             if isinstance(lit.value, int):
                 novo_valor = lit.value + random.choice([-1, 1])
                 if novo_valor > 0:
-                    lit.value = novo_valor
-                    return True
-    return False
+                    return replace(node, value=replace(lit, value=novo_valor))
+    return None
 
 # --- Aplica múltiplas mutações no AST (pelo menos uma) ---
-def mutate_ast_one(ast, min_mutations=1, max_mutations=None):
+# Com `mutated`, junta-lhe os ids (da NodeTable de `ast`) dos nós mutados.
+def mutate_ast_one(ast, min_mutations=1, max_mutations=None, mutated=None):
     ast_str_hint = str(ast)[:200]
-    mutable_nodes = []
-    collect_mutable_nodes(ast, mutable_nodes)
+    table = NodeTable(ast)
+    mutable_nodes = collect_mutable_nodes(table)
 
     if not mutable_nodes:
         return None
@@ -113,33 +118,48 @@ def mutate_ast_one(ast, min_mutations=1, max_mutations=None):
     if max_mutations is None:
         max_mutations = random.randint(min_mutations, max(1, len(mutable_nodes)))
 
-    ast_copy = copy.deepcopy(ast)
-    nodes_copy = []
-    collect_mutable_nodes(ast_copy, nodes_copy)
-    random.shuffle(nodes_copy)
+    # Cada mutação reconstrói só o caminho até à raiz: o mutante partilha com
+    # `ast` todas as subárvores que não mudaram, sem deepcopy.
+    random.shuffle(mutable_nodes)
+    mutante = ast
 
     mutacoes_aplicadas = 0
-    for node in nodes_copy:
-        if mutate_node(node, ast_str_hint):
+    for node_id in mutable_nodes:
+        # os ids são de `ast`; o caminho é o mesmo no mutante, que só muda
+        # nós no lugar. O nó é relido do mutante para não perder mutações já
+        # feitas nos filhos.
+        path = table.path_to(node_id)
+        novo = mutate_node(get_at(mutante, path), ast_str_hint)
+        if novo is not None:
+            mutante = replace_at(mutante, path, novo)
             mutacoes_aplicadas += 1
+            if mutated is not None:
+                mutated.append(node_id)
         if mutacoes_aplicadas >= max_mutations:
             break
 
     if mutacoes_aplicadas == 0:
         return None
-    return ast_copy
+    return mutante
 
 # --- Testa mutações com tentativas para evitar mutantes problemáticos ---
 def testar_mutacoes(codigo:str, testCases, max_tentativas=10):
-    ast = parse_code(codigo)
+    ast, spans = parse_code_with_spans(codigo)
     attempts = 0
+    tentados = set()  # mutantes já testados (hash estrutural em cache)
 
     while attempts < max_tentativas:
-        mutante = mutate_ast_one(ast)
+        mutados = []
+        mutante = mutate_ast_one(ast, mutated=mutados)
         if not mutante:
             print("Nenhuma mutação aplicada, tentando novamente.")
             attempts += 1
             continue
+        if mutante in tentados:
+            print(f"Tentativa {attempts + 1}: mutante repetido, tentando outro...")
+            attempts += 1
+            continue
+        tentados.add(mutante)
         
         printer = PrettyPrinter(indent_size=2)
         codigo_mutado = printer.pprint(mutante)
@@ -152,6 +172,8 @@ def testar_mutacoes(codigo:str, testCases, max_tentativas=10):
             signal.alarm(0)  # Desliga timeout
 
             print(f"\n=== Mutante do programa encontrado na tentativa {attempts + 1} ===\n")
+            # os ids de mutate_ast_one são os do SourceMap: dão a posição no código original
+            print("Mutações em:", ", ".join(spans.location_at(i) for i in sorted(mutados, key=spans.span_at)))
             print(codigo_mutado)
             print("\n--- Resultados dos testes ---\n")
 
@@ -1,10 +1,79 @@
 import re
-from parsec import generate, string, regex, many, optional, Parser, ParseError, sepBy, try_choice, eof
+from array import array
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional, Tuple
+from parsec import generate, string, regex, many, optional, ParseError, sepBy, try_choice, eof
+from parsec import Parser as ParsecParser
 from langAST import *
 
 whitespace = regex(r'\s*', re.MULTILINE)
 lexeme = lambda p: p << whitespace
 
+# ------ PACKRAT ------
+
+class PackratTable:
+    """Per-parse memo table used in packrat mode, keyed by (rule, index)."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.memo = {}
+        self.hits = 0
+        self.misses = 0
+        self.rule_hits = {}
+        self.rule_misses = {}
+
+    def lookup(self, rule, fn, text, index):
+        key = (rule, index)
+        res = self.memo.get(key)
+        if res is not None:
+            self.hits += 1
+            self.rule_hits[rule] = self.rule_hits.get(rule, 0) + 1
+            return res
+        self.misses += 1
+        self.rule_misses[rule] = self.rule_misses.get(rule, 0) + 1
+        res = self.memo[key] = fn(text, index)
+        return res
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        """Per-rule hits/lookups, most reused rules first."""
+        rules = sorted(self.rule_misses, key=lambda r: -self.rule_hits.get(r, 0))
+        lines = [f"packrat: {self.hits}/{self.hits + self.misses} hits ({self.hit_rate:.1%})"]
+        for rule in rules:
+            hits = self.rule_hits.get(rule, 0)
+            lines.append(f"  {rule_name(rule):<40} {hits:>8} / {hits + self.rule_misses[rule]}")
+        return "\n".join(lines)
+
+# Tabela ativa durante packrat_parse; None no modo normal (sem custo extra).
+_packrat = None
+
+def rule_name(rule) -> str:
+    """Module-level name of a combinator rule, or kind(inner rules) for helpers."""
+    for name, value in globals().items():
+        if value is rule:
+            return name
+    inner = getattr(rule, 'inner', None)
+    if inner is not None:
+        name = f"{rule.kind}({', '.join(rule_name(p) for p in inner)})"
+        return name if len(name) <= 40 else name[:37] + '...'
+    return repr(rule)
+
+def memoize(p, kind=None, inner=None):
+    """Wrap `p` so that, in packrat mode, its result is memoized per index."""
+    @ParsecParser
+    def memo_parser(text, index):
+        table = _packrat
+        if table is not None and table.text is text:
+            return table.lookup(memo_parser, p, text, index)
+        return p(text, index)
+    memo_parser.kind, memo_parser.inner = kind or 'memo', inner or (p,)
+    return memo_parser
+
+
 # Tokens básicos
 lparen = lexeme(string('('))
 rparen = lexeme(string(')'))
@@ -13,19 +82,18 @@ rbrace = lexeme(string('}'))
 semi = lexeme(string(';'))
 comma = lexeme(string(','))
 eq = lexeme(string('='))
-ident = lexeme(regex(r'[a-zA-Z_][a-zA-Z0-9_]*'))
+ident = memoize(lexeme(regex(r'[a-zA-Z_][a-zA-Z0-9_]*')))
 type_parser = lexeme(regex(r'\b(?:int|float|char|bool|void)\b'))
 
 def attempt(p):
-    @Parser
     def attempt_parser(text, index):
         try:
             return p(text, index)
         except ParseError:
             return ParseError(text, index, ["attempt"])
-    return attempt_parser
+    return memoize(attempt_parser, 'attempt', (p,))
 
-class Forward(Parser):
+class Forward(ParsecParser):
     def __init__(self):
         self.parser = None
     
@@ -36,6 +104,9 @@ class Forward(Parser):
     def __call__(self, text, index):
         if self.parser is None:
             raise ValueError("Forward parser não definido")
+        table = _packrat
+        if table is not None and table.text is text:
+            return table.lookup(self, self.parser, text, index)
         return self.parser(text, index)
 
 def choice_parser(*parsers):
@@ -46,7 +117,22 @@ def choice_parser(*parsers):
     for p in parsers[1:]:
         result = try_choice(result, p)
     
-    return result
+    return memoize(result, 'choice', parsers)
+
+def packrat_parse(parser, text: str, table: PackratTable = None):
+    """Parse the whole `text` with memoization enabled.
+
+    Returns the parsed value and the PackratTable with the hit counters. Pass
+    a `table` to keep the counters when the parse raises ParseError.
+    """
+    global _packrat
+    table = table or PackratTable(text)
+    previous, _packrat = _packrat, table
+    try:
+        value = parser.parse_strict(text)
+    finally:
+        _packrat = previous
+    return value, table
 
 # ------ PARSERS BÁSICOS ------
 
@@ -88,18 +174,25 @@ def parse_function_call():
     yield rparen
     return FunctionCall(name, args)
 
+# Construído uma única vez para que o modo packrat reconheça a regra entre chamadas
+int_literal = parse_int()
+float_literal = parse_float()
+string_literal = parse_string()
+bool_literal = parse_bool()
+primary_alternatives = choice_parser(
+    attempt(parse_function_call),
+    attempt(int_literal),
+    attempt(float_literal),
+    attempt(string_literal),
+    attempt(bool_literal),
+    attempt(parse_paren_expr),
+    parse_variable
+)
+
 @generate
 def parse_primary():
     """Parse primary expressions: literals, variables, parenthesized expressions, function calls"""
-    expr = yield choice_parser(
-        attempt(parse_function_call),
-        attempt(parse_int()),
-        attempt(parse_float()),
-        attempt(parse_string()),
-        attempt(parse_bool()),
-        attempt(parse_paren_expr),
-        parse_variable
-    )
+    expr = yield primary_alternatives
     return expr
 
 # Expressões unárias
@@ -151,11 +244,12 @@ le_op = lexeme(string('<='))
 ge_op = lexeme(string('>='))
 eq_op = lexeme(string('=='))  
 ne_op = lexeme(string('!='))
+rel_op = choice_parser(le_op, ge_op, eq_op, ne_op, lt_op, gt_op)
 
 @generate
 def parse_comparison():
     left = yield parse_term
-    op = yield optional(choice_parser(le_op, ge_op, eq_op, ne_op, lt_op, gt_op))
+    op = yield optional(rel_op)
     
     if op:
         right = yield parse_term
@@ -311,8 +405,1103 @@ def parse_program():
     yield whitespace
     return Program(functions, [])
 
+# ------ LEXER + PARSER DESCENDENTE RECURSIVO ------
+#
+# Backend rápido usado por parse_code. Produz exatamente os mesmos nós de
+# langAST que os combinadores acima, que ficam como referência para testes
+# diferenciais (ver parse_code_combinator). A única diferença intencional é
+# que as palavras reservadas só são reconhecidas como palavras inteiras: os
+# combinadores leem `returned = 1;` como `return ed = 1;` e `trueval` como
+# `true` seguido de `val`.
+
+# Incrementar sempre que a gramática ou o AST produzido mudarem (invalida lang_cache).
+GRAMMAR_VERSION = 3
+
+TYPES = frozenset(('int', 'float', 'char', 'bool', 'void'))
+
+_TOKEN_RE = re.compile(r'''
+    (?P<WS>\s+)
+  | (?P<INT>[0-9]+)
+  | (?P<STRING>"[^"]*")
+  | (?P<NAME>[a-zA-Z_][a-zA-Z0-9_]*)
+  | (?P<OP>\+\+|--|==|!=|<=|>=|&&|\|\||[-+*/%<>=!(){};,])
+  | (?P<ERROR>.)
+''', re.VERBOSE | re.DOTALL)
+
+# Chavetas fora de strings, para delimitar funções de topo sem tokenizar.
+_BRACES_RE = re.compile(r'"[^"]*"|[{}]')
+
+_STMT_KEYWORDS = TYPES | {'if', 'while', 'for', 'return', 'print'}
+_MUL_OPS = frozenset(('*', '/', '%'))
+_ADD_OPS = frozenset(('+', '-'))
+_REL_OPS = frozenset(('<=', '>=', '==', '!=', '<', '>'))
+_PREFIX_OPS = frozenset(('++', '--', '!'))
+_POSTFIX_OPS = frozenset(('++', '--'))
+
+
+class Token(NamedTuple):
+    kind: str   # 'INT', 'STRING', 'NAME', 'EOF' ou o próprio operador ('(', '&&', ...)
+    value: str
+    start: int
+    end: int
+
+
+class Lexer:
+    """Single-pass tokenizer driven by one compiled master regex."""
+
+    def __init__(self, code: str):
+        self.code = code
+
+    def tokenize(self, start: int = 0, end: Optional[int] = None) -> List[Token]:
+        """Tokens of code[start:end], with offsets into the whole code."""
+        code = self.code
+        end = len(code) if end is None else end
+        tokens = []
+        append = tokens.append
+        for m in _TOKEN_RE.finditer(code, start, end):
+            kind = m.lastgroup
+            if kind == 'WS':
+                continue
+            value = m.group()
+            if kind == 'OP':
+                kind = value
+            append(Token(kind, value, m.start(), m.end()))
+        append(Token('EOF', '', end, end))
+        return tokens
+
+
+class SourceMap:
+    """Source spans of the AST nodes of one parse, kept outside the nodes.
+
+    Every node gets an id (its post-order position under `root`, the id
+    langAST.NodeTable gives it). `spans` holds, per id, the index of its
+    first token and the index just past its last one, and the token offsets
+    are in two more sequences, so the AST classes do not grow and a span
+    costs two lookups. The parser hands over its plain lists; they become
+    compact arrays, like the newline-offset table that line and column
+    lookups bisect, on first use. Lines and columns are 0-based, like
+    ParseError.loc().
+    """
+
+    def __init__(self, text: str, root, spans, token_starts, token_ends):
+        self.text = text
+        self.root = root
+        self._spans = spans
+        self._tokens = token_starts, token_ends
+        self._table = None
+        self._line_starts = None
+
+    def __len__(self) -> int:
+        return len(self._spans) // 2
+
+    def _compact(self):
+        if self._spans.__class__ is list:
+            self._spans = array('l', self._spans)
+            self._tokens = tuple(array('l', offsets) for offsets in self._tokens)
+
+    @property
+    def table(self) -> NodeTable:
+        """NodeTable of `root`, built on first use: node ids, parents and paths."""
+        if self._table is None:
+            self._table = NodeTable(self.root)
+        return self._table
+
+    def node_id(self, node) -> Optional[int]:
+        return self.table.id_of(node)
+
+    def span(self, node) -> Optional[Tuple[int, int]]:
+        """(start, end) offsets of `node` in the source, or None if unknown."""
+        i = self.node_id(node)
+        return None if i is None else self.span_at(i)
+
+    def span_at(self, node_id: int) -> Tuple[int, int]:
+        """(start, end) offsets of the node with id `node_id`."""
+        self._compact()
+        spans = self._spans
+        starts, ends = self._tokens
+        return starts[spans[2 * node_id]], ends[spans[2 * node_id + 1] - 1]
+
+    @property
+    def line_starts(self) -> array:
+        if self._line_starts is None:
+            text = self.text
+            starts = array('l', [0])
+            pos = text.find('\n')
+            while pos >= 0:
+                starts.append(pos + 1)
+                pos = text.find('\n', pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_col(self, offset: int) -> Tuple[int, int]:
+        line = bisect_right(self.line_starts, offset) - 1
+        return line, offset - self.line_starts[line]
+
+    def location(self, node) -> Optional[str]:
+        """'line:column' of the start of `node`, in the format of ParseError.loc()."""
+        i = self.node_id(node)
+        return None if i is None else self.location_at(i)
+
+    def location_at(self, node_id: int) -> str:
+        """'line:column' of the start of the node with id `node_id`."""
+        return '{}:{}'.format(*self.line_col(self.span_at(node_id)[0]))
+
+
+class Parser:
+    """Token-indexed recursive-descent parser for the language grammar.
+
+    Each method mirrors the combinator rule with the same name and backtracks
+    only where the combinators use `attempt`/`choice_parser`/`optional`.
+
+    Failures are reported at the furthest token any alternative reached,
+    together with everything that was expected there. With `recover=True`
+    a failing statement or function is recorded in `diagnostics` and skipped
+    up to the next `;` or `}`, so one pass collects every syntax error.
+
+    With `spans=True` the first and end token of every node are appended,
+    as it is built, to a flat list of ints that source_map() hands over;
+    otherwise nothing is recorded. With an `interner` every Expr/Stmt goes
+    through interner.node() as it is built, so repeated subtrees come out
+    shared; the two exclude each other, as a shared node has no single span.
+    """
+
+    def __init__(self, tokens: List[Token], text: str = '', recover: bool = False,
+                 spans: bool = False, interner: Optional[Interner] = None):
+        if spans and interner is not None:
+            raise ValueError("spans e interner não podem ser usados juntos")
+        self.kinds = [t.kind for t in tokens]
+        self.values = [t.value for t in tokens]
+        self.starts = [t.start for t in tokens]
+        self.ends = [t.end for t in tokens]
+        self.text = text
+        self.pos = 0
+        self.recover = recover
+        self.diagnostics: List[ParseError] = []
+        self.furthest = -1
+        self.expected = set()
+        # primeiro token e fim de cada nó construído, seguidos; None sem spans
+        self.spans = [] if spans else None
+        # nós já construídos ficam canónicos, por isso os filhos também o são
+        self.interner = interner
+
+    def error(self, expected: str):
+        pos = self.pos
+        if pos > self.furthest:
+            self.furthest = pos
+            self.expected = {expected}
+        elif pos == self.furthest:
+            self.expected.add(expected)
+        raise ParseError(expected, self.text, self.starts[pos])
+
+    def failure(self) -> ParseError:
+        """ParseError for the furthest failure seen so far."""
+        pos = self.furthest if self.furthest >= 0 else self.pos
+        expected = sorted(self.expected)
+        expected = expected[0] if len(expected) == 1 else expected
+        return ParseError(expected, self.text, self.starts[pos])
+
+    # ------ SPANS E BACKTRACKING ------
+    #
+    # Cada regra devolve o nó que constrói através de finish, que acrescenta
+    # dois ints a self.spans quando o nó fica completo (filhos antes do pai),
+    # pela ordem que é o seu id na NodeTable da árvore; um recuo descarta os
+    # dos nós abandonados. Guardar índices de tokens, e não offsets, deixa o
+    # registo em `spans += (start, self.pos)`.
+
+    def finish(self, node, start: int, intern: bool = True):
+        """Record the span of `node` (tokens start..pos) or intern it.
+
+        Returns the node the rule should use. Program and Function pass
+        intern=False: they are never shared.
+        """
+        if self.spans is not None:
+            self.spans += (start, self.pos)
+        elif intern and self.interner is not None:
+            return self.interner.node(node)
+        return node
+
+    def source_map(self, root) -> SourceMap:
+        """Spans recorded while parsing `root` (the Program or Block returned)."""
+        return SourceMap(self.text, root, self.spans, self.starts, self.ends)
+
+    def checkpoint(self) -> Tuple[int, int, int]:
+        spans = len(self.spans) if self.spans is not None else 0
+        return self.pos, len(self.diagnostics), spans
+
+    def rollback(self, checkpoint: Tuple[int, int, int]):
+        self.pos = checkpoint[0]
+        del self.diagnostics[checkpoint[1]:]
+        self.rollback_spans(checkpoint)
+
+    def rollback_spans(self, checkpoint: Tuple[int, int, int]):
+        if self.spans is not None:
+            del self.spans[checkpoint[2]:]
+
+    # ------ RECUPERAÇÃO DE ERROS ------
+
+    def report(self):
+        error = self.failure()
+        if not self.diagnostics or self.diagnostics[-1].index != error.index:
+            self.diagnostics.append(error)
+
+    def synchronize(self, start: int, top_level: bool = False):
+        """Skip from the failure point to just after the next `;` or balanced `}`.
+
+        A `}` that closes the enclosing block is left for parse_block, except at
+        top level, where it is consumed so the next function can be parsed.
+        Inside a block, skipping also stops before a keyword that can only
+        start a new statement (e.g. a missing `;` right before an `if`).
+        """
+        kinds = self.kinds
+        values = self.values
+        pos = max(start, self.furthest)
+        depth = 0
+        while True:
+            kind = kinds[pos]
+            if kind == 'EOF':
+                break
+            if (kind == 'NAME' and depth == 0 and pos > start and not top_level
+                    and values[pos] in _STMT_KEYWORDS):
+                break
+            if kind == '{':
+                depth += 1
+            elif kind == '}':
+                if depth == 0:
+                    if top_level:
+                        pos += 1
+                    break
+                depth -= 1
+                if depth == 0:
+                    pos += 1
+                    break
+            elif kind == ';' and depth == 0:
+                pos += 1
+                break
+            pos += 1
+        self.pos = pos
+        self.furthest, self.expected = -1, set()
+
+    def recover_statements(self) -> List[Stmt]:
+        kinds = self.kinds
+        statements = []
+        saved = self.furthest, self.expected
+        self.furthest, self.expected = -1, set()
+        while kinds[self.pos] != '}':
+            if kinds[self.pos] == 'EOF':
+                self.error_at_eof('}')
+                break
+            checkpoint = self.checkpoint()
+            start = checkpoint[0]
+            try:
+                statements.append(self.parse_stmt())
+            except ParseError:
+                if self.furthest == start:
+                    self.expected.add('}')
+                self.report()
+                self.rollback_spans(checkpoint)
+                self.synchronize(start)
+            self.furthest, self.expected = -1, set()
+        else:
+            self.pos += 1
+        self.furthest, self.expected = saved
+        return statements
+
+    def error_at_eof(self, expected: str):
+        try:
+            self.error(expected)
+        except ParseError:
+            self.report()
+        self.furthest, self.expected = -1, set()
+
+    def expect(self, kind: str) -> str:
+        pos = self.pos
+        if self.kinds[pos] != kind:
+            self.error(kind)
+        self.pos = pos + 1
+        return self.values[pos]
+
+    def expect_word(self, word: str):
+        pos = self.pos
+        if self.kinds[pos] != 'NAME' or self.values[pos] != word:
+            self.error(word)
+        self.pos = pos + 1
+
+    def ident(self) -> str:
+        pos = self.pos
+        if self.kinds[pos] != 'NAME':
+            self.error('identifier')
+        self.pos = pos + 1
+        return self.values[pos]
+
+    def type_name(self) -> str:
+        pos = self.pos
+        if self.kinds[pos] != 'NAME' or self.values[pos] not in TYPES:
+            self.error('type')
+        self.pos = pos + 1
+        return self.values[pos]
+
+    # ------ PROGRAMA ------
+
+    def parse_program(self) -> Program:
+        functions = []
+        kinds = self.kinds
+        if self.recover:
+            while kinds[self.pos] != 'EOF':
+                checkpoint = self.checkpoint()
+                try:
+                    functions.append(self.parse_function())
+                except ParseError:
+                    self.report()
+                    self.rollback_spans(checkpoint)
+                    self.synchronize(checkpoint[0], top_level=True)
+        else:
+            try:
+                while kinds[self.pos] != 'EOF':
+                    functions.append(self.parse_function())
+            except ParseError:
+                raise self.failure() from None
+        return self.finish(Program(functions, []), 0, intern=False)
+
+    def parse_function(self) -> Function:
+        start = self.pos
+        return_type, name, params = self.parse_signature()
+        body = self.parse_block()
+        return self.finish(Function(return_type, name, params, body), start,
+                           intern=False)
+
+    def parse_signature(self) -> Tuple[str, str, List[VarDecl]]:
+        return_type = self.type_name()
+        name = self.ident()
+        self.expect('(')
+        params = []
+        if self.kinds[self.pos] != ')':
+            params.append(self.parse_param())
+            while self.kinds[self.pos] == ',':
+                self.pos += 1
+                params.append(self.parse_param())
+        self.expect(')')
+        return return_type, name, params
+
+    def parse_param(self) -> VarDecl:
+        start = self.pos
+        return self.finish(VarDecl(self.type_name(), self.ident()), start)
+
+    # ------ STATEMENTS ------
+
+    def parse_block(self) -> Block:
+        start = self.pos
+        self.expect('{')
+        if self.recover:
+            node = Block(self.recover_statements())
+        else:
+            statements = []
+            kinds = self.kinds
+            while kinds[self.pos] != '}':
+                pos = self.pos
+                try:
+                    statements.append(self.parse_stmt())
+                except ParseError:
+                    if self.furthest == pos:
+                        self.expected.add('}')
+                    raise
+            self.pos += 1
+            node = Block(statements)
+        return self.finish(node, start)
+
+    def parse_stmt(self) -> Stmt:
+        pos = self.pos
+        kind = self.kinds[pos]
+        if kind == '{':
+            return self.parse_block()
+        if kind == 'NAME':
+            word = self.values[pos]
+            rule = self._keyword_rules.get(word)
+            if rule is None and word in TYPES:
+                rule = Parser.parse_var_decl
+            if rule is not None:
+                # Tal como em attempt(...): se a regra falhar, recua e tenta
+                # ler o statement como expressão (`int = 5;` é uma atribuição).
+                checkpoint = self.checkpoint()
+                try:
+                    return rule(self)
+                except ParseError:
+                    self.rollback(checkpoint)
+        return self.parse_expr_stmt()
+
+    def parse_expr_stmt(self) -> ExprStmt:
+        start = self.pos
+        expr = self.parse_expr()
+        self.expect(';')
+        return self.finish(ExprStmt(expr), start)
+
+    def parse_var_decl(self) -> VarDecl:
+        start = self.pos
+        type_name = self.type_name()
+        name = self.ident()
+        init = None
+        if self.kinds[self.pos] == '=':
+            checkpoint = self.checkpoint()
+            self.pos += 1
+            try:
+                init = self.parse_expr()
+            except ParseError:
+                self.rollback(checkpoint)
+        self.expect(';')
+        return self.finish(VarDecl(type_name, name, init), start)
+
+    def parse_if(self) -> If:
+        start = self.pos
+        self.expect_word('if')
+        self.expect('(')
+        condition = self.parse_expr()
+        self.expect(')')
+        then_branch = self.parse_stmt()
+        else_branch = None
+        pos = self.pos
+        if self.kinds[pos] == 'NAME' and self.values[pos] == 'else':
+            checkpoint = self.checkpoint()
+            self.pos += 1
+            try:
+                else_branch = self.parse_stmt()
+            except ParseError:
+                self.rollback(checkpoint)
+        return self.finish(If(condition, then_branch, else_branch), start)
+
+    def parse_while(self) -> While:
+        start = self.pos
+        self.expect_word('while')
+        self.expect('(')
+        condition = self.parse_expr()
+        self.expect(')')
+        body = self.parse_stmt()
+        return self.finish(While(condition, body), start)
+
+    def parse_for(self) -> For:
+        start = self.pos
+        self.expect_word('for')
+        self.expect('(')
+        pos = self.pos
+        init = None
+        if self.kinds[pos] == 'NAME' and self.values[pos] in TYPES:
+            checkpoint = self.checkpoint()
+            try:
+                init = self.parse_var_decl()
+            except ParseError:
+                self.rollback(checkpoint)
+        if init is None:
+            init = ExprStmt(self.parse_expr())
+            self.expect(';')
+            init = self.finish(init, pos)
+        condition = self.parse_expr()
+        self.expect(';')
+        increment = self.parse_expr()
+        self.expect(')')
+        body = self.parse_stmt()
+        return self.finish(For(init, condition, increment, body), start)
+
+    def parse_print(self) -> Print:
+        start = self.pos
+        self.expect_word('print')
+        self.expect('(')
+        expr = self.parse_expr()
+        self.expect(')')
+        self.expect(';')
+        return self.finish(Print(expr), start)
+
+    def parse_return(self) -> Return:
+        start = self.pos
+        self.expect_word('return')
+        value = None
+        if self.kinds[self.pos] != ';':
+            value = self.parse_expr()
+        self.expect(';')
+        return self.finish(Return(value), start)
+
+    _keyword_rules = {
+        'if': parse_if,
+        'while': parse_while,
+        'for': parse_for,
+        'return': parse_return,
+        'print': parse_print,
+    }
+
+    # ------ EXPRESSÕES ------
+
+    def parse_expr(self) -> Expr:
+        pos = self.pos
+        if self.kinds[pos] == 'NAME' and self.kinds[pos + 1] == '=':
+            checkpoint = self.checkpoint()
+            self.pos = pos + 2
+            try:
+                return self.finish(Assignment(self.values[pos], self.parse_expr()), pos)
+            except ParseError:
+                self.rollback(checkpoint)
+        return self.parse_logical_or()
+
+    def parse_logical_or(self) -> Expr:
+        start = self.pos
+        result = self.parse_logical_and()
+        kinds = self.kinds
+        while kinds[self.pos] == '||':
+            self.pos += 1
+            result = self.finish(BinaryOp(result, '||', self.parse_logical_and()), start)
+        return result
+
+    def parse_logical_and(self) -> Expr:
+        start = self.pos
+        result = self.parse_comparison()
+        kinds = self.kinds
+        while kinds[self.pos] == '&&':
+            self.pos += 1
+            result = self.finish(BinaryOp(result, '&&', self.parse_comparison()), start)
+        return result
+
+    def parse_comparison(self) -> Expr:
+        start = self.pos
+        left = self.parse_term()
+        op = self.kinds[self.pos]
+        if op in _REL_OPS:
+            self.pos += 1
+            return self.finish(BinaryOp(left, op, self.parse_term()), start)
+        return left
+
+    def parse_term(self) -> Expr:
+        start = self.pos
+        result = self.parse_factor()
+        kinds = self.kinds
+        while kinds[self.pos] in _ADD_OPS:
+            op = kinds[self.pos]
+            self.pos += 1
+            result = self.finish(BinaryOp(result, op, self.parse_factor()), start)
+        return result
+
+    def parse_factor(self) -> Expr:
+        start = self.pos
+        result = self.parse_unary()
+        kinds = self.kinds
+        while kinds[self.pos] in _MUL_OPS:
+            op = kinds[self.pos]
+            self.pos += 1
+            result = self.finish(BinaryOp(result, op, self.parse_unary()), start)
+        return result
+
+    def parse_unary(self) -> Expr:
+        start = self.pos
+        kinds = self.kinds
+        op = kinds[start]
+        if op in _PREFIX_OPS:
+            self.pos += 1
+        else:
+            op = None
+        expr = self.parse_primary()
+        post_op = kinds[self.pos]
+        if post_op in _POSTFIX_OPS:
+            if op:
+                self.error("Não é possível ter operador pré e pós ao mesmo tempo")
+            self.pos += 1
+            node = UnaryOp(post_op, expr, prefix=False)
+        elif op:
+            node = UnaryOp(op, expr, prefix=True)
+        else:
+            return expr
+        return self.finish(node, start)
+
+    def parse_primary(self) -> Expr:
+        pos = self.pos
+        kinds = self.kinds
+        kind = kinds[pos]
+        if kind == 'NAME':
+            name = self.values[pos]
+            if kinds[pos + 1] == '(':
+                checkpoint = self.checkpoint()
+                try:
+                    return self.parse_function_call()
+                except ParseError:
+                    self.rollback(checkpoint)
+            self.pos = pos + 1
+            if name == 'true':
+                node = Literal(True)
+            elif name == 'false':
+                node = Literal(False)
+            else:
+                node = Variable(name)
+        elif kind == 'INT':
+            self.pos = pos + 1
+            node = Literal(int(self.values[pos]))
+        elif kind == '-' and kinds[pos + 1] == 'INT' and self.ends[pos] == self.starts[pos + 1]:
+            # `-?[0-9]+`: o sinal só pertence ao literal se estiver colado ao número
+            self.pos = pos + 2
+            node = Literal(-int(self.values[pos + 1]))
+        elif kind == 'STRING':
+            self.pos = pos + 1
+            node = Literal(self.values[pos][1:-1])
+        elif kind == '(':
+            # o span da expressão interior não inclui os parênteses
+            self.pos = pos + 1
+            expr = self.parse_expr()
+            self.expect(')')
+            return expr
+        else:
+            self.error('expression')
+        return self.finish(node, pos)
+
+    def parse_function_call(self) -> FunctionCall:
+        start = self.pos
+        name = self.ident()
+        self.expect('(')
+        args = []
+        if self.kinds[self.pos] != ')':
+            args.append(self.parse_expr())
+            while self.kinds[self.pos] == ',':
+                self.pos += 1
+                args.append(self.parse_expr())
+        self.expect(')')
+        return self.finish(FunctionCall(name, args), start)
+
+class StackParser(Parser):
+    """Parser that keeps the grammar recursion on an explicit stack.
+
+    Every rule is a generator that yields the sub-rule it wants to call and
+    receives its result back; run() drives them from a plain list, so the
+    depth of `(((...)))` or `{{{...}}}` is limited by memory rather than by
+    the Python stack. The rules mirror Parser's one by one (same AST, same
+    errors) and run about twice as slow, so this is only used past the depth
+    the recursive parser can handle (see parse_tokens).
+    """
+
+    def run(self, rule):
+        stack = [rule]
+        value = None
+        error = None
+        while True:
+            frame = stack[-1]
+            try:
+                if error is None:
+                    call = frame.send(value)
+                else:
+                    # sem traceback, que cresceria com a profundidade
+                    thrown, error = error.with_traceback(None), None
+                    call = frame.throw(thrown)
+            except StopIteration as stop:
+                value = stop.value
+            except ParseError as e:
+                error = e
+            else:
+                stack.append(call)
+                value = None
+                continue
+            stack.pop()
+            if not stack:
+                if error is not None:
+                    raise error
+                return value
+
+    def parse_function(self) -> Function:
+        return self.run(self._function())
+
+    def parse_block(self) -> Block:
+        return self.run(self._block())
+
+    def recover_statements(self) -> List[Stmt]:
+        return self.run(self._recover_statements())
+
+    # ------ PROGRAMA ------
+
+    def _function(self):
+        start = self.pos
+        return_type, name, params = self.parse_signature()
+        body = yield self._block()
+        return self.finish(Function(return_type, name, params, body), start,
+                           intern=False)
+
+    # ------ STATEMENTS ------
+
+    def _block(self):
+        start = self.pos
+        self.expect('{')
+        if self.recover:
+            node = Block((yield self._recover_statements()))
+        else:
+            statements = []
+            kinds = self.kinds
+            while kinds[self.pos] != '}':
+                pos = self.pos
+                try:
+                    statements.append((yield self._stmt()))
+                except ParseError:
+                    if self.furthest == pos:
+                        self.expected.add('}')
+                    raise
+            self.pos += 1
+            node = Block(statements)
+        return self.finish(node, start)
+
+    def _recover_statements(self):
+        kinds = self.kinds
+        statements = []
+        saved = self.furthest, self.expected
+        self.furthest, self.expected = -1, set()
+        while kinds[self.pos] != '}':
+            if kinds[self.pos] == 'EOF':
+                self.error_at_eof('}')
+                break
+            checkpoint = self.checkpoint()
+            start = checkpoint[0]
+            try:
+                statements.append((yield self._stmt()))
+            except ParseError:
+                if self.furthest == start:
+                    self.expected.add('}')
+                self.report()
+                self.rollback_spans(checkpoint)
+                self.synchronize(start)
+            self.furthest, self.expected = -1, set()
+        else:
+            self.pos += 1
+        self.furthest, self.expected = saved
+        return statements
+
+    def _stmt(self):
+        pos = self.pos
+        kind = self.kinds[pos]
+        if kind == '{':
+            return (yield self._block())
+        if kind == 'NAME':
+            word = self.values[pos]
+            rule = self._stack_rules.get(word)
+            if rule is None and word in TYPES:
+                rule = StackParser._var_decl
+            if rule is not None:
+                checkpoint = self.checkpoint()
+                try:
+                    return (yield rule(self))
+                except ParseError:
+                    self.rollback(checkpoint)
+        return (yield self._expr_stmt())
+
+    def _expr_stmt(self):
+        start = self.pos
+        expr = yield self._expr()
+        self.expect(';')
+        return self.finish(ExprStmt(expr), start)
+
+    def _var_decl(self):
+        start = self.pos
+        type_name = self.type_name()
+        name = self.ident()
+        init = None
+        if self.kinds[self.pos] == '=':
+            checkpoint = self.checkpoint()
+            self.pos += 1
+            try:
+                init = yield self._expr()
+            except ParseError:
+                self.rollback(checkpoint)
+        self.expect(';')
+        return self.finish(VarDecl(type_name, name, init), start)
+
+    def _if(self):
+        start = self.pos
+        self.expect_word('if')
+        self.expect('(')
+        condition = yield self._expr()
+        self.expect(')')
+        then_branch = yield self._stmt()
+        else_branch = None
+        pos = self.pos
+        if self.kinds[pos] == 'NAME' and self.values[pos] == 'else':
+            checkpoint = self.checkpoint()
+            self.pos += 1
+            try:
+                else_branch = yield self._stmt()
+            except ParseError:
+                self.rollback(checkpoint)
+        return self.finish(If(condition, then_branch, else_branch), start)
+
+    def _while(self):
+        start = self.pos
+        self.expect_word('while')
+        self.expect('(')
+        condition = yield self._expr()
+        self.expect(')')
+        body = yield self._stmt()
+        return self.finish(While(condition, body), start)
+
+    def _for(self):
+        start = self.pos
+        self.expect_word('for')
+        self.expect('(')
+        pos = self.pos
+        init = None
+        if self.kinds[pos] == 'NAME' and self.values[pos] in TYPES:
+            checkpoint = self.checkpoint()
+            try:
+                init = yield self._var_decl()
+            except ParseError:
+                self.rollback(checkpoint)
+        if init is None:
+            init = ExprStmt((yield self._expr()))
+            self.expect(';')
+            init = self.finish(init, pos)
+        condition = yield self._expr()
+        self.expect(';')
+        increment = yield self._expr()
+        self.expect(')')
+        body = yield self._stmt()
+        return self.finish(For(init, condition, increment, body), start)
+
+    def _print(self):
+        start = self.pos
+        self.expect_word('print')
+        self.expect('(')
+        expr = yield self._expr()
+        self.expect(')')
+        self.expect(';')
+        return self.finish(Print(expr), start)
+
+    def _return(self):
+        start = self.pos
+        self.expect_word('return')
+        value = None
+        if self.kinds[self.pos] != ';':
+            value = yield self._expr()
+        self.expect(';')
+        return self.finish(Return(value), start)
+
+    _stack_rules = {
+        'if': _if,
+        'while': _while,
+        'for': _for,
+        'return': _return,
+        'print': _print,
+    }
+
+    # ------ EXPRESSÕES ------
+
+    def _expr(self):
+        pos = self.pos
+        if self.kinds[pos] == 'NAME' and self.kinds[pos + 1] == '=':
+            checkpoint = self.checkpoint()
+            self.pos = pos + 2
+            try:
+                return self.finish(Assignment(self.values[pos], (yield self._expr())), pos)
+            except ParseError:
+                self.rollback(checkpoint)
+        return (yield self._logical_or())
+
+    def _logical_or(self):
+        start = self.pos
+        result = yield self._logical_and()
+        kinds = self.kinds
+        while kinds[self.pos] == '||':
+            self.pos += 1
+            result = self.finish(BinaryOp(result, '||', (yield self._logical_and())), start)
+        return result
+
+    def _logical_and(self):
+        start = self.pos
+        result = yield self._comparison()
+        kinds = self.kinds
+        while kinds[self.pos] == '&&':
+            self.pos += 1
+            result = self.finish(BinaryOp(result, '&&', (yield self._comparison())), start)
+        return result
+
+    def _comparison(self):
+        start = self.pos
+        left = yield self._term()
+        op = self.kinds[self.pos]
+        if op in _REL_OPS:
+            self.pos += 1
+            return self.finish(BinaryOp(left, op, (yield self._term())), start)
+        return left
+
+    def _term(self):
+        start = self.pos
+        result = yield self._factor()
+        kinds = self.kinds
+        while kinds[self.pos] in _ADD_OPS:
+            op = kinds[self.pos]
+            self.pos += 1
+            result = self.finish(BinaryOp(result, op, (yield self._factor())), start)
+        return result
+
+    def _factor(self):
+        start = self.pos
+        result = yield self._unary()
+        kinds = self.kinds
+        while kinds[self.pos] in _MUL_OPS:
+            op = kinds[self.pos]
+            self.pos += 1
+            result = self.finish(BinaryOp(result, op, (yield self._unary())), start)
+        return result
+
+    def _unary(self):
+        start = self.pos
+        kinds = self.kinds
+        op = kinds[start]
+        if op in _PREFIX_OPS:
+            self.pos += 1
+        else:
+            op = None
+        expr = yield self._primary()
+        post_op = kinds[self.pos]
+        if post_op in _POSTFIX_OPS:
+            if op:
+                self.error("Não é possível ter operador pré e pós ao mesmo tempo")
+            self.pos += 1
+            node = UnaryOp(post_op, expr, prefix=False)
+        elif op:
+            node = UnaryOp(op, expr, prefix=True)
+        else:
+            return expr
+        return self.finish(node, start)
+
+    def _primary(self):
+        pos = self.pos
+        kinds = self.kinds
+        kind = kinds[pos]
+        if kind == '(':
+            self.pos = pos + 1
+            expr = yield self._expr()
+            self.expect(')')
+            return expr
+        if kind == 'NAME' and kinds[pos + 1] == '(':
+            checkpoint = self.checkpoint()
+            try:
+                return (yield self._function_call())
+            except ParseError:
+                self.rollback(checkpoint)
+        self.pos = pos + 1
+        if kind == 'NAME':
+            name = self.values[pos]
+            if name == 'true':
+                node = Literal(True)
+            elif name == 'false':
+                node = Literal(False)
+            else:
+                node = Variable(name)
+        elif kind == 'INT':
+            node = Literal(int(self.values[pos]))
+        elif kind == '-' and kinds[pos + 1] == 'INT' and self.ends[pos] == self.starts[pos + 1]:
+            self.pos = pos + 2
+            node = Literal(-int(self.values[pos + 1]))
+        elif kind == 'STRING':
+            node = Literal(self.values[pos][1:-1])
+        else:
+            self.pos = pos
+            self.error('expression')
+        return self.finish(node, pos)
+
+    def _function_call(self):
+        start = self.pos
+        name = self.ident()
+        self.expect('(')
+        args = []
+        if self.kinds[self.pos] != ')':
+            args.append((yield self._expr()))
+            while self.kinds[self.pos] == ',':
+                self.pos += 1
+                args.append((yield self._expr()))
+        self.expect(')')
+        return self.finish(FunctionCall(name, args), start)
+
+
+def parse_tokens(tokens: List[Token], text: str = '', **options) -> Tuple[Program, Parser]:
+    """Run parse_program, moving to StackParser if the nesting is too deep.
+
+    Returns the Program and the parser that produced it, for its
+    diagnostics or source_map(). `options` are passed to the parser.
+    """
+    parser = Parser(tokens, text, **options)
+    try:
+        return parser.parse_program(), parser
+    except RecursionError:
+        parser = StackParser(tokens, text, **options)
+        return parser.parse_program(), parser
+
 def parse_code(code: str) -> Program:
     lexer = Lexer(code)
     tokens = lexer.tokenize()
-    parser = Parser(tokens)
-    return parser.parse_program()
\ No newline at end of file
+    return parse_tokens(tokens, code)[0]
+
+def parse_code_with_diagnostics(code: str) -> Tuple[Program, List[ParseError]]:
+    """Parse `code` in a single pass, recovering from syntax errors.
+
+    Returns the partial Program (statements and functions that failed to
+    parse are left out) and every syntax error found, in source order.
+    """
+    program, parser = parse_tokens(Lexer(code).tokenize(), code, recover=True)
+    return program, parser.diagnostics
+
+def parse_code_lazy(code: str) -> Program:
+    """Parse only the function signatures; each body is parsed on first access.
+
+    Top-level functions are delimited by matching braces directly on the text,
+    so a body is not even tokenized until `Function.body` is read. Syntax
+    errors inside a body are raised then, with their position in `code`.
+    """
+    lexer = Lexer(code)
+    functions = []
+    start = 0
+    depth = 0
+    for m in _BRACES_RE.finditer(code):
+        brace = m.group()
+        if brace == '{':
+            if depth == 0:
+                body_start = m.start()
+            depth += 1
+        elif brace == '}':
+            depth -= 1
+            if depth < 0:
+                break
+            if depth == 0:
+                functions.append(_lazy_function(lexer, start, body_start, m.end()))
+                start = m.end()
+    if depth != 0 or code[start:].strip():
+        # sobra texto que não é uma função: o parse completo reporta o erro
+        return parse_code(code)
+    return Program(functions, [])
+
+def _lazy_function(lexer: Lexer, start: int, body_start: int, end: int) -> Function:
+    parser = Parser(lexer.tokenize(start, body_start), lexer.code)
+    try:
+        return_type, name, params = parser.parse_signature()
+        if parser.kinds[parser.pos] != 'EOF':
+            parser.error('{')
+    except ParseError:
+        raise parser.failure() from None
+    return lazy_function(return_type, name, params, lambda: _parse_body(lexer, body_start, end))
+
+def _parse_body(lexer: Lexer, start: int, end: int) -> Block:
+    tokens = lexer.tokenize(start, end)
+    parser = Parser(tokens, lexer.code)
+    try:
+        try:
+            return parser.parse_block()
+        except RecursionError:
+            parser = StackParser(tokens, lexer.code)
+            return parser.parse_block()
+    except ParseError:
+        raise parser.failure() from None
+
+def parse_code_with_spans(code: str) -> Tuple[Program, SourceMap]:
+    """Parse `code` and also return the source span of every AST node."""
+    program, parser = parse_tokens(Lexer(code).tokenize(), code, spans=True)
+    return program, parser.source_map(program)
+
+def parse_code_interned(code: str, interner: Optional[Interner] = None) -> Program:
+    """Parse `code` sharing one canonical instance per repeated Expr/Stmt subtree.
+
+    Pass the same `interner` to several calls to share nodes between them.
+    No spans here: a shared node has more than one position in the source.
+    """
+    if interner is None:
+        interner = Interner()
+    return parse_tokens(Lexer(code).tokenize(), code, interner=interner)[0]
+
+def parse_code_combinator(code: str, packrat: bool = False) -> Program:
+    """Reference implementation on top of the parsec combinators."""
+    if packrat:
+        return packrat_parse(parse_program, code)[0]
+    return parse_program.parse_strict(code)
\ No newline at end of file
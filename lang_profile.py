@@ -0,0 +1,198 @@
+import json
+import sys
+from dataclasses import asdict, dataclass
+from inspect import isgeneratorfunction
+from time import perf_counter
+from typing import Dict, List
+
+from parsec import Parser as ParsecParser
+import lang_parser
+from lang_parser import (Forward, Parser, ParseError, StackParser, parse_code,
+                         parse_code_combinator, rule_name)
+
+# O profiler troca, enquanto está ativo, a função interna de cada regra (o
+# `.fn` dos parsers do parsec, o `.parser` dos Forward, os métodos de Parser e
+# as regras-gerador do StackParser) por uma versão cronometrada, e repõe os
+# originais à saída. Desligado não há qualquer código extra no caminho do
+# parser.
+
+
+@dataclass
+class RuleStats:
+    calls: int = 0
+    ok: int = 0
+    failed: int = 0
+    cumulative: float = 0.0
+    self_time: float = 0.0
+
+
+class RuleProfiler:
+    """Per-rule counters for the combinator grammar and the recursive parser.
+
+    Use as a context manager around any parse; every `@generate` rule, the
+    `attempt`/`choice_parser` helpers reachable from them and every
+    `Parser.parse_*` method count calls, successes, failures and cumulative
+    and self time. So do the generator rules of StackParser, which
+    parse_code falls back to on deep nesting, as `StackParser._*`. A failure
+    is a backtrack when a caller tries another alternative (`Parser.rollback`
+    counts those in both parsers).
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, RuleStats] = {}
+        self._frames = []
+        self._active = {}
+        self._restore = []
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    # ------ INSTRUMENTAÇÃO ------
+
+    def enable(self):
+        if self._restore:
+            return
+        for name, rule in _combinator_rules():
+            if isinstance(rule, Forward):
+                self._patch(rule, 'parser', ParsecParser(self._timed(name, rule.parser, _status)))
+            else:
+                self._patch(rule, 'fn', self._timed(name, rule.fn, _status))
+        for name, method in vars(Parser).items():
+            if name.startswith('parse_') or name == 'rollback':
+                self._patch(Parser, name, self._timed_method(f'Parser.{name}', method))
+        for name, method in vars(StackParser).items():
+            if name.startswith('parse_'):
+                self._patch(StackParser, name, self._timed_method(f'StackParser.{name}', method))
+            elif isgeneratorfunction(method):
+                self._patch(StackParser, name, self._timed_rule(f'StackParser.{name}', method))
+        # as tabelas de palavras-chave guardam as funções originais
+        for cls, table in ((Parser, '_keyword_rules'), (StackParser, '_stack_rules')):
+            rules = getattr(cls, table)
+            self._patch(cls, table, {word: getattr(cls, method.__name__)
+                                     for word, method in rules.items()})
+
+    def disable(self):
+        while self._restore:
+            target, attr, value = self._restore.pop()
+            setattr(target, attr, value)
+
+    def _patch(self, target, attr, value):
+        self._restore.append((target, attr, getattr(target, attr)))
+        setattr(target, attr, value)
+
+    def _timed(self, name, fn, succeeded):
+        stats = self.stats.setdefault(name, RuleStats())
+
+        def timed(*args):
+            self._enter(name)
+            try:
+                result = fn(*args)
+            except BaseException:
+                self._leave(name, stats, False)
+                raise
+            self._leave(name, stats, succeeded(result))
+            return result
+        return timed
+
+    def _timed_method(self, name, method):
+        # um método falha levantando ParseError, não pelo valor devolvido
+        return self._timed(name, method, lambda result: True)
+
+    def _timed_rule(self, name, rule):
+        # as regras do StackParser são geradores que o run() corre por partes:
+        # o tempo conta da primeira retoma ao fim, com os filhos pelo meio
+        stats = self.stats.setdefault(name, RuleStats())
+
+        def timed(*args):
+            self._enter(name)
+            try:
+                result = yield from rule(*args)
+            except BaseException:
+                self._leave(name, stats, False)
+                raise
+            self._leave(name, stats, True)
+            return result
+        return timed
+
+    def _enter(self, name):
+        self._frames.append([perf_counter(), 0.0])
+        self._active[name] = self._active.get(name, 0) + 1
+
+    def _leave(self, name, stats, ok):
+        start, children = self._frames.pop()
+        elapsed = perf_counter() - start
+        stats.calls += 1
+        if ok:
+            stats.ok += 1
+        else:
+            stats.failed += 1
+        stats.self_time += elapsed - children
+        self._active[name] -= 1
+        if not self._active[name]:
+            # em regras recursivas só a ativação exterior conta para o tempo acumulado
+            stats.cumulative += elapsed
+        if self._frames:
+            self._frames[-1][1] += elapsed
+
+    # ------ RELATÓRIOS ------
+
+    def rows(self, sort: str = 'self_time') -> List[tuple]:
+        called = [(name, s) for name, s in self.stats.items() if s.calls]
+        return sorted(called, key=lambda item: getattr(item[1], sort), reverse=True)
+
+    def table(self, sort: str = 'self_time', limit: int = None) -> str:
+        lines = [f"{'rule':<40} {'calls':>9} {'ok':>9} {'failed':>9} {'cum (ms)':>10} {'self (ms)':>10}"]
+        for name, s in self.rows(sort)[:limit]:
+            if len(name) > 40:
+                name = name[:37] + '...'
+            lines.append(f"{name:<40} {s.calls:>9} {s.ok:>9} {s.failed:>9} "
+                         f"{s.cumulative * 1000:>10.2f} {s.self_time * 1000:>10.2f}")
+        return "\n".join(lines)
+
+    def to_json(self, sort: str = 'self_time') -> str:
+        return json.dumps({name: asdict(s) for name, s in self.rows(sort)}, indent=2)
+
+
+def _status(result) -> bool:
+    # attempt(...) devolve um ParseError em vez de Value quando a regra levanta
+    return bool(getattr(result, 'status', False))
+
+
+def _combinator_rules() -> List[tuple]:
+    """(name, rule) for the rules of lang_parser and the attempt/choice helpers under them."""
+    rules = []
+    pending = [(name, value) for name, value in vars(lang_parser).items()
+               if isinstance(value, ParsecParser)]
+    seen = set()
+    while pending:
+        name, rule = pending.pop()
+        if id(rule) in seen:
+            continue
+        seen.add(id(rule))
+        # regras @generate (parse_*), Forward e os parsers de memoize (attempt, choice, ident)
+        if name.startswith('parse_') or isinstance(rule, Forward) or hasattr(rule, 'kind'):
+            rules.append((name, rule))
+        inner = getattr(rule, 'inner', None) or ()
+        if isinstance(rule, Forward) and rule.parser is not None:
+            inner = (rule.parser,)
+        for child in inner:
+            pending.append((rule_name(child), child))
+    return rules
+
+
+if __name__ == "__main__":
+    # python lang_profile.py ficheiro.c [--json] [--combinator]
+    path = sys.argv[1]
+    with open(path) as f:
+        code = f.read()
+    parse = parse_code_combinator if '--combinator' in sys.argv else parse_code
+    with RuleProfiler() as profiler:
+        try:
+            parse(code)
+        except ParseError as e:
+            print(f"erro de sintaxe em {e.loc()}: {e.expected}", file=sys.stderr)
+    print(profiler.to_json() if '--json' in sys.argv else profiler.table())
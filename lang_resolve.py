@@ -0,0 +1,341 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from langAST import *
+
+# Endereçamento léxico: o Resolver reescreve cada Function trocando os
+# acessos a variáveis por nós com o endereço (profundidade, slot) da
+# declaração, calculado uma vez, e os Block/For pelo número de slots que
+# precisam. Os interpretadores de lang_evaluate e lang_instrumentation correm
+# a árvore resolvida com FrameScopes: o ambiente passa a ser uma lista
+# [frame_pai, slot1, slot2, ...] e ler uma variável é subir `depth` frames e
+# indexar, em vez de procurar o nome num dict em cada Environment da cadeia.
+#
+# Só cria frame um âmbito com declarações; um Block sem VarDecl corre no frame
+# de fora e não conta para a profundidade. As regras são as dos Environment:
+# uma chamada começa num frame sem pai e o main de evaluate corre no ambiente
+# das entradas (os nomes que lê sem declarar são slots desse frame, vazios se
+# a entrada faltar; com partial_calls o mesmo vale para os parâmetros, porque
+# o TraceInterpreter aceita chamadas com menos argumentos). Um VarDecl solto
+# como ramo de if/while só declara se for executado, o que não tem endereço
+# fixo: se está no main, resolve() devolve None e os interpretadores ficam
+# com os Environment; noutra função, só as chamadas a essa correm com eles.
+#
+# Cada função além do corpo de entrada do main é resolvida na primeira
+# leitura do corpo (a primeira chamada), como os corpos de parse_code_lazy:
+# uma função que nunca é chamada não é resolvida nem parseada.
+
+
+class _Undefined:
+    def __repr__(self):
+        return 'UNDEFINED'
+
+
+UNDEFINED = _Undefined()
+
+
+class Unsupported(Exception):
+    """Program the resolver cannot address statically."""
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class LocalVariable(Variable):
+    depth: int
+    slot: int
+
+@dataclass(frozen=True, slots=True, eq=False)
+class InputVariable(LocalVariable):
+    pass
+
+@dataclass(frozen=True, slots=True, eq=False)
+class UnboundVariable(Variable):
+    pass
+
+@dataclass(frozen=True, slots=True, eq=False)
+class LocalAssignment(Assignment):
+    depth: int
+    slot: int
+
+@dataclass(frozen=True, slots=True, eq=False)
+class InputAssignment(LocalAssignment):
+    pass
+
+@dataclass(frozen=True, slots=True, eq=False)
+class UnboundAssignment(Assignment):
+    pass
+
+@dataclass(frozen=True, slots=True, eq=False)
+class LocalIncrement(UnaryOp):
+    depth: int = 0
+    slot: int = 0
+
+@dataclass(frozen=True, slots=True, eq=False)
+class LocalDecl(VarDecl):
+    slot: int = 0
+
+@dataclass(frozen=True, slots=True, eq=False)
+class ScopedBlock(Block):
+    size: int
+
+@dataclass(frozen=True, slots=True, eq=False)
+class ScopedFor(For):
+    size: int
+
+
+class _Scope:
+    __slots__ = ('names', 'size', 'frame', 'unset')
+
+    def __init__(self, frame: bool):
+        self.names = {}           # nome -> slot
+        self.size = 0
+        self.frame = frame
+        self.unset = set()        # nomes cujo slot pode estar vazio até serem declarados
+
+
+class Resolver(Transformer):
+    """Rewrites one Function with lexical addresses.
+
+    In `entry` mode the body is resolved as evaluate runs main: the
+    parameters are not declared and names read without a declaration are
+    input slots of the outermost frame. With `partial_calls` a parameter
+    slot may be left empty by the caller, so its accesses are checked too.
+    """
+
+    prefix = 'resolve_'
+
+    def __init__(self, entry: bool = False, partial_calls: bool = False):
+        self.entry = entry
+        self.partial_calls = partial_calls
+        self.scopes: List[_Scope] = []
+        self.input_slots: Dict[str, int] = {}
+
+    def function(self, func: Function) -> Function:
+        return Function(func.return_type, func.name, self.signature(func), self.body(func))
+
+    def signature(self, func: Function) -> List[LocalDecl]:
+        """The parameters of `func` with their slots; body() must follow."""
+        root = _Scope(frame=True)
+        self.scopes = [root]
+        params = []
+        if not self.entry:
+            params = [LocalDecl(p.type, p.name, p.init, self.declare(p.name)) for p in func.params]
+            if self.partial_calls:
+                root.unset.update(p.name for p in params)
+        return params
+
+    def body(self, func: Function) -> ScopedBlock:
+        statements = [self.visit(stmt) for stmt in func.body.statements]
+        return ScopedBlock(statements, self.scopes[0].size)
+
+    # ------ ÂMBITOS ------
+
+    def push(self, statements):
+        # só um âmbito com declarações diretas precisa de frame
+        self.scopes.append(_Scope(frame=any(isinstance(s, VarDecl) for s in statements)))
+
+    def declare(self, name: str) -> int:
+        scope = self.scopes[-1]
+        scope.unset.discard(name)
+        if name not in scope.names:
+            scope.size += 1
+            scope.names[name] = scope.size
+        return scope.names[name]
+
+    def lookup(self, name: str):
+        """(depth, slot, is_input) of `name`, or None when nothing declares it."""
+        depth = 0
+        for scope in reversed(self.scopes):
+            if name in scope.names:
+                return depth, scope.names[name], name in scope.unset
+            if scope.frame:
+                depth += 1
+        if not self.entry:
+            return None
+        # o main lê uma entrada: fica com um slot no frame de fora, que uma
+        # declaração posterior no mesmo âmbito reaproveita (como no dict global)
+        root = self.scopes[0]
+        root.size += 1
+        root.names[name] = self.input_slots[name] = root.size
+        root.unset.add(name)
+        return depth - 1, root.size, True
+
+    def branch(self, stmt):
+        if isinstance(stmt, VarDecl):
+            raise Unsupported(f"declaração solta num ramo: {stmt.name}")
+        return self.visit(stmt)
+
+    # ------ NÓS ------
+
+    def resolve_Variable(self, expr):
+        address = self.lookup(expr.name)
+        if address is None:
+            return UnboundVariable(expr.name)
+        depth, slot, is_input = address
+        return (InputVariable if is_input else LocalVariable)(expr.name, depth, slot)
+
+    def resolve_Assignment(self, expr):
+        value = self.visit(expr.expr)
+        address = self.lookup(expr.var)
+        if address is None:
+            return UnboundAssignment(expr.var, value)
+        depth, slot, is_input = address
+        return (InputAssignment if is_input else LocalAssignment)(expr.var, value, depth, slot)
+
+    def resolve_UnaryOp(self, expr):
+        operand = self.visit(expr.expr)
+        if expr.op == '++' and isinstance(operand, LocalVariable):
+            return LocalIncrement(expr.op, operand, expr.prefix, operand.depth, operand.slot)
+        return expr if operand is expr.expr else UnaryOp(expr.op, operand, expr.prefix)
+
+    def resolve_VarDecl(self, stmt):
+        init = self.visit(stmt.init) if stmt.init else stmt.init
+        return LocalDecl(stmt.type, stmt.name, init, self.declare(stmt.name))
+
+    def resolve_Block(self, stmt):
+        self.push(stmt.statements)
+        statements = [self.visit(inner) for inner in stmt.statements]
+        scope = self.scopes.pop()
+        return ScopedBlock(statements, scope.size)
+
+    def resolve_If(self, stmt):
+        condition = self.visit(stmt.condition)
+        then_branch = self.branch(stmt.then_branch)
+        else_branch = self.branch(stmt.else_branch) if stmt.else_branch else stmt.else_branch
+        return If(condition, then_branch, else_branch)
+
+    def resolve_While(self, stmt):
+        return While(self.visit(stmt.condition), self.branch(stmt.body))
+
+    def resolve_For(self, stmt):
+        self.push([stmt.init])
+        init = self.visit(stmt.init) if stmt.init else stmt.init
+        condition = self.visit(stmt.condition)
+        increment = self.visit(stmt.increment) if stmt.increment else stmt.increment
+        body = self.branch(stmt.body)
+        scope = self.scopes.pop()
+        return ScopedFor(init, condition, increment, body, scope.size)
+
+
+class Resolution:
+    """A resolved program: its functions plus main's body as evaluate runs it."""
+
+    def __init__(self, program: Program, entry: Optional[Block], inputs: Dict[str, int]):
+        self.program = program
+        self.entry = entry
+        self.inputs = inputs          # nome da entrada -> slot no frame do main
+
+    def entry_frame(self, inputs: list[tuple[str, int]]) -> list:
+        frame = [None] + [UNDEFINED] * self.entry.size
+        for name, value in inputs:
+            slot = self.inputs.get(name)
+            if slot is not None:
+                frame[slot] = value
+        return frame
+
+
+def resolve(ast: Program, partial_calls: bool = False) -> Optional[Resolution]:
+    """Lexically addressed copy of `ast`, or None if main needs dynamic scoping.
+
+    Only main's entry body is resolved here; every function is resolved on
+    the first read of its body. One that needs dynamic scoping keeps its
+    original body, and FrameScopes runs its calls with Environments.
+    """
+    main_func = ast.function('main')
+    entry, inputs = None, {}
+    if main_func:
+        resolver = Resolver(entry=True)
+        try:
+            entry = resolver.function(main_func).body
+        except Unsupported:
+            return None
+        inputs = resolver.input_slots
+    functions = [_resolved_on_call(func, partial_calls) for func in ast.functions]
+    return Resolution(Program(functions, ast.global_vars), entry, inputs)
+
+
+def _resolved_on_call(func: Function, partial_calls: bool) -> Function:
+    resolver = Resolver(partial_calls=partial_calls)
+
+    def load_body():
+        try:
+            return resolver.body(func)
+        except Unsupported:
+            return func.body
+
+    return lazy_function(func.return_type, func.name, resolver.signature(func), load_body)
+
+
+class FrameScopes:
+    """Scope handling over a resolved program, for Interpreter-like visitors.
+
+    Mixed in before the interpreter class: `self.env` is then a frame list,
+    and scope/declare/call_scope replace the interpreter's Environment ones.
+    A call to a function resolve() left unresolved gets an Environment, and
+    the interpreter's own scopes are used until it returns.
+    """
+
+    def scope(self, node):
+        if self.env.__class__ is not list:
+            return super().scope(node)
+        return [self.env] + [UNDEFINED] * node.size if node.size else self.env
+
+    def declare(self, stmt, value):
+        if self.env.__class__ is not list:
+            return super().declare(stmt, value)
+        self.env[stmt.slot] = value
+
+    def call_scope(self, func, args):
+        body = func.body
+        if body.__class__ is not ScopedBlock:
+            return super().call_scope(func, args)
+        frame = [None] + [UNDEFINED] * body.size
+        for param, value in zip(func.params, args):
+            frame[param.slot] = value
+        return frame
+
+    def frame(self, depth: int) -> list:
+        frame = self.env
+        for _ in range(depth):
+            frame = frame[0]
+        return frame
+
+    def visit_LocalVariable(self, expr):
+        if expr.depth:
+            return self.frame(expr.depth)[expr.slot]
+        return self.env[expr.slot]
+
+    def visit_InputVariable(self, expr):
+        value = self.frame(expr.depth)[expr.slot]
+        if value is UNDEFINED:
+            raise Exception(f"Variável '{expr.name}' não definida.")
+        return value
+
+    def visit_UnboundVariable(self, expr):
+        raise Exception(f"Variável '{expr.name}' não definida.")
+
+    def visit_LocalAssignment(self, expr):
+        value = self.visit(expr.expr)
+        if expr.depth:
+            self.frame(expr.depth)[expr.slot] = value
+        else:
+            self.env[expr.slot] = value
+        return value
+
+    def visit_InputAssignment(self, expr):
+        value = self.visit(expr.expr)
+        frame = self.frame(expr.depth)
+        if frame[expr.slot] is UNDEFINED:
+            raise Exception(f"Variável '{expr.var}' não definida para atribuição.")
+        frame[expr.slot] = value
+        return value
+
+    def visit_UnboundAssignment(self, expr):
+        self.visit(expr.expr)
+        raise Exception(f"Variável '{expr.var}' não definida para atribuição.")
+
+    def visit_LocalIncrement(self, expr):
+        # lê pelo operando, que valida as entradas em falta, como no ++ original
+        current = self.visit(expr.expr)
+        updated = current + 1
+        self.frame(expr.depth)[expr.slot] = updated
+        return updated if expr.prefix else current
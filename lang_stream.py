@@ -0,0 +1,88 @@
+import mmap
+import os
+import re
+from typing import Iterator
+
+from langAST import Function
+from lang_parser import Lexer, ParseError, parse_tokens
+
+# Igual a lang_incremental._BRACES_RE, mas sobre bytes para correr diretamente
+# no mmap. Em UTF-8 os bytes de '"', '{' e '}' nunca aparecem dentro de outros
+# caracteres, por isso não é preciso descodificar o ficheiro.
+_BRACES_RE = re.compile(rb'"[^"]*"|[{}]')
+
+
+def iter_functions(path: str) -> Iterator[Function]:
+    """Yield the top-level functions of the file at `path` one at a time.
+
+    The file is memory-mapped and only the text of the function being parsed
+    is decoded, so memory stays bounded by the largest function rather than
+    the file. Syntax errors are raised when the offending function is reached,
+    as a StreamParseError with the offset and line/column in the whole file.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stream = _ChunkParser()
+            depth = 0
+            start = 0
+            for m in _BRACES_RE.finditer(mm):
+                brace = m.group()
+                if brace == b'{':
+                    depth += 1
+                elif brace == b'}':
+                    depth -= 1
+                    if depth == 0:
+                        yield from stream.parse(mm[start:m.end()].decode('utf-8'))
+                        start = m.end()
+                    elif depth < 0:
+                        break
+            # resto do ficheiro: só espaços, ou um erro a reportar
+            yield from stream.parse(mm[start:].decode('utf-8'))
+
+
+class StreamParseError(ParseError):
+    """ParseError in a file that iter_functions never holds in memory.
+
+    `index` is the offset of the error in the whole file (in characters, as
+    for parse_code) and loc() its line/column there, but `text` is only the
+    chunk being parsed, which starts at offset `chunk_start` of the file.
+    """
+
+    def __init__(self, expected, text, index, chunk_start, line, column):
+        super().__init__(expected, text, index)
+        self.chunk_start = chunk_start
+        self.line = line
+        self.column = column
+
+    def loc(self):
+        return f'{self.line}:{self.column}'
+
+
+class _ChunkParser:
+    """Parses consecutive chunks of a file, keeping track of where each starts."""
+
+    def __init__(self):
+        self.offset = 0
+        self.line = 0
+        self.column = 0
+
+    def parse(self, chunk: str) -> Iterator[Function]:
+        try:
+            functions = parse_tokens(Lexer(chunk).tokenize(), chunk)[0].functions
+        except ParseError as e:
+            # posição absoluta a partir da do início do bloco, sem reler o ficheiro
+            line, column = ParseError.loc_info(chunk, e.index)
+            if line == 0:
+                column += self.column
+            raise StreamParseError(e.expected, chunk, self.offset + e.index, self.offset,
+                                   self.line + line, column) from None
+        self.offset += len(chunk)
+        newline = chunk.rfind('\n')
+        if newline >= 0:
+            self.line += chunk.count('\n')
+            self.column = len(chunk) - newline - 1
+        else:
+            self.column += len(chunk)
+        yield from functions
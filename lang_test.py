@@ -1,13 +1,13 @@
 from typing import Tuple, Dict, List
 
-from lang_parser import parse_code
+from lang_cache import cached_parse_code
 from lang_evaluate import evaluate
 from testcases import programa1, programa2, programa3, programa4
 
 # Função para executar um teste unitário:
 def runTest(codigo: str, testCase: Tuple[Dict[str, int], int]) -> Tuple[bool, str]:
     inputs, expected = testCase
-    ast = parse_code(codigo)
+    ast = cached_parse_code(codigo)
     # Converter dict para lista de tuplas (nome, valor)
     inputs_tuples = list(inputs.items())
     resultado = evaluate(ast, inputs_tuples)
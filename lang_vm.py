@@ -0,0 +1,524 @@
+import operator
+from typing import Dict, List, Optional
+
+from langAST import *
+from lang_parser import parse_code
+from testcases import programa1, programa2, programa3, programa4
+
+# Bytecode de pilha para a linguagem.
+#
+# Cada Function é compilada para um Code: uma lista de instruções (opcode,
+# argumento), uma tabela de constantes e um número fixo de slots locais. Os
+# saltos levam o offset (índice na lista) da instrução de destino.
+#
+# As variáveis são resolvidas na compilação, mas com a semântica dos
+# Environment de lang_evaluate: cada Block e For é um âmbito, uma chamada
+# começa num âmbito novo e o main corre no ambiente global das entradas.
+# Um nome declarado antes (em linha reta) no âmbito é um slot certo
+# (LOAD_FAST). Um VarDecl solto como ramo de if/while só declara se for
+# executado: o seu slot começa UNDEFINED e o acesso percorre os candidatos
+# do âmbito interior para o exterior (LOAD_SCOPED), tal como o Environment.
+# No main, o que não for local é uma entrada (LOAD_GLOBAL).
+
+(LOAD_CONST, LOAD_FAST, STORE_FAST, LOAD_GLOBAL, STORE_GLOBAL, LOAD_SCOPED,
+ STORE_SCOPED, CLEAR_FAST, BINARY_OP, UNARY_OP, POP_JUMP_IF_FALSE, JUMP,
+ CALL, RETURN, PRINT, POP_TOP, DUP_TOP, RAISE) = range(18)
+
+OPNAMES = [
+    'LOAD_CONST', 'LOAD_FAST', 'STORE_FAST', 'LOAD_GLOBAL', 'STORE_GLOBAL', 'LOAD_SCOPED',
+    'STORE_SCOPED', 'CLEAR_FAST', 'BINARY_OP', 'UNARY_OP', 'POP_JUMP_IF_FALSE', 'JUMP',
+    'CALL', 'RETURN', 'PRINT', 'POP_TOP', 'DUP_TOP', 'RAISE',
+]
+
+BINARY_OPS = ['+', '-', '*', '/', '%', '==', '!=', '<', '>', '<=', '>=', '&&', '||']
+BINARY_FUNCS = [
+    operator.add, operator.sub, operator.mul,
+    lambda left, right: left // right if isinstance(left, int) else left / right,
+    operator.mod, operator.eq, operator.ne, operator.lt, operator.gt, operator.le, operator.ge,
+    lambda left, right: bool(left) and bool(right),
+    lambda left, right: bool(left) or bool(right),
+]
+
+UNARY_OPS = ['-', '!']
+UNARY_FUNCS = [operator.neg, operator.not_]
+
+# As chamadas empilham frames numa lista, não na pilha do Python: sem limite,
+# uma recursão infinita só parava num MemoryError. Acima disto levanta-se
+# RecursionError, o erro do interpretador, que lang_mutate.testar_mutacoes
+# trata como recursão infinita.
+MAX_CALL_DEPTH = 100_000
+
+
+class _Undefined:
+    def __repr__(self):
+        return 'UNDEFINED'
+
+
+UNDEFINED = _Undefined()
+
+
+class Code:
+    """Bytecode of one function: `code` is a list of (opcode, argument) tuples."""
+
+    __slots__ = ('name', 'params', 'nlocals', 'varnames', 'consts', 'code')
+
+    def __init__(self, name: str, params: tuple, varnames: list, consts: list, code: list):
+        self.name = name
+        self.params = params          # slot de cada parâmetro, pela ordem
+        self.nlocals = len(varnames)
+        self.varnames = varnames      # nome de cada slot, para o disassembler
+        self.consts = consts
+        self.code = code
+
+
+class BytecodeProgram:
+    """Result of compile_program: the entry code of main plus the functions' Code.
+
+    A function is compiled on its first CALL (or code(i)); until then its
+    slot in `codes` is None, so a body that never runs is not compiled.
+    """
+
+    def __init__(self, index: '_FunctionIndex', entry: Optional[Code]):
+        self.index = index
+        self.codes: List[Optional[Code]] = [None] * len(index.functions)
+        self.entry = entry
+
+    def code(self, i: int) -> Code:
+        code = self.codes[i]
+        if code is None:
+            code = self.codes[i] = FunctionCompiler(self.index.functions[i], self.index).compile()
+        return code
+
+    def evaluate(self, inputs: list[tuple[str, int]]) -> int:
+        if self.entry is None:
+            raise Exception("Função main não encontrada.")
+        return execute(self, self.entry, dict(inputs))
+
+
+def _bare_declarations(stmt) -> List[str]:
+    """Names that running `stmt` may declare in the current scope (VarDecl as a branch)."""
+    if isinstance(stmt, VarDecl):
+        return [stmt.name]
+    if isinstance(stmt, If):
+        names = _bare_declarations(stmt.then_branch)
+        return names + _bare_declarations(stmt.else_branch) if stmt.else_branch else names
+    if isinstance(stmt, While):
+        return _bare_declarations(stmt.body)
+    return []
+
+
+class FunctionCompiler(Visitor):
+    """Compiles one Function to a Code.
+
+    In `entry` mode the body is compiled as evaluate runs main: the
+    parameters are not declared and free names are read from the inputs.
+    """
+
+    prefix = 'emit_'
+
+    def __init__(self, function: Function, index: Dict[str, int], entry: bool = False):
+        self.function = function
+        self.index = index
+        self.entry = entry
+        self.code = []
+        self.consts = []
+        self._const_index = {}
+        self.varnames = []
+        self.scopes = []          # nome -> [slot, certo]
+
+    def compile(self) -> Code:
+        self.scopes.append({})
+        params = ()
+        if not self.entry:
+            params = tuple(self.declare(param.name) for param in self.function.params)
+        for stmt in self.function.body.statements:
+            self.visit(stmt)
+        # sem return: uma chamada devolve 0 e o evaluate devolve -1
+        self.emit(LOAD_CONST, self.const(-1 if self.entry else 0))
+        self.emit(RETURN)
+        self.scopes.pop()
+        return Code(self.function.name, params, self.varnames, self.consts, self.code)
+
+    # ------ AUXILIARES ------
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        self.code.append((op, arg))
+        return len(self.code) - 1
+
+    def patch(self, at: int, target: int = None):
+        self.code[at] = (self.code[at][0], len(self.code) if target is None else target)
+
+    def const(self, value) -> int:
+        # 1 e True (ou 1 e 1.0) são constantes diferentes
+        key = (value.__class__, value)
+        if key not in self._const_index:
+            self._const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self._const_index[key]
+
+    def declare(self, name: str, certain: bool = True) -> int:
+        scope = self.scopes[-1]
+        entry = scope.get(name)
+        if entry is None:
+            entry = scope[name] = [len(self.varnames), certain]
+            self.varnames.append(name)
+            if not certain:
+                self.emit(CLEAR_FAST, entry[0])
+        elif certain:
+            entry[1] = True
+        return entry[0]
+
+    def resolve(self, name: str) -> tuple:
+        slots = []
+        for scope in reversed(self.scopes):
+            entry = scope.get(name)
+            if entry is not None:
+                slots.append(entry[0])
+                if entry[1]:
+                    return tuple(slots), True
+        return tuple(slots), False
+
+    def load(self, name: str):
+        slots, found = self.resolve(name)
+        if found and len(slots) == 1:
+            self.emit(LOAD_FAST, slots[0])
+        elif not slots and self.entry:
+            self.emit(LOAD_GLOBAL, self.const(name))
+        else:
+            self.emit(LOAD_SCOPED, self.const((slots, self.entry and not found, name)))
+
+    def store(self, name: str):
+        slots, found = self.resolve(name)
+        if found and len(slots) == 1:
+            self.emit(STORE_FAST, slots[0])
+        elif not slots and self.entry:
+            self.emit(STORE_GLOBAL, self.const(name))
+        else:
+            self.emit(STORE_SCOPED, self.const((slots, self.entry and not found, name)))
+
+    def declare_bare(self, stmt):
+        for name in _bare_declarations(stmt):
+            self.declare(name, certain=False)
+
+    def branch(self, stmt):
+        if isinstance(stmt, VarDecl):
+            self.emit_init(stmt)
+            self.store_declared(stmt.name)
+        else:
+            self.visit(stmt)
+
+    def store_declared(self, name: str):
+        self.emit(STORE_FAST, self.scopes[-1][name][0])
+
+    def discard(self, expr):
+        """Compile `expr` as a statement, leaving nothing on the stack."""
+        if isinstance(expr, Assignment):
+            self.visit(expr.expr)
+            self.store(expr.var)
+        elif isinstance(expr, UnaryOp) and expr.op == '++' and isinstance(expr.expr, Variable):
+            self.load(expr.expr.name)
+            self.emit(LOAD_CONST, self.const(1))
+            self.emit(BINARY_OP, 0)
+            self.store(expr.expr.name)
+        else:
+            self.visit(expr)
+            self.emit(POP_TOP)
+
+    # ------ EXPRESSÕES ------
+
+    def emit_Literal(self, expr):
+        self.emit(LOAD_CONST, self.const(expr.value))
+
+    def emit_Variable(self, expr):
+        self.load(expr.name)
+
+    def emit_Assignment(self, expr):
+        self.visit(expr.expr)
+        self.emit(DUP_TOP)
+        self.store(expr.var)
+
+    def emit_BinaryOp(self, expr):
+        self.visit(expr.left)
+        self.visit(expr.right)
+        if expr.op in BINARY_OPS:
+            self.emit(BINARY_OP, BINARY_OPS.index(expr.op))
+        else:
+            self.emit(RAISE, self.const(f"Operador binário inválido: {expr.op}"))
+
+    def emit_UnaryOp(self, expr):
+        self.visit(expr.expr)
+        if expr.op == '++':
+            if not isinstance(expr.expr, Variable):
+                self.emit(RAISE, self.const("++ só pode ser aplicado a variáveis."))
+                return
+            # o valor já está na pilha: é o resultado do i++
+            if expr.prefix:
+                self.emit(LOAD_CONST, self.const(1))
+                self.emit(BINARY_OP, 0)
+                self.emit(DUP_TOP)
+            else:
+                self.emit(DUP_TOP)
+                self.emit(LOAD_CONST, self.const(1))
+                self.emit(BINARY_OP, 0)
+            self.store(expr.expr.name)
+        elif expr.op in UNARY_OPS:
+            self.emit(UNARY_OP, UNARY_OPS.index(expr.op))
+        else:
+            self.emit(RAISE, self.const(f"Operador unário inválido: {expr.op}"))
+
+    def emit_FunctionCall(self, expr):
+        target = self.index.get(expr.name)
+        if target is None:
+            self.emit(RAISE, self.const(f"Função '{expr.name}' não definida."))
+            return
+        if len(self.index.functions[target].params) != len(expr.args):
+            self.emit(RAISE, self.const("Número incorreto de argumentos."))
+            return
+        for arg in expr.args:
+            self.visit(arg)
+        self.emit(CALL, target)
+
+    # ------ INSTRUÇÕES ------
+
+    def emit_init(self, stmt):
+        if stmt.init:
+            self.visit(stmt.init)
+        else:
+            self.emit(LOAD_CONST, self.const(0))
+
+    def emit_VarDecl(self, stmt):
+        self.emit_init(stmt)
+        self.emit(STORE_FAST, self.declare(stmt.name))
+
+    def emit_ExprStmt(self, stmt):
+        self.discard(stmt.expr)
+
+    def emit_Print(self, stmt):
+        self.visit(stmt.expr)
+        self.emit(PRINT)
+
+    def emit_Return(self, stmt):
+        if stmt.value:
+            self.visit(stmt.value)
+        else:
+            self.emit(LOAD_CONST, self.const(0))
+        self.emit(RETURN)
+
+    def emit_Block(self, stmt):
+        self.scopes.append({})
+        for inner in stmt.statements:
+            self.visit(inner)
+        self.scopes.pop()
+
+    def emit_If(self, stmt):
+        self.declare_bare(stmt)
+        self.visit(stmt.condition)
+        to_else = self.emit(POP_JUMP_IF_FALSE)
+        self.branch(stmt.then_branch)
+        if stmt.else_branch:
+            to_end = self.emit(JUMP)
+            self.patch(to_else)
+            self.branch(stmt.else_branch)
+            self.patch(to_end)
+        else:
+            self.patch(to_else)
+
+    def emit_While(self, stmt):
+        self.declare_bare(stmt)
+        top = len(self.code)
+        self.visit(stmt.condition)
+        to_end = self.emit(POP_JUMP_IF_FALSE)
+        self.branch(stmt.body)
+        self.emit(JUMP, top)
+        self.patch(to_end)
+
+    def emit_For(self, stmt):
+        self.scopes.append({})
+        if isinstance(stmt.init, (VarDecl, ExprStmt)):
+            self.visit(stmt.init)
+        self.declare_bare(stmt.body)
+        top = len(self.code)
+        self.visit(stmt.condition)
+        to_end = self.emit(POP_JUMP_IF_FALSE)
+        self.branch(stmt.body)
+        if stmt.increment:
+            self.discard(stmt.increment)
+        self.emit(JUMP, top)
+        self.patch(to_end)
+        self.scopes.pop()
+
+    def generic_visit(self, node):
+        if isinstance(node, Expr):
+            raise Exception(f"Expressão desconhecida: {node}")
+        raise Exception(f"Instrução desconhecida: {node}")
+
+
+class _FunctionIndex(dict):
+    """Name -> position in `functions` of the function program.function(name) returns."""
+
+    def __init__(self, program: Program):
+        self.functions = []
+        for func in program.functions:
+            if func.name not in self:
+                self[func.name] = len(self.functions)
+                self.functions.append(program.function(func.name))
+
+
+def compile_program(ast: Program) -> BytecodeProgram:
+    index = _FunctionIndex(ast)
+    main_func = ast.function('main')
+    entry = FunctionCompiler(main_func, index, entry=True).compile() if main_func else None
+    return BytecodeProgram(index, entry)
+
+
+def execute(program: BytecodeProgram, entry: Code, inputs: dict):
+    """Run `entry` until its RETURN; calls push frames instead of recursing."""
+    codes = program.codes
+    code, consts = entry.code, entry.consts
+    slots = [UNDEFINED] * entry.nlocals
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    frames = []
+    binary = BINARY_FUNCS
+    pc = 0
+    while True:
+        op, arg = code[pc]
+        pc += 1
+        # os opcodes mais frequentes primeiro
+        if op == LOAD_FAST:
+            push(slots[arg])
+        elif op == LOAD_CONST:
+            push(consts[arg])
+        elif op == BINARY_OP:
+            right = pop()
+            stack[-1] = binary[arg](stack[-1], right)
+        elif op == STORE_FAST:
+            slots[arg] = pop()
+        elif op == POP_JUMP_IF_FALSE:
+            if not pop():
+                pc = arg
+        elif op == JUMP:
+            pc = arg
+        elif op == LOAD_GLOBAL:
+            name = consts[arg]
+            if name not in inputs:
+                raise Exception(f"Variável '{name}' não definida.")
+            push(inputs[name])
+        elif op == CALL:
+            callee = codes[arg]
+            if callee is None:
+                callee = program.code(arg)
+            if len(frames) >= MAX_CALL_DEPTH:
+                raise RecursionError("profundidade máxima de chamadas excedida")
+            frames.append((code, consts, slots, pc))
+            code, consts = callee.code, callee.consts
+            slots = [UNDEFINED] * callee.nlocals
+            if callee.params:
+                args = stack[-len(callee.params):]
+                del stack[-len(callee.params):]
+                for slot, value in zip(callee.params, args):
+                    slots[slot] = value
+            pc = 0
+        elif op == RETURN:
+            if not frames:
+                return pop()
+            # o valor devolvido fica no topo da pilha, para quem chamou
+            code, consts, slots, pc = frames.pop()
+        elif op == DUP_TOP:
+            push(stack[-1])
+        elif op == POP_TOP:
+            pop()
+        elif op == PRINT:
+            print(pop())
+        elif op == UNARY_OP:
+            stack[-1] = UNARY_FUNCS[arg](stack[-1])
+        elif op == STORE_GLOBAL:
+            name = consts[arg]
+            if name not in inputs:
+                raise Exception(f"Variável '{name}' não definida para atribuição.")
+            inputs[name] = pop()
+        elif op == LOAD_SCOPED:
+            candidates, in_globals, name = consts[arg]
+            for slot in candidates:
+                if slots[slot] is not UNDEFINED:
+                    push(slots[slot])
+                    break
+            else:
+                if not (in_globals and name in inputs):
+                    raise Exception(f"Variável '{name}' não definida.")
+                push(inputs[name])
+        elif op == STORE_SCOPED:
+            candidates, in_globals, name = consts[arg]
+            for slot in candidates:
+                if slots[slot] is not UNDEFINED:
+                    slots[slot] = pop()
+                    break
+            else:
+                if not (in_globals and name in inputs):
+                    raise Exception(f"Variável '{name}' não definida para atribuição.")
+                inputs[name] = pop()
+        elif op == CLEAR_FAST:
+            slots[arg] = UNDEFINED
+        elif op == RAISE:
+            raise Exception(consts[arg])
+        else:
+            raise Exception(f"Opcode inválido: {op}")
+
+
+def evaluate(ast: Program, inputs: list[tuple[str, int]]) -> int:
+    """Same contract as lang_evaluate.evaluate, through the bytecode VM."""
+    return compile_program(ast).evaluate(inputs)
+
+
+# ------ DISASSEMBLER ------
+
+def _describe(code: Code, program: Optional[BytecodeProgram], op: int, arg: int) -> str:
+    if op in (LOAD_FAST, STORE_FAST, CLEAR_FAST):
+        return code.varnames[arg]
+    if op in (LOAD_CONST, LOAD_GLOBAL, STORE_GLOBAL, RAISE):
+        return repr(code.consts[arg])
+    if op in (LOAD_SCOPED, STORE_SCOPED):
+        candidates, in_globals, name = code.consts[arg]
+        where = [f"{code.varnames[slot]}@{slot}" for slot in candidates]
+        return ', '.join(where + (['global'] if in_globals else [])) or f"{name}: não definida"
+    if op == BINARY_OP:
+        return BINARY_OPS[arg]
+    if op == UNARY_OP:
+        return UNARY_OPS[arg]
+    if op == CALL and program is not None:
+        return program.index.functions[arg].name
+    return ''
+
+
+def disassemble(target, program: Optional[BytecodeProgram] = None) -> str:
+    """Readable listing of a Code, or of every function of a BytecodeProgram."""
+    if isinstance(target, BytecodeProgram):
+        parts = [disassemble(target.code(i), target) for i in range(len(target.codes))]
+        if target.entry is not None:
+            parts.append(disassemble(target.entry, target))
+        return '\n\n'.join(parts)
+    code = target
+    params = ', '.join(code.varnames[slot] for slot in code.params)
+    entry = ' (entrada)' if program is not None and code is program.entry else ''
+    lines = [f"{code.name}({params}){entry}: {code.nlocals} slots, {len(code.consts)} constantes"]
+    for pc, (op, arg) in enumerate(code.code):
+        detail = _describe(code, program, op, arg)
+        lines.append(f"{pc:>6} {OPNAMES[op]:<18} {arg:>4}" + (f"  ({detail})" if detail else ''))
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    programas = [
+        ("programa1", programa1, [("num", 10)]),
+        ("programa2", programa2, [("n", 5)]),
+        ("programa3", programa3, [("number", 4)]),
+        ("programa4", programa4, [("x", 10), ("y", 5), ("z", 0)]),
+    ]
+
+    for nome, codigo, inputs in programas:
+        program = compile_program(parse_code(codigo))
+        print(disassemble(program))
+        print(f"\nExecutando {nome} com inputs {inputs}...")
+        resultado = program.evaluate(inputs)
+        print(f"Resultado do {nome}: {resultado}\n")
@@ -1,5 +1,5 @@
 from langAST import *
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 import operator
 
 _ARITH_OPS = {
@@ -21,73 +21,36 @@ _COMP_OPS = {
 
 #### OPTIMIZATION
 
-def opt(ast: Program) -> Program:
-    # globals
-    new_globals = []
-    for gv in ast.global_vars:
-        init = optimize_expr(gv.init) if gv.init is not None else None
-        new_globals.append(VarDecl(gv.type, gv.name, init))
-    # functions
-    new_funcs = []
-    for fn in ast.functions:
-        body = optimize_block(fn.body)
-        new_funcs.append(Function(fn.return_type, fn.name, fn.params, body))
-    return Program(functions=new_funcs, global_vars=new_globals)
+# Com um Interner, as funções de topo (opt, refactor, opt_refact) correm o
+# Transformer com ele: cada nó que constroem já sai canónico, com os nós
+# repetidos partilhados (ver langAST.Interner).
 
+def opt(ast: Program, interner: Optional[Interner] = None) -> Program:
+    optimizer = _OPTIMIZER if interner is None else Optimizer(interner)
+    return optimizer.visit(ast)
 
-def optimize_block(block: Block) -> Block:
-    new_stmts: List[Stmt] = []
-    for stmt in block.statements:
-        if isinstance(stmt, VarDecl):
-            init = optimize_expr(stmt.init) if stmt.init else None
-            new_stmts.append(VarDecl(stmt.type, stmt.name, init))
-        elif isinstance(stmt, ExprStmt):
-            new_stmts.append(ExprStmt(optimize_expr(stmt.expr)))
-        elif isinstance(stmt, Print):
-            new_stmts.append(Print(optimize_expr(stmt.expr)))
-        elif isinstance(stmt, Return):
-            val = optimize_expr(stmt.value) if stmt.value else None
-            new_stmts.append(Return(val))
-        elif isinstance(stmt, If):
-            cond = optimize_expr(stmt.condition)
-            then_b = optimize_block(_wrap_block(stmt.then_branch))
-            else_b = optimize_block(_wrap_block(stmt.else_branch)) if stmt.else_branch else None
-            new_stmts.append(If(cond, then_b, else_b))
-        elif isinstance(stmt, While):
-            cond = optimize_expr(stmt.condition)
-            body = optimize_block(_wrap_block(stmt.body))
-            new_stmts.append(While(cond, body))
-        elif isinstance(stmt, For):
-            init = stmt.init
-            if isinstance(init, ExprStmt): 
-                init = ExprStmt(optimize_expr(init.expr))
-            elif isinstance(init, VarDecl) and init.init is not None:
-                init = VarDecl(init.type, init.name, optimize_expr(init.init))
-            cond = optimize_expr(stmt.condition)
-            inc = optimize_expr(stmt.increment) if stmt.increment else None
-            body = optimize_block(_wrap_block(stmt.body))
-            new_stmts.append(For(init, cond, inc, body))
-        elif isinstance(stmt, Block):
-            new_stmts.append(optimize_block(stmt))
-        else:
-            new_stmts.append(stmt)
-    return Block(new_stmts)
 
+class Optimizer(Transformer):
+    """Constant folding and algebraic simplification; branch and loop bodies become Blocks."""
 
-def optimize_expr(expr: Expr) -> Expr:
-    if expr is None:
-        return None
-    if isinstance(expr, (Literal, Variable)):
-        return expr
-    if isinstance(expr, FunctionCall):
-        return FunctionCall(expr.name, [optimize_expr(a) for a in expr.args])
-    if isinstance(expr, UnaryOp):
-        return UnaryOp(expr.op, optimize_expr(expr.expr), expr.prefix)
-    if isinstance(expr, Assignment):
-        return Assignment(expr.var, optimize_expr(expr.expr))
-    if isinstance(expr, BinaryOp):
-        left = optimize_expr(expr.left)
-        right = optimize_expr(expr.right)
+    def visit_If(self, stmt: If) -> If:
+        cond = self.visit(stmt.condition)
+        then_b = self.visit(_wrap_block(stmt.then_branch))
+        else_b = self.visit(_wrap_block(stmt.else_branch)) if stmt.else_branch else None
+        return If(cond, then_b, else_b)
+
+    def visit_While(self, stmt: While) -> While:
+        return While(self.visit(stmt.condition), self.visit(_wrap_block(stmt.body)))
+
+    def visit_For(self, stmt: For) -> For:
+        init = self.visit(stmt.init) if stmt.init else None
+        cond = self.visit(stmt.condition)
+        inc = self.visit(stmt.increment) if stmt.increment else None
+        return For(init, cond, inc, self.visit(_wrap_block(stmt.body)))
+
+    def visit_BinaryOp(self, expr: BinaryOp) -> Expr:
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
         
         # constant folding for arithmetic
         if isinstance(left, Literal) and isinstance(right, Literal):
@@ -134,8 +97,20 @@ def optimize_expr(expr: Expr) -> Expr:
                 if r is False: return left
                 if r is True: return Literal(True)
         
+        if left is expr.left and right is expr.right:
+            return expr
         return BinaryOp(left, expr.op, right)
-    return expr
+
+
+_OPTIMIZER = Optimizer()
+
+
+def optimize_block(block: Block) -> Block:
+    return _OPTIMIZER.visit(block)
+
+
+def optimize_expr(expr: Expr) -> Expr:
+    return _OPTIMIZER.visit(expr) if expr is not None else None
 
 
 def _is_zero(expr: Expr) -> bool:
@@ -156,159 +131,170 @@ def _wrap_block(node):
 
 # #### Refactoring
 
-def refactor(ast: Program) -> Program:
-    new_globals = [_ref_vardecl(v) for v in ast.global_vars]
-    new_funcs   = [_ref_function(f) for f in ast.functions]
-    return Program(functions=new_funcs, global_vars=new_globals)
+def refactor(ast: Program, interner: Optional[Interner] = None) -> Program:
+    refactorer = _REFACTORER if interner is None else Refactorer(interner)
+    return refactorer.visit(ast)
 
 
-def _ref_function(fn: Function) -> Function:
-    return Function(fn.return_type, fn.name, fn.params, _ref_block(fn.body))
+class Refactorer(Transformer):
+    """Removes constant ifs and comparisons with boolean literals."""
 
+    def visit_Block(self, block: Block) -> Block:
+        new_stmts = []
+        for s in block.statements:
+            refactored = self.visit(s)
+            # Handle case where if statement is replaced by just its branch
+            if isinstance(refactored, Block):
+                new_stmts.extend(refactored.statements)
+            else:
+                new_stmts.append(refactored)
+        return Block(new_stmts)
 
-def _ref_vardecl(v: VarDecl) -> VarDecl:
-    init = _ref_expr(v.init) if v.init is not None else None
-    return VarDecl(v.type, v.name, init)
-
-
-def _ref_block(block: Block) -> Block:
-    new_stmts = []
-    for s in block.statements:
-        refactored = _ref_stmt(s)
-        # Handle case where if statement is replaced by just its branch
-        if isinstance(refactored, Block):
-            new_stmts.extend(refactored.statements)
-        else:
-            new_stmts.append(refactored)
-    return Block(new_stmts)
-
+    def _branch(self, stmt: Stmt) -> Stmt:
+        return self.visit(stmt) if isinstance(stmt, (If, While, For)) else _wrap_block(stmt)
 
-def _ref_stmt(stmt: Stmt) -> Stmt:
-    if isinstance(stmt, ExprStmt): 
-        return ExprStmt(_ref_expr(stmt.expr))
-    if isinstance(stmt, Print):    
-        return Print(_ref_expr(stmt.expr))
-    if isinstance(stmt, Return):   
-        return Return(_ref_expr(stmt.value) if stmt.value else None)
-    if isinstance(stmt, If):
-        cond = _ref_expr(stmt.condition)
+    def visit_If(self, stmt: If) -> Stmt:
+        cond = self.visit(stmt.condition)
         # if True then X else Y -> X
         if isinstance(cond, Literal) and cond.value is True:  
-            return _ref_stmt(stmt.then_branch) if isinstance(stmt.then_branch, (If, While, For)) else _wrap_block(stmt.then_branch)
+            return self._branch(stmt.then_branch)
         # if False then X else Y -> Y
         if isinstance(cond, Literal) and cond.value is False: 
             if stmt.else_branch:
-                return _ref_stmt(stmt.else_branch) if isinstance(stmt.else_branch, (If, While, For)) else _wrap_block(stmt.else_branch)
+                return self._branch(stmt.else_branch)
             else:
                 return Block([])  # Empty block for no else branch
         
-        then_branch = _ref_stmt(stmt.then_branch) if isinstance(stmt.then_branch, (If, While, For)) else _wrap_block(stmt.then_branch)
+        then_branch = self._branch(stmt.then_branch)
         else_branch = None
         if stmt.else_branch:
-            else_branch = _ref_stmt(stmt.else_branch) if isinstance(stmt.else_branch, (If, While, For)) else _wrap_block(stmt.else_branch)
+            else_branch = self._branch(stmt.else_branch)
         
         return If(cond, then_branch, else_branch)
-    if isinstance(stmt, While): 
-        return While(_ref_expr(stmt.condition), _ref_block(_wrap_block(stmt.body)))
-    if isinstance(stmt, For):
-        init = _ref_stmt(stmt.init) if stmt.init else None
-        cond = _ref_expr(stmt.condition)
-        inc  = _ref_expr(stmt.increment) if stmt.increment else None
-        body = _ref_block(_wrap_block(stmt.body))
-        return For(init, cond, inc, body)
-    if isinstance(stmt, VarDecl): 
-        return _ref_vardecl(stmt)
-    if isinstance(stmt, Block):
-        return _ref_block(stmt)
-    return stmt
-
-
-def _ref_expr(expr: Expr) -> Expr:
-    if expr is None:
-        return None
-    if isinstance(expr, Literal) or isinstance(expr, Variable): 
-        return expr
-    if isinstance(expr, Assignment): 
-        return Assignment(expr.var, _ref_expr(expr.expr))
-    if isinstance(expr, FunctionCall): 
-        return FunctionCall(expr.name, [_ref_expr(a) for a in expr.args])
-    if isinstance(expr, UnaryOp): 
-        return UnaryOp(expr.op, _ref_expr(expr.expr), expr.prefix)
-    if isinstance(expr, BinaryOp):
-        left = _ref_expr(expr.left)
-        right= _ref_expr(expr.right)
+
+    def visit_While(self, stmt: While) -> While:
+        return While(self.visit(stmt.condition), self.visit(_wrap_block(stmt.body)))
+
+    def visit_For(self, stmt: For) -> For:
+        init = self.visit(stmt.init) if stmt.init else None
+        cond = self.visit(stmt.condition)
+        inc  = self.visit(stmt.increment) if stmt.increment else None
+        return For(init, cond, inc, self.visit(_wrap_block(stmt.body)))
+
+    def visit_BinaryOp(self, expr: BinaryOp) -> Expr:
+        left = self.visit(expr.left)
+        right= self.visit(expr.right)
         # x==True -> x ; x==False -> !x
         if expr.op == '==' and isinstance(right, Literal) and isinstance(right.value, bool):
             return left if right.value else UnaryOp('!', left)
         if expr.op == '==' and isinstance(left, Literal) and isinstance(left.value, bool):
             return right if left.value else UnaryOp('!', right)
+        if left is expr.left and right is expr.right:
+            return expr
         return BinaryOp(left, expr.op, right)
-    return expr
+
+
+_REFACTORER = Refactorer()
 
 
 ## utils
 
+class _BodyVisitor(Visitor):
+    """Walks function, branch and loop bodies statement by statement.
+
+    Like the recursive helpers it replaced, it neither enters bare blocks
+    nested in a statement list nor looks into expressions.
+    """
+
+    def visit_Block(self, block: Block):
+        for s in block.statements:
+            if not isinstance(s, Block):
+                self.visit(s)
+
+    def visit_body(self, stmt: Stmt):
+        self.visit_Block(_wrap_block(stmt))
+
+    def visit_If(self, s: If):
+        self.visit_body(s.then_branch)
+        if s.else_branch: self.visit_body(s.else_branch)
+
+    def visit_While(self, s: While):
+        self.visit_body(s.body)
+
+    def visit_For(self, s: For):
+        self.visit_body(s.body)
+
+    def visit_Stmt(self, s: Stmt):
+        pass
+
+
 def names(ast: Program) -> List[str]:
     result = set(v.name for v in ast.global_vars)
+    collector = _NameCollector(result)
     for fn in ast.functions:
         result.add(fn.name)
         for p in fn.params: result.add(p.name)
-        _collect_names(fn.body, result)
+        collector.visit(fn.body)
     return sorted(result)
 
 
-def _collect_names(block: Block, acc: set):
-    for s in block.statements:
-        if isinstance(s, VarDecl): acc.add(s.name)
-        if isinstance(s, If):
-            _collect_names(_wrap_block(s.then_branch), acc)
-            if s.else_branch: _collect_names(_wrap_block(s.else_branch), acc)
-        if isinstance(s, While): _collect_names(_wrap_block(s.body), acc)
-        if isinstance(s, For):
-            if isinstance(s.init, VarDecl): acc.add(s.init.name)
-            _collect_names(_wrap_block(s.body), acc)
+class _NameCollector(_BodyVisitor):
+    def __init__(self, acc: set):
+        self.acc = acc
+
+    def visit_VarDecl(self, s: VarDecl):
+        self.acc.add(s.name)
+
+    def visit_For(self, s: For):
+        if isinstance(s.init, VarDecl): self.acc.add(s.init.name)
+        super().visit_For(s)
 
 
 def instructions(ast: Program) -> Dict[str,int]:
     counts: Dict[str,int] = {}
     for v in ast.global_vars: counts['VarDecl'] = counts.get('VarDecl',0)+1
+    counter = _StatementCounter(counts)
     for fn in ast.functions:
         counts['Function']=counts.get('Function',0)+1
-        _count_block(fn.body, counts)
+        counter.visit(fn.body)
     return counts
 
-def _count_block(block: Block, counts: Dict[str,int]):
-    for s in block.statements:
-        t = s.__class__.__name__
-        counts[t] = counts.get(t,0)+1
-        if isinstance(s, If):
-            _count_block(_wrap_block(s.then_branch), counts)
-            if s.else_branch: _count_block(_wrap_block(s.else_branch),counts)
-        if isinstance(s, While): _count_block(_wrap_block(s.body), counts)
-        if isinstance(s, For): _count_block(_wrap_block(s.body), counts)
+class _StatementCounter(_BodyVisitor):
+    def __init__(self, counts: Dict[str,int]):
+        self.counts = counts
+
+    def visit_Block(self, block: Block):
+        # os blocos soltos também contam, mas (como no _BodyVisitor) não se entra neles
+        for s in block.statements:
+            t = s.__class__.__name__
+            self.counts[t] = self.counts.get(t,0)+1
+            if not isinstance(s, Block):
+                self.visit(s)
 
 
 def code_smells(ast: Program) -> Dict[str,int]:
     smells: Dict[str,int] = {}
-    for fn in ast.functions: _detect_smells(fn.body, smells)
+    detector = _SmellDetector(smells)
+    for fn in ast.functions: detector.visit(fn.body)
     return smells
 
-def _detect_smells(block: Block, smells: Dict[str,int]):
-    for s in block.statements:
-        if isinstance(s, If) and isinstance(s.condition, Literal) and isinstance(s.condition.value,bool):
-            smells['redundant_if']=smells.get('redundant_if',0)+1
-        if isinstance(s, ExprStmt) and isinstance(s.expr, BinaryOp) and s.expr.op=='==' and (
+class _SmellDetector(_BodyVisitor):
+    def __init__(self, smells: Dict[str,int]):
+        self.smells = smells
+
+    def visit_If(self, s: If):
+        if isinstance(s.condition, Literal) and isinstance(s.condition.value,bool):
+            self.smells['redundant_if']=self.smells.get('redundant_if',0)+1
+        super().visit_If(s)
+
+    def visit_ExprStmt(self, s: ExprStmt):
+        if isinstance(s.expr, BinaryOp) and s.expr.op=='==' and (
            (isinstance(s.expr.left,Literal) and isinstance(s.expr.left.value,bool)) or
            (isinstance(s.expr.right,Literal) and isinstance(s.expr.right.value,bool))):
-            smells['bool_comparison']=smells.get('bool_comparison',0)+1
-        if isinstance(s, If):
-            _detect_smells(_wrap_block(s.then_branch),smells)
-            if s.else_branch: _detect_smells(_wrap_block(s.else_branch),smells)
-        if isinstance(s, While): _detect_smells(_wrap_block(s.body), smells)
-        if isinstance(s, For):   _detect_smells(_wrap_block(s.body), smells)
+            self.smells['bool_comparison']=self.smells.get('bool_comparison',0)+1
 
 
 # optimize + refactor
-def opt_refact(ast: Program) -> Program:
+def opt_refact(ast: Program, interner: Optional[Interner] = None) -> Program:
     optimized = opt(ast)
-    return refactor(optimized)
\ No newline at end of file
+    return refactor(optimized, interner)
\ No newline at end of file
@@ -1,9 +1,12 @@
 from langAST import *
 from lang_parser import parse_code, parse_program
+from lang_cache import cached_parse_code
 from examples import programa1, programa2, programa3
 
 
-class PrettyPrinter:
+class PrettyPrinter(Visitor):
+    prefix = 'pprint_'
+
     def __init__(self, indent_size: int = 2):
         self.indent_level = 0
         self.indent_size = indent_size
@@ -23,12 +26,12 @@ class PrettyPrinter:
         return sep.join(parts)
 
     def pprint(self, node: Any, parent_prec: int = 0) -> str:
-        method = 'pprint_' + node.__class__.__name__
-        if hasattr(self, method):
-            return getattr(self, method)(node, parent_prec)
-        else:
-            raise NotImplementedError(f"Pretty printing not implemented for {node.__class__.__name__}")
-        
+        # tabela de despacho de Visitor: o handler de cada classe é resolvido uma vez
+        return self._handlers[node.__class__](self, node, parent_prec)
+
+    def generic_visit(self, node, parent_prec: int = 0):
+        raise NotImplementedError(f"Pretty printing not implemented for {node.__class__.__name__}")
+
     # Precedência dos operadores (maior número = maior precedência)
     def get_precedence(self, op: str) -> int:
         precedence_map = {
@@ -170,7 +173,7 @@ def prop_roundtrip(prog_str: str) -> bool:
     printer = PrettyPrinter(indent_size=2)
     
     # Parse the string
-    ast = parse_code(prog_str)
+    ast = cached_parse_code(prog_str)
     
     # Pretty print it
     pretty = printer.pprint(ast)
@@ -178,11 +181,8 @@ def prop_roundtrip(prog_str: str) -> bool:
     # Parse the pretty printed version
     ast2 = parse_code(pretty)
     
-    # Pretty print again
-    pretty2 = printer.pprint(ast2)
-    
-    # Compare the pretty printed versions (not the ASTs)
-    return pretty == pretty2
+    # Compare the ASTs (structural equality, short-circuits on the cached hashes)
+    return ast == ast2
 
 # Test harness for pretty-printing and round-trip
 
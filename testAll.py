@@ -2,7 +2,6 @@ from lang_parser import parse_code
 from optRefactoration import opt, opt_refact, refactor
 from examples import programa1, programa2, programa3, programa4, programa5, programa6, programa7  
 from prettyPrinting import PrettyPrinter
-from copy import deepcopy
 
 
 programs = [
@@ -55,8 +54,7 @@ for i, (name, src, should_be_valid) in enumerate(programs, start=1):
     # 3) Round-trip
     try:
         ast2 = parse_code(pretty)
-        pretty2 = printer.pprint(ast2)
-        roundtrip_ok = pretty == pretty2
+        roundtrip_ok = ast2 == ast
         print(f"\nRoundtrip: {'✓ OK' if roundtrip_ok else '✗ FAIL'}")
         if not roundtrip_ok:
             print("Diferenças encontradas!")
@@ -70,7 +68,7 @@ for i, (name, src, should_be_valid) in enumerate(programs, start=1):
     # 4) Optimize only
     try:
         original_pretty = pretty
-        optimized = opt(deepcopy(ast))
+        optimized = opt(ast)
         after_opt = printer.pprint(optimized)
         if after_opt != original_pretty:
             print("\n✓ Optimized (mudanças aplicadas):")
@@ -83,7 +81,7 @@ for i, (name, src, should_be_valid) in enumerate(programs, start=1):
 
     # 5) Refactor only
     try:
-        refactored = refactor(deepcopy(ast))
+        refactored = refactor(ast)
         after_ref = printer.pprint(refactored)
         if after_ref != original_pretty:
             print("\n✓ Refactored (mudanças aplicadas):")
@@ -95,7 +93,7 @@ for i, (name, src, should_be_valid) in enumerate(programs, start=1):
 
     # 6) Optimize + Refactor combined
     try:
-        combined = opt_refact(deepcopy(ast))
+        combined = opt_refact(ast)
         after_combined = printer.pprint(combined)
         if after_combined != original_pretty and after_combined != after_opt and after_combined != after_ref:
             print("\n✓ Optimized + Refactored (mudanças combinadas):")
@@ -0,0 +1,53 @@
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+import testcases
+from bench_ast import NODE_CLASSES, count_nodes, dict_classes, measure, rebuild
+from bench_parser import generate_program
+from langAST import *
+from lang_parser import parse_code
+
+
+@pytest.mark.parametrize("cls", NODE_CLASSES)
+def test_node_classes_are_slotted(cls):
+    assert '__dict__' not in dir(cls)
+    assert '__weakref__' not in dir(cls)
+
+
+def test_slotted_nodes_keep_constructor_equality_and_repr():
+    node = If(BinaryOp(Variable('x'), '<', Literal(3)), Return(), else_branch=None)
+    assert node == If(BinaryOp(Variable('x'), '<', Literal(3)), Return(None))
+    assert node != If(BinaryOp(Variable('x'), '<', Literal(4)), Return(None))
+    assert repr(UnaryOp('++', Variable('i'), prefix=False)) == \
+        "UnaryOp(op='++', expr=Variable(name='i'), prefix=False)"
+    with pytest.raises(FrozenInstanceError):
+        node.condition = Literal(True)
+    ast = parse_code(testcases.programa3)
+    assert pickle.loads(pickle.dumps(ast)) == ast
+
+
+def test_dict_classes_mirror_the_ast():
+    ast = parse_code(testcases.programa3)
+    classes = dict_classes()
+    copy = rebuild(ast, classes)
+    assert type(copy).__name__ == 'Program' and hasattr(copy, '__dict__')
+    assert count_nodes(copy) == count_nodes(ast)
+    assert rebuild(copy, {v: k for k, v in classes.items()}) == ast
+
+
+def test_slots_use_less_memory_per_node():
+    ast = parse_code(testcases.programa3)
+    with_dict = measure(ast, dict_classes(), repeat=1)
+    with_slots = measure(ast, {cls: cls for cls in NODE_CLASSES}, repeat=1)
+    assert with_slots['nodes'] == with_dict['nodes']
+    assert with_slots['bytes_per_node'] < with_dict['bytes_per_node']
+
+
+def test_interning_shrinks_repetitive_trees():
+    ast = parse_code(generate_program(functions=4, statements=40, depth=4))
+    with_slots = measure(ast, {cls: cls for cls in NODE_CLASSES}, repeat=1)
+    interned = measure(ast, {cls: cls for cls in NODE_CLASSES}, repeat=1, intern=True)
+    assert interned['nodes'] == with_slots['nodes']
+    assert interned['bytes_per_node'] < with_slots['bytes_per_node']
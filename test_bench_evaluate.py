@@ -0,0 +1,22 @@
+import testcases
+from bench_evaluate import BACKENDS, count_statements, run
+from lang_parser import parse_code
+
+
+def test_backends_agree_on_result_and_output():
+    workloads = [('programa2', testcases.programa2, [('n', 30)]),
+                 ('programa3', testcases.programa3, [('number', 7919)])]
+    results = run(workloads, repeat=1)
+    for rows in results.values():
+        assert set(rows) == set(BACKENDS)
+        reference = rows['interpreter']
+        assert all((r['result'], r['output']) == (reference['result'], reference['output'])
+                   for r in rows.values())
+        assert reference['speedup'] == 1.0
+        assert all(r['statements'] > 0 and r['statements_per_second'] > 0 for r in rows.values())
+
+
+def test_count_statements_skips_blocks():
+    # int x, o for, int i, três vezes x = x + 1 e o return
+    ast = parse_code("int main() { int x = 0; for (int i = 0; i < 3; i++) { x = x + 1; } return x; }")
+    assert count_statements(ast, []) == 7
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from bench_parser import AXES, BASE, BASELINE, check, generate_program, growth_exponent, run
+from langAST import *
+from lang_parser import parse_code
+
+
+@pytest.mark.parametrize("axis", sorted(AXES))
+def test_generated_programs_parse(axis):
+    code = generate_program(**dict(BASE, **{axis: AXES[axis][0]}))
+    ast = parse_code(code)
+    assert len(ast.functions) == (AXES[axis][0] if axis == 'functions' else BASE['functions'])
+    assert generate_program(**dict(BASE, **{axis: AXES[axis][0]})) == code
+
+
+def test_generator_shape():
+    ast = parse_code(generate_program(functions=2, statements=8, depth=3, ident_len=20))
+    assert all(len(f.name) == 20 for f in ast.functions)
+    assert len(ast.functions[0].body.statements) == 3 + 8 + 1
+    expr = ast.functions[0].body.statements[3].expr.expr
+    depth = 0
+    while isinstance(expr, BinaryOp):
+        expr, depth = expr.right, depth + 1
+    assert depth == 3
+
+
+def test_growth_exponent():
+    sizes = [10, 20, 40, 80]
+    assert growth_exponent(sizes, [3 * s for s in sizes]) == pytest.approx(1.0)
+    assert growth_exponent(sizes, [s * s for s in sizes]) == pytest.approx(2.0)
+
+
+def _results(times, peaks, exponent=1.0):
+    points = [{'value': i, 'size': 100 * i, 'time': t, 'peak': p}
+              for i, (t, p) in enumerate(zip(times, peaks), 1)]
+    return {'unit': 1.0, 'axes': {'functions': {
+        'points': points, 'time_exponent': exponent, 'memory_exponent': 1.0}}}
+
+
+def test_check_flags_super_linear_growth_and_regressions():
+    baseline = _results([1.0, 2.0], [1000, 2000])
+    assert check(_results([1.1, 2.1], [1000, 2100]), baseline) == []
+    assert check(_results([1.3, 2.6], [1000, 2000], exponent=1.3), baseline) == []   # ruído
+    assert check(_results([1.0, 2.0], [1000, 2000], exponent=1.8), baseline) == [
+        "functions: time_exponent 1.80 > 1.5"]
+    assert check(_results([2.0, 4.0], [1000, 3000]), baseline) == [
+        "functions: tempo 2.00x o baseline", "functions=2: memória 1.50x o baseline"]
+
+
+@pytest.mark.slow
+def test_parser_matches_baseline():
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    assert check(run(), baseline) == []
+
+
+def test_baseline_passes_its_own_check():
+    # um baseline que falha o próprio check faria a comparação falhar sempre
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    assert check(baseline, baseline) == []
+
+
+def test_run_and_baseline_format():
+    results = run({'statements': [5, 10, 20]}, repeat=1)
+    assert [p['value'] for p in results['axes']['statements']['points']] == [5, 10, 20]
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    assert set(baseline['axes']) == set(AXES)
+    for axis, data in baseline['axes'].items():
+        assert [p['value'] for p in data['points']] == AXES[axis]
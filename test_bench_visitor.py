@@ -0,0 +1,15 @@
+import testcases
+from bench_visitor import GetattrCounter, VisitorCounter, count_chain, run
+from lang_parser import parse_code
+
+
+def test_all_dispatch_styles_count_the_same_nodes():
+    ast = parse_code(testcases.programa3)
+    assert count_chain(ast) == GetattrCounter().visit(ast) == VisitorCounter().visit(ast)
+
+
+def test_run_reports_per_node_cost():
+    results = run(functions=1, repeat=1)
+    assert set(results) == {'isinstance', 'getattr', 'Visitor'}
+    assert len({r['nodes'] for r in results.values()}) == 1
+    assert all(r['ns_per_node'] > 0 for r in results.values())
@@ -0,0 +1,332 @@
+import pickle
+import random
+from dataclasses import FrozenInstanceError, replace
+
+import pytest
+
+import testcases
+from langAST import *
+from lang_evaluate import evaluate
+from lang_instrumentation import evaluate_with_trace, instrumentation
+from lang_mutate import collect_mutable_nodes, mutate_ast_one
+from optRefactoration import code_smells, instructions, names, opt, opt_refact
+from lang_parser import parse_code, parse_code_with_spans
+
+
+def test_nodes_are_frozen():
+    node = BinaryOp(Literal(1), '+', Variable('x'))
+    with pytest.raises(FrozenInstanceError):
+        node.op = '-'
+
+
+def test_walk_paths_lead_back_to_each_node():
+    ast = parse_code(testcases.programa3)
+    paths = list(walk(ast))
+    assert paths[0] == ((), ast)
+    assert len(paths) == len({id(node) for _, node in paths})
+    for path, node in paths:
+        assert get_at(ast, path) is node
+    assert (('functions', 0), ('name', None)) not in [p for p, _ in paths]  # só nós
+    assert get_at(ast, (('functions', 0), ('body', None), ('statements', 4))).__class__ is While
+
+
+def test_replace_at_rebuilds_only_the_spine():
+    ast = parse_code(testcases.programa3)
+    before = str(ast)
+    path = (('functions', 0), ('body', None), ('statements', 0), ('condition', None), ('right', None))
+    new = replace_at(ast, path, Literal(2))
+    assert str(ast) == before
+    assert get_at(new, path) == Literal(2)
+    assert new.functions[1] is ast.functions[1]
+    old_stmts, new_stmts = ast.functions[0].body.statements, new.functions[0].body.statements
+    assert new_stmts is not old_stmts
+    assert all(a is b for a, b in zip(old_stmts[1:], new_stmts[1:]))
+    assert new.functions[0].body.statements[0].condition.left is old_stmts[0].condition.left
+    assert replace_at(ast, (), Literal(0)) == Literal(0)
+
+
+def test_mutants_share_untouched_subtrees():
+    random.seed(3)
+    ast = parse_code(testcases.programa3)
+    before = str(ast)
+    original = {id(node) for _, node in walk(ast)}
+    for _ in range(20):
+        mutant = mutate_ast_one(ast)
+        if mutant is None:
+            continue
+        assert mutant != ast
+        assert any(id(node) in original for _, node in walk(mutant))
+    assert str(ast) == before
+
+
+
+def test_mutated_ids_locate_the_mutations():
+    random.seed(5)
+    ast, spans = parse_code_with_spans(testcases.programa3)
+    table = NodeTable(ast)
+    for _ in range(20):
+        mutated = []
+        mutant = mutate_ast_one(ast, mutated=mutated)
+        if mutant is None:
+            assert mutated == []
+            continue
+        assert mutated
+        for i in mutated:
+            path = table.path_to(i)
+            assert get_at(mutant, path) != get_at(ast, path)
+            start, _ = spans.span_at(i)
+            assert spans.location_at(i) == '{}:{}'.format(*spans.line_col(start))
+    # a semente dá os mesmos mutantes com e sem `mutated`
+    random.seed(5)
+    plain = [mutate_ast_one(ast) for _ in range(20)]
+    random.seed(5)
+    assert plain == [mutate_ast_one(ast, mutated=[]) for _ in range(20)]
+
+
+def test_trace_lines_carry_statement_locations():
+    code = "int main(int c) {\n  int x = c + 1;\n  if (x > 1) {\n    print(x);\n  }\n  return x;\n}"
+    ast, spans = parse_code_with_spans(code)
+    assert evaluate_with_trace(ast, [('c', 2)], spans=spans) == (3, [
+        '[main] Instrução 1: VarDecl int x = 3 @ 1:2',
+        '[main] If cond: (x > 1) → True @ 2:2',
+        '[main] Instrução 4: Print 3 @ 3:4',
+        '[main] 3',
+        '[main] Instrução 5: Return 3 @ 5:2'])
+    # os Print da instrumentação não estão no código: ficam sem posição
+    _, trace = evaluate_with_trace(instrumentation(ast), [('c', 2)], spans=spans)
+    assert trace[:3] == ['[main] Instrução 1: VarDecl int x = 3 @ 1:2',
+                         '[main] Instrução 2: Print Executou: VarDecl', '[main] Executou: VarDecl']
+    assert [line.split(' @ ')[0] for line in evaluate_with_trace(ast, [('c', 2)])[1]] == \
+        [line.split(' @ ')[0] for line in evaluate_with_trace(ast, [('c', 2)], spans=spans)[1]]
+
+def test_mutable_nodes_keep_the_original_order():
+    # a versão original percorria dir(node): campos por ordem alfabética, filhos antes do pai
+    def reference(node, acc):
+        for name in sorted(node.__dataclass_fields__):
+            value = getattr(node, name)
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, NODE_TYPES):
+                    reference(child, acc)
+        if isinstance(node, (Literal, BinaryOp, Return, Assignment, If)):
+            acc.append(node)
+        return acc
+
+    for code in (testcases.programa1, testcases.programa3, testcases.programa4):
+        ast = parse_code(code)
+        table = NodeTable(ast)
+        collected = [table.node_at(i) for i in collect_mutable_nodes(table)]
+        expected = reference(ast, [])
+        assert len(collected) == len(expected)
+        assert all(a is b for a, b in zip(collected, expected))
+
+
+def test_interner_returns_one_instance_per_structure():
+    interner = Interner()
+    one = interner(Literal, 1)
+    assert interner(Literal, 1) is one
+    assert interner(Literal, True) is not one       # 1 == True, mas não o mesmo literal
+    assert interner(Literal, 1.0) is not one
+    left = interner(BinaryOp, one, '+', interner(Variable, 'x'))
+    right = interner(BinaryOp, interner(Literal, 1), '+', interner(Variable, 'x'))
+    assert left is right
+    assert interner(FunctionCall, 'f', [left]) is interner(FunctionCall, 'f', [right])
+    assert len(interner) == 6 and interner.hits == 5
+
+
+def test_interned_tree_shares_repeated_subtrees():
+    ast = parse_code(testcases.programa3)
+    interner = Interner()
+    shared = interner.tree(ast)
+    assert shared == ast and shared is not ast
+    assert len({id(n) for _, n in walk(shared)}) < len({id(n) for _, n in walk(ast)})
+    # nós iguais são o mesmo objeto, e nós diferentes nunca se confundem
+    by_key = {}
+    for _, node in walk(shared):
+        if isinstance(node, (Expr, Stmt)):
+            assert by_key.setdefault(repr(node), node) is node
+    again = interner.tree(parse_code(testcases.programa3))
+    assert again.functions[0].body is shared.functions[0].body
+    assert again.functions[0] is not shared.functions[0]
+
+
+def test_interner_handles_deep_trees():
+    expr = Literal(0)
+    for i in range(5000):
+        expr = BinaryOp(expr, '+', Literal(i % 2))
+    shared = Interner().tree(expr)
+    assert shared.right is shared.left.left.right
+
+
+def test_optimizer_rebuilds_through_the_interner():
+    ast = parse_code("int main() { int a = 1 + 1; int b = 2; return a * (b + 0) + b * 1; }")
+    interner = Interner()
+    optimized = opt(ast, interner)
+    assert optimized == opt(ast)
+    stmts = optimized.functions[0].body.statements
+    assert stmts[0].init is stmts[1].init              # Literal(2) dobrado e literal
+    assert opt_refact(ast, interner).functions[0].body is optimized.functions[0].body
+    assert interner.tree(optimized) is optimized
+
+
+def test_replace_at_rebuilds_through_the_interner():
+    interner = Interner()
+    ast = interner.tree(parse_code(testcases.programa3))
+    path = (('functions', 0), ('body', None), ('statements', 0), ('condition', None), ('right', None))
+    new = replace_at(ast, path, Literal(2), interner)
+    assert new == replace_at(ast, path, Literal(2))
+    assert interner.tree(new) is new
+    # a mesma edição refeita dá os mesmos nós canónicos ao longo do caminho
+    again = replace_at(ast, path, Literal(2), interner)
+    assert again.functions[0].body is new.functions[0].body
+    assert again.functions[1] is ast.functions[1]
+
+
+
+def test_names_counts_and_smells_skip_nested_bare_blocks():
+    # valores das versões recursivas originais, que os Visitors mantêm
+    ast = parse_code('''
+        int f(int a) {
+          int b = a == true;
+          a == false;
+          { int hidden = 1; if (true) { int h2 = 2; } }
+          if (false) int c = 1; else { int d = 2; { int e = 3; } }
+          while (a < 3) { a == true; int w = 1; if (true) print(a); }
+          for (int i = 0; i < 3; i++) for (int j = 0; j < 2; j++) { int k = i; false == a; }
+          for (a = 0; a < 1; a++) print(a);
+          return b;
+        }
+        int main() { if (1 < 2) { int m = 1; } { int n = 2; } return 0; }''')
+    assert names(ast) == ['a', 'b', 'c', 'd', 'f', 'i', 'j', 'k', 'm', 'main', 'w']
+    assert list(instructions(ast).items()) == [
+        ('Function', 2), ('VarDecl', 6), ('ExprStmt', 3), ('Block', 3), ('If', 3),
+        ('While', 1), ('Print', 2), ('For', 3), ('Return', 2)]
+    assert list(code_smells(ast).items()) == [('bool_comparison', 3), ('redundant_if', 2)]
+    ast = parse_code(testcases.programa3)
+    assert names(ast) == ['i', 'isPrime', 'main', 'num', 'number']
+    assert instructions(ast) == {'Function': 2, 'If': 5, 'Return': 7, 'VarDecl': 1, 'While': 1,
+                                 'ExprStmt': 1, 'Print': 2}
+    assert code_smells(ast) == {}
+
+def test_visitor_dispatch_is_resolved_once_per_class():
+    class Names(Visitor):
+        def __init__(self):
+            self.seen = []
+
+        def visit_Variable(self, node):
+            self.seen.append(node.name)
+
+        def visit_Expr(self, node):           # qualquer outra expressão
+            self.seen.append(node.__class__.__name__)
+            self.generic_visit(node)
+
+    names = Names()
+    names.visit(parse_code("int main() { int x = f(y, 1) + z; return x; }"))
+    assert names.seen == ['BinaryOp', 'FunctionCall', 'y', 'Literal', 'z', 'x']
+    assert Names._handlers[Variable] is Names.visit_Variable
+    assert Names._handlers[Literal] is Names.visit_Expr
+    assert Names._handlers[Block] is Visitor.generic_visit
+    assert Names._handlers is not Visitor._handlers
+
+
+def test_transformer_shares_unchanged_subtrees():
+    class Rename(Transformer):
+        def visit_Variable(self, node):
+            return Variable('b') if node.name == 'a' else node
+
+        def visit_Print(self, node):
+            return None                        # remove a instrução
+
+    ast = parse_code("int main() { int x = a + 1; print(x); return c * 2; }")
+    new = Rename().visit(ast)
+    old_stmts, new_stmts = ast.functions[0].body.statements, new.functions[0].body.statements
+    assert len(new_stmts) == 2
+    assert new_stmts[0].init == BinaryOp(Variable('b'), '+', Literal(1))
+    assert new_stmts[0].init.right is old_stmts[0].init.right
+    assert new_stmts[1] is old_stmts[2]
+    unchanged = parse_code("int main() { return c; }")
+    assert Rename().visit(unchanged) is unchanged
+
+
+def test_structural_hash_is_cached_and_matches_equality():
+    a = parse_code(testcases.programa3)
+    b = parse_code(testcases.programa3)
+    assert a is not b and a == b and hash(a) == hash(b)
+    assert object.__getattribute__(a.functions[0].body, '_hash') == hash(b.functions[0].body)
+    assert len({a, b, a.functions[0], b.functions[0]}) == 2
+    changed = replace(a, functions=[replace(a.functions[0], name='outro')] + a.functions[1:])
+    assert changed != a and hash(changed) != hash(a)
+    assert Literal(1) != Literal(True) and Literal(1) != Literal(1.0)
+    assert Literal(1) == Literal(1) and Literal(1) != Variable('x')
+    assert BinaryOp(Literal(1), '+', Literal(2)) != BinaryOp(Literal(1), '-', Literal(2))
+    assert Return() == Return(None) and Return() != Return(Literal(0))
+
+
+def test_structural_equality_on_deep_trees():
+    def chain(leaf):
+        expr = leaf
+        for _ in range(20000):
+            expr = UnaryOp('-', expr)
+        return expr
+
+    assert chain(Literal(0)) == chain(Literal(0))
+    assert chain(Literal(0)) != chain(Literal(1))
+    assert hash(chain(Literal(0))) == hash(chain(Literal(0)))
+
+
+def test_program_indexes_functions_calls_and_declarations():
+    ast = parse_code("""
+        int f(int a) { int b = a; if (a) { int c = f(a - 1); } return g(b); }
+        int g(int x) { return x; }
+        int main() { int r = f(2) + g(1); return r; }
+        int f(int z) { return 0; }
+    """)
+    f, g, main = ast.functions[:3]
+    assert ast.function('f') is f and ast.function('main') is main
+    assert ast.function('h') is None
+    calls_to_f = ast.calls_to('f')
+    assert [caller.name for caller, _ in calls_to_f] == ['f', 'main']
+    assert all(call.__class__ is FunctionCall and call.name == 'f' for _, call in calls_to_f)
+    assert [caller.name for caller, _ in ast.calls_to('g')] == ['f', 'main']
+    assert ast.calls_to('main') == []
+    assert [d.name for d in ast.declarations('f')] == ['a', 'b', 'c']
+    assert [d.name for d in ast.declarations('main')] == ['r']
+    copy = pickle.loads(pickle.dumps(ast))
+    assert copy == ast and copy.function('g') == g
+
+
+def test_evaluators_call_through_the_index():
+    functions = "\n".join(f"int f{i}(int x) {{ return x + {i}; }}" for i in range(200))
+    ast = parse_code(functions + "\nint main() { return f199(f0(1)); }")
+    assert evaluate(ast, []) == 200
+    assert evaluate_with_trace(ast, [])[0] == 200
+
+
+def test_node_table_ids_parents_and_paths():
+    ast = parse_code(testcases.programa3)
+    table = NodeTable(ast)
+    paths = {id(node): path for path, node in walk(ast)}
+    assert len(table) == len(paths)
+    assert table.node_at(len(table) - 1) is ast and table.parent_of(len(table) - 1) is None
+    for i in range(len(table)):
+        node = table.node_at(i)
+        assert table.path_to(i) == paths[id(node)]
+        assert table.id_of(node) == i
+        parent = table.parent_of(i)
+        if parent is not None:
+            # pós-ordem: os filhos são numerados antes do pai
+            assert i < parent
+            assert get_at(ast, paths[id(node)][:-1]) is table.node_at(parent)
+    assert table.id_of(Literal(12345)) is None
+
+
+def test_node_table_handles_deep_trees_and_shared_nodes():
+    expr = Literal(0)
+    for _ in range(20000):
+        expr = UnaryOp('-', expr)
+    table = NodeTable(expr)
+    assert len(table.path_to(0)) == 20000 and table.node_at(0) == Literal(0)
+    assert table.node_at(20000) is expr
+    x = Variable('x')
+    shared = NodeTable(BinaryOp(x, '+', x))
+    assert shared.node_at(0) is shared.node_at(1) is x
+    assert shared.id_of(x) == 0 and shared.path_to(1) == (('right', None),)
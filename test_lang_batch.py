@@ -0,0 +1,44 @@
+import glob
+import os
+import pickle
+
+import pytest
+
+import testcases
+from lang_batch import decode, encode, parse_files
+from lang_parser import parse_code
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'progsParser')
+PROGRAMS = sorted(glob.glob(os.path.join(PROGRAMS_DIR, '*.c')))
+
+
+@pytest.mark.parametrize("code", [testcases.programa1, testcases.programa2, testcases.programa3, testcases.programa4])
+def test_compact_encoding_roundtrip(code):
+    program = parse_code(code)
+    data = encode(program)
+    assert decode(data) == program
+    assert len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)) < len(pickle.dumps(program, pickle.HIGHEST_PROTOCOL))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_files_keeps_order_and_reports_failures(workers):
+    assert PROGRAMS
+    paths = PROGRAMS + [os.path.join(PROGRAMS_DIR, 'missing.c')]
+    results = parse_files(paths, workers=workers)
+    assert [r.path for r in results] == paths
+    for result in results[:-1]:
+        if result.path.endswith('_inv.c'):
+            assert not result.ok and result.program is not None
+        else:
+            assert result.ok
+            with open(result.path) as f:
+                assert result.program == parse_code(f.read())
+    missing = results[-1]
+    assert missing.program is None and not missing.ok
+
+
+def test_deep_nesting_is_parsed(tmp_path):
+    path = tmp_path / 'deep.c'
+    path.write_text('int main() { return ' + '(' * 3000 + '1' + ')' * 3000 + '; }')
+    [result] = parse_files([str(path)], workers=1)
+    assert result.ok and result.program.function('main') is not None
@@ -0,0 +1,78 @@
+import os
+
+import examples
+import lang_cache
+from lang_cache import ParseCache, cache_key
+from lang_flat import to_bytes
+from lang_parser import parse_code
+
+
+def test_memory_hit_returns_cached_program():
+    cache = ParseCache(maxsize=2)
+    first = cache.parse(examples.programa1)
+    assert first == parse_code(examples.programa1)
+    assert cache.parse(examples.programa1) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ParseCache(maxsize=2)
+    p1 = cache.parse(examples.programa1)
+    cache.parse(examples.programa2)
+    cache.parse(examples.programa1)        # programa2 passa a ser o mais antigo
+    cache.parse(examples.programa3)
+    assert cache.parse(examples.programa1) is p1
+    assert cache_key(examples.programa2) not in cache.memory
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    ParseCache(cache_dir=str(tmp_path)).parse(examples.programa3)
+    other = ParseCache(cache_dir=str(tmp_path))
+    assert other.parse(examples.programa3) == parse_code(examples.programa3)
+    assert (other.disk_hits, other.misses) == (1, 0)
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.tmp')]
+
+
+def test_key_depends_on_grammar_version(monkeypatch):
+    key = cache_key(examples.programa1)
+    monkeypatch.setattr(lang_cache, 'GRAMMAR_VERSION', -1)
+    assert cache_key(examples.programa1) != key
+
+
+def test_corrupted_entry_is_reparsed(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path))
+    cache.parse(examples.programa1)
+    path = cache._path(cache_key(examples.programa1))
+    with open(path, 'wb') as f:
+        f.write(b'garbage')
+    fresh = ParseCache(cache_dir=str(tmp_path))
+    assert fresh.parse(examples.programa1) == parse_code(examples.programa1)
+    assert fresh.misses == 1
+
+
+def test_disk_size_eviction(tmp_path):
+    sizes = {}
+    for code in (examples.programa1, examples.programa4):
+        ParseCache(cache_dir=str(tmp_path)).parse(code)
+        sizes[code] = os.path.getsize(os.path.join(tmp_path, cache_key(code) + ParseCache.SUFFIX))
+    os.utime(os.path.join(tmp_path, cache_key(examples.programa1) + ParseCache.SUFFIX), (0, 0))
+    size2 = len(to_bytes(parse_code(examples.programa2)))
+    cache = ParseCache(cache_dir=str(tmp_path), max_disk_bytes=sum(sizes.values()) + size2 - 1)
+    cache.parse(examples.programa2)   # ultrapassa o limite: sai a entrada mais antiga
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        cache_key(code) + ParseCache.SUFFIX for code in (examples.programa2, examples.programa4)
+    )
+
+
+def test_entry_evicted_by_another_process_after_load(tmp_path, monkeypatch):
+    ParseCache(cache_dir=str(tmp_path)).parse(examples.programa1)
+    load = lang_cache.load
+
+    def load_then_evict(path):
+        program = load(path)
+        os.remove(path)
+        return program
+    monkeypatch.setattr(lang_cache, 'load', load_then_evict)
+    cache = ParseCache(cache_dir=str(tmp_path))
+    assert cache.parse(examples.programa1) == parse_code(examples.programa1)
+    assert cache.disk_hits == 1
@@ -0,0 +1,76 @@
+import pytest
+
+import lang_codegen
+import testcases
+from lang_codegen import compile_program, differential_check, evaluate
+from lang_parser import parse_code
+
+CASES = [
+    (testcases.programa1, [[("num", 1)], [("num", 5)], [("num", 10)]]),
+    (testcases.programa2, [[("n", 2)], [("n", 7)], [("n", 40)]]),
+    (testcases.programa3, [[("number", 1)], [("number", 15)], [("number", 97)]]),
+    (testcases.programa4, [[("x", 10), ("y", 5), ("z", 0)], [("x", -5), ("y", 2), ("z", 10)]]),
+]
+
+
+@pytest.mark.parametrize("code, inputs_list", CASES)
+def test_test_programs_match_interpreter(code, inputs_list):
+    ast = parse_code(code)
+    assert differential_check(ast, inputs_list) == []
+    assert compile_program(ast).interpreted == []
+
+
+@pytest.mark.parametrize("code", [
+    '''int bump(int x) { x++; }
+       int main(int n) {
+         int total = 0;
+         for (int i = 0; i < n; ++i) {
+           int sq = i * i;
+           if (sq % 2 == 0 || i == 3) { total = total + sq / 2; }
+         }
+         { int total = 100; print(total); total = 1; }
+         print(0 - total); print(!(total > 1) && true); print(bump(total));
+         print(total++); print(++total); print(n = 2); print((1 < 2) == true);
+       }''',
+    '''int main(int c) { print(c); int c = c + 1; if (c < 4) { return main(c); } return c; }''',
+    "int f(int a, int a) { return a; } int main(int c) { return f(1, c); }",
+    "int main(int c) { while (c < 3) { c++; } }",
+    "int main() { return y; }",
+    "int main() { y = 1; }",
+    "int main() { return f(1); }",
+    "int f(int a) { return a; } int main() { return f(1, 2); }",
+    "int f() { return c; } int main(int c) { return f(); }",
+    "int f() { c = 1; return 0; } int main(int c) { return f(); }",
+    "int helper() { return 1; }",
+])
+def test_scoping_and_errors_match_interpreter(code):
+    ast = parse_code(code)
+    assert differential_check(ast, [[("c", 0)], [("c", 1)], [("c", 1), ("n", 5)]]) == []
+
+
+def test_bare_declarations_fall_back_to_the_interpreter():
+    ast = parse_code('''
+    int pick(int c) { int y = 7; { if (c) int y = 1; y = y + 10; } return y; }
+    int main(int c) { return pick(c) + pick(1 - c); }''')
+    compiled = compile_program(ast)
+    assert 'def _entry' in compiled.source()
+    assert compiled.interpreted == ['pick']
+    assert differential_check(ast, [[("c", 0)], [("c", 1)]]) == []
+
+
+def test_missing_input_runs_in_the_interpreter():
+    ast = parse_code("int main(int c) { if (c) { return 1; } return n; }")
+    assert compile_program(ast).inputs == ['c', 'n']
+    assert evaluate(ast, [("c", 1)]) == 1
+    with pytest.raises(Exception, match="Variável 'n' não definida."):
+        evaluate(ast, [("c", 0)])
+
+
+def test_compiled_programs_are_cached_by_structure(monkeypatch):
+    monkeypatch.setattr(lang_codegen, '_CACHE', type(lang_codegen._CACHE)())
+    monkeypatch.setattr(lang_codegen, 'CACHE_SIZE', 2)
+    first = compile_program(parse_code(testcases.programa1))
+    assert compile_program(parse_code(testcases.programa1)) is first
+    compile_program(parse_code(testcases.programa2))
+    compile_program(parse_code(testcases.programa3))
+    assert compile_program(parse_code(testcases.programa1)) is not first
@@ -0,0 +1,89 @@
+import pytest
+
+import testcases
+from lang_compile import compile_program, evaluate
+from lang_evaluate import evaluate as interpret
+from lang_parser import parse_code
+
+CASES = [
+    (testcases.programa1, [[("num", 1)], [("num", 5)], [("num", 10)]]),
+    (testcases.programa2, [[("n", 2)], [("n", 7)], [("n", 40)]]),
+    (testcases.programa3, [[("number", 1)], [("number", 15)], [("number", 97)]]),
+    (testcases.programa4, [[("x", 10), ("y", 5), ("z", 0)], [("x", -5), ("y", 2), ("z", 10)]]),
+]
+
+
+@pytest.mark.parametrize("code, inputs_list", CASES)
+def test_same_result_and_output_as_interpreter(code, inputs_list, capsys):
+    ast = parse_code(code)
+    compiled = compile_program(ast)
+    for inputs in inputs_list:
+        expected = interpret(ast, inputs)
+        expected_output = capsys.readouterr().out
+        assert compiled.evaluate(inputs) == expected
+        assert capsys.readouterr().out == expected_output
+
+
+def test_scopes_operators_and_missing_return(capsys):
+    code = '''
+    int bump(int x) {
+      x++;
+    }
+    int main(int n) {
+      int total = 0;
+      for (int i = 0; i < n; ++i) {
+        int sq = i * i;
+        if (sq % 2 == 0 || i == 3) { total = total + sq / 2; }
+      }
+      {
+        int total = 100;
+        print(total);
+      }
+      print(0 - total);
+      print(!(total > 1) && true);
+      print(bump(total));
+    }
+    '''
+    ast = parse_code(code)
+    assert evaluate(ast, [("n", 6)]) == interpret(ast, [("n", 6)]) == -1
+    out = capsys.readouterr().out.split('\n')
+    assert out[:4] == out[4:8] == ['100', '-14', 'False', '0']
+
+
+@pytest.mark.parametrize("code, message", [
+    ("int main() { return y; }", "Variável 'y' não definida."),
+    ("int main() { y = 1; }", "Variável 'y' não definida para atribuição."),
+    ("int main() { return f(1); }", "Função 'f' não definida."),
+    ("int f(int a) { return a; } int main() { return f(1, 2); }", "Número incorreto de argumentos."),
+    ("int f() { return x; } int main(int x) { return f(); }", "Variável 'x' não definida."),
+    ("int helper() { return 1; }", "Função main não encontrada."),
+])
+def test_errors_match_interpreter(code, message):
+    ast = parse_code(code)
+    for run in (interpret, evaluate):
+        with pytest.raises(Exception, match=message):
+            run(ast, [("x", 1)])
+
+
+def test_compiled_functions_are_callable():
+    compiled = compile_program(parse_code(testcases.programa1 + testcases.programa3.replace('main', 'main3')))
+    assert compiled.functions['factorial'](6) == 720
+    assert [compiled.functions['isPrime'](n) for n in (7, 9)] == [1, 0]
+
+
+@pytest.mark.parametrize("body", [
+    "{ if (c) int y = 1; } return y;",
+    "{ while (c) int y = c--; } return y;",
+    "for (c = 0; c < 1; c++) int y = 2; return y;",
+    "if (c) int y = 3; return y;",
+])
+def test_declarations_in_bare_branches_keep_their_scope(body):
+    ast = parse_code(f"int main(int c) {{ {body} }}")
+    for inputs in ([("c", 1)], [("c", 0)]):
+        try:
+            expected = interpret(ast, inputs)
+        except Exception as e:
+            with pytest.raises(Exception, match=str(e)):
+                evaluate(ast, inputs)
+        else:
+            assert evaluate(ast, inputs) == expected
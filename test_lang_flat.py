@@ -0,0 +1,147 @@
+import pickle
+from collections import Counter
+
+import pytest
+
+import examples
+import testcases
+from langAST import *
+import lang_flat
+from lang_flat import FlatVisitor, dump, flatten, from_bytes, load, to_bytes, unflatten
+from lang_parser import parse_code
+
+PROGRAMS = [
+    examples.programa1, examples.programa2, examples.programa3, examples.programa4,
+    examples.programa5, testcases.programa1, testcases.programa2, testcases.programa3,
+    testcases.programa4,
+]
+
+
+@pytest.mark.parametrize("code", PROGRAMS)
+def test_flatten_round_trip(code):
+    ast = parse_code(code)
+    flat = flatten(ast)
+    assert unflatten(flat) == ast
+    assert flat.kind_counts() == dict(Counter(node.__class__.__name__ for _, node in walk(ast)))
+
+
+def test_round_trip_keeps_value_types_and_optional_fields():
+    body = Block([
+        VarDecl('bool', 'b', Literal(True)), VarDecl('float', 'f', Literal(1.0)),
+        VarDecl('int', 'i', Literal(1)), VarDecl('int', 'j'),
+        For(None, BinaryOp(Variable('i'), '<', Literal(3)), None,
+            If(Variable('b'), Print(Literal("1")))),
+        Return(),
+    ])
+    ast = Program([Function('int', 'main', [], body)], [VarDecl('int', 'g', Literal(1))])
+    copy = unflatten(flatten(ast))
+    assert copy == ast
+    decls = copy.functions[0].body.statements
+    assert [type(d.init.value) for d in decls[:3]] == [bool, float, int]
+    assert decls[3].init is None
+    assert decls[4].init is None and decls[4].increment is None
+    assert decls[4].body.else_branch is None and decls[5].value is None
+    assert copy.global_vars[0].init.value == 1
+
+
+def test_children_and_values():
+    flat = flatten(BinaryOp(Literal(1), '+', FunctionCall('f', [Variable('x'), Literal(2)])))
+    assert list(flat.children(0)) == [1, 2]
+    assert list(flat.children(2)) == [3, 4]
+    assert flat.kind(2) is FunctionCall and flat.values(2) == ['f']
+    assert flat.values(0) == ['+'] and flat.values(4) == [2]
+    assert flat.ends[0] == len(flat) == 5
+    assert flat.count(Literal, Variable) == 3
+
+
+def test_deep_trees_without_recursion():
+    expr = Literal(0)
+    for i in range(20000):
+        expr = UnaryOp('-', expr)
+    flat = flatten(expr)
+    assert len(flat) == 20001
+    copy = unflatten(flat)
+    for _ in range(20000):
+        copy = copy.expr
+    assert copy == Literal(0)
+
+
+def test_visitor_scans_and_skips_subtrees():
+    class Calls(FlatVisitor):
+        def __init__(self):
+            self.names = []
+
+        def visit_FunctionCall(self, flat, i):
+            self.names.append(flat.values(i)[0])
+
+        def visit_If(self, flat, i):
+            return False
+
+    ast = parse_code("""
+        int main() {
+            int x = f(g(1));
+            if (x) { h(); }
+            return k();
+        }""")
+    assert Calls().visit(flatten(ast)).names == ['f', 'g', 'k']
+
+
+@pytest.mark.parametrize("code", PROGRAMS)
+def test_binary_round_trip(code):
+    ast = parse_code(code)
+    data = to_bytes(ast)
+    assert data.startswith(lang_flat.MAGIC)
+    assert from_bytes(data) == ast
+    assert len(data) < len(pickle.dumps(ast, pickle.HIGHEST_PROTOCOL))
+
+
+def test_binary_values_and_subtrees():
+    values = [0, 1, -1, 127, 128, -300, 2 ** 70, -2 ** 70, 1.5, -0.0, True, False, '', 'olá\n']
+    for value in values:
+        copy = from_bytes(to_bytes(Literal(value)))
+        assert type(copy.value) is type(value) and copy.value == value
+    expr = Literal(0)
+    for _ in range(20000):
+        expr = UnaryOp('-', expr)
+    data = to_bytes(expr)
+    copy = from_bytes(data)
+    assert to_bytes(copy) == data
+    for _ in range(20000):
+        copy = copy.expr
+    assert copy == Literal(0)
+
+
+def test_binary_rejects_other_data_and_versions():
+    with pytest.raises(ValueError):
+        from_bytes(b'garbage')
+    data = bytearray(to_bytes(Literal(1)))
+    data[len(lang_flat.MAGIC)] = lang_flat.FORMAT_VERSION + 1
+    with pytest.raises(ValueError):
+        from_bytes(bytes(data))
+
+
+def _body_loaded(function):
+    try:
+        Function.body.__get__(function)
+    except AttributeError:
+        return False
+    return True
+
+
+def test_lazy_load_reads_bodies_on_first_access(tmp_path):
+    body = Block([Return(Literal(1))])
+    ast = Program([Function('int', 'f', [VarDecl('int', 'a'), VarDecl('bool', 'b')], body),
+                   Function('void', 'g', [], Block([]))],
+                  [VarDecl('int', 'x', Literal(2))])
+    path = str(tmp_path / 'prog.ast')
+    dump(ast, path)
+    assert load(path) == ast
+    lazy = load(path, lazy=True)
+    assert not any(_body_loaded(f) for f in lazy.functions)
+    assert lazy.functions[0].params == ast.functions[0].params
+    assert lazy.global_vars == ast.global_vars
+    assert lazy.functions[0].body == body
+    assert _body_loaded(lazy.functions[0]) and not _body_loaded(lazy.functions[1])
+    assert lazy == ast
+    dump(Literal(3), path)
+    assert load(path, lazy=True) == Literal(3)
@@ -0,0 +1,59 @@
+import pytest
+from parsec import ParseError
+
+import testcases
+from lang_incremental import function_spans, reparse
+from lang_parser import parse_code
+
+CODE = "\n".join(
+    testcases.programa3.replace('isPrime', f'isPrime{i}').replace('int main', f'int main{i}')
+    for i in range(5)
+)
+
+
+def test_function_spans():
+    spans = function_spans(CODE)
+    assert len(spans) == 10
+    assert CODE[spans[0][0]:].startswith('int isPrime0(int num) {')
+    assert CODE[spans[0][1] - 1] == '}'
+    assert function_spans('int f() { print("}"); }') == [(0, 23)]
+    assert function_spans('int f() {') is None
+
+
+def test_edit_inside_one_function_reuses_the_others():
+    old = parse_code(CODE)
+    new_text = CODE.replace('return 1;\n  } else', 'return 2;\n  } else', 1)
+    new = reparse(old, CODE, new_text)
+    assert new == parse_code(new_text)
+    changed = [i for i, (a, b) in enumerate(zip(old.functions, new.functions)) if a is not b]
+    assert changed == [1]
+
+
+@pytest.mark.parametrize("edit", [
+    lambda c: c.replace('int main2', 'int g() { return 0; }\nint main2', 1),   # nova função
+    lambda c: c[:c.index('int main2')] + c[c.index('int isPrime3'):],           # remove uma função
+    lambda c: '  \n' + c,                                                       # só espaços no início
+    lambda c: c + '\nint extra() { return 1; }\n',                              # acrescenta no fim
+    lambda c: c.replace('i = i + 2;', 'i = i + 2; i++;'),                       # várias funções
+])
+def test_reparse_matches_full_parse(edit):
+    old = parse_code(CODE)
+    new_text = edit(CODE)
+    assert reparse(old, CODE, new_text) == parse_code(new_text)
+
+
+def test_edit_glued_to_next_function_is_not_reused():
+    code = "int f() { return 1; } int g() { return 2; }"
+    new_text = code.replace('} int g', '}xint g')
+    with pytest.raises(ParseError):
+        parse_code(new_text)
+    with pytest.raises(ParseError):
+        reparse(parse_code(code), code, new_text)
+
+
+def test_syntax_error_is_reported_against_the_whole_text():
+    old = parse_code(CODE)
+    new_text = CODE.replace('int i = 3;', 'int i = 3', 1)
+    with pytest.raises(ParseError) as info:
+        reparse(old, CODE, new_text)
+    assert info.value.index == new_text.index('while')
@@ -0,0 +1,359 @@
+"""
+Testes diferenciais: o parser descendente recursivo (parse_code) tem de
+produzir exatamente o mesmo AST que os combinadores (parse_code_combinator).
+"""
+
+import copy
+import glob
+import pickle
+
+import pytest
+from parsec import ParseError
+
+import examples
+import testcases
+from langAST import *
+import lang_codegen
+import lang_compile
+import lang_vm
+from lang_evaluate import evaluate
+from lang_instrumentation import evaluate_with_trace
+from lang_parser import (
+    Lexer, PackratTable, Parser, StackParser, packrat_parse, parse_code, parse_code_combinator,
+    parse_code_interned, parse_code_lazy, parse_code_with_diagnostics, parse_code_with_spans,
+    parse_program,
+)
+
+VALID_PROGRAMS = [
+    examples.programa1, examples.programa2, examples.programa3, examples.programa4,
+    examples.programa5,
+    testcases.programa1, testcases.programa2, testcases.programa3, testcases.programa4,
+] + [open(path).read() for path in sorted(glob.glob('progsParser/prog[0-9].c'))]
+
+EDGE_CASES = [
+    # literais negativos só quando o sinal está colado ao número
+    "int main(int a) { int x = -1; x = x-1; x = x - -1; x = a -1; return x; }",
+    # prefixos, sufixos e dangling else
+    "int main() { x = a--; y = ++b; z = !c; if (a) if (b) x; else y; return 0; }",
+    # ciclos com e sem declaração no init
+    "int main() { for (int i = 0; i < 3; i++) print(i); for (j = 0; j < 2; j = j + 1) {} return; }",
+    # palavras reservadas usadas como identificadores (aceites pelos combinadores)
+    "int f() { int(3); int = 5; if = 3; print = 2; return = 1; while(x) {} else; return 0; }",
+    # precedências, chamadas aninhadas e strings
+    'int g(int a, bool b) { b = true && false || a == 3; s = "a b c"; return f(1, g(2), (3+4)*5 % 2 / 1); }',
+    "void h(int a, bool b) { a = b = c = 3; x = a <= b; x = a >= b; x = a != b; x = a < b; x = f(a)++; }",
+]
+
+INVALID_PROGRAMS = [
+    examples.programa6,
+    examples.programa7,
+    "int main() { return 0 }",
+    "int main() { if (x > 5 { return 1; } return 0; }",
+    "int main() { { int x = 10; return 0; }",
+    "int main() { float x = 9.22; }",
+    "int f(int) { return 0; }",
+] + [open(path).read() for path in sorted(glob.glob('progsParser/prog*_inv.c'))]
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES)
+def test_same_ast_as_combinators(code):
+    assert parse_code(code) == parse_code_combinator(code)
+
+
+@pytest.mark.parametrize("code", INVALID_PROGRAMS)
+def test_rejects_same_programs_as_combinators(code):
+    with pytest.raises(ParseError):
+        parse_code_combinator(code)
+    with pytest.raises(ParseError):
+        parse_code(code)
+
+
+def test_lexer_tokens_have_kinds_and_offsets():
+    tokens = Lexer('int x = -1;').tokenize()
+    assert [t.kind for t in tokens] == ['NAME', 'NAME', '=', '-', 'INT', ';', 'EOF']
+    assert [(t.start, t.end) for t in tokens][:5] == [(0, 3), (4, 5), (6, 7), (8, 9), (9, 10)]
+    assert Lexer('9.22').tokenize()[1] == ('ERROR', '.', 1, 2)
+
+
+def test_large_program():
+    code = "\n".join(
+        testcases.programa3.replace('isPrime', f'isPrime{i}').replace('int main', f'int main{i}')
+        for i in range(20)
+    )
+    ast = parse_code(code)
+    assert len(ast.functions) == 40
+    assert ast == parse_code_combinator(code)
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS)
+def test_packrat_mode_same_ast(code):
+    ast, table = packrat_parse(parse_program, code)
+    assert ast == parse_code_combinator(code)
+    assert table.hits > 0  # o ident de uma chamada é reaproveitado por parse_variable
+    assert 0.0 < table.hit_rate < 1.0
+
+
+def test_packrat_table_survives_parse_error():
+    code = "int main() { if (f(g(1))) x = 1 }"
+    table = PackratTable(code)
+    with pytest.raises(ParseError):
+        packrat_parse(parse_program, code, table)
+    # os contadores ficam na tabela passada, mesmo com o erro
+    assert table.hits > 0 and table.misses == len(table.memo) > 0
+    assert 'ident' in table.report()
+
+
+def test_packrat_memo_grows_linearly_with_nesting():
+    # cada nível de parênteses acrescenta o mesmo número de entradas (uma por
+    # regra e posição) e um único reaproveitamento
+    sizes, hits = [], []
+    for depth in range(1, 9):
+        code = 'int main() { return ' + '(' * depth + 'x' + ')' * depth + '; }'
+        _, table = packrat_parse(parse_program, code)
+        sizes.append(len(table.memo))
+        hits.append(table.hits)
+    steps = {b - a for a, b in zip(sizes, sizes[1:])}
+    assert len(steps) == 1
+    assert [b - a for a, b in zip(hits, hits[1:])] == [1] * 7
+
+
+MANY_ERRORS = """int main() {
+    int x = 10
+    if (x > 5 {
+        print(x);
+    }
+    for (i = 0; i < n; i++ { x = 1; }
+    float f = 9.22;
+    return 0;
+}
+main() { return 1; }
+int ok(int a) { return a + 1; }
+int tail() {
+    x = 1;
+"""
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES)
+def test_recovery_mode_same_ast_without_diagnostics(code):
+    ast, diagnostics = parse_code_with_diagnostics(code)
+    assert diagnostics == []
+    assert ast == parse_code(code)
+
+
+def test_collects_all_syntax_errors_in_one_pass():
+    ast, diagnostics = parse_code_with_diagnostics(MANY_ERRORS)
+    assert [(e.loc(), e.expected) for e in diagnostics] == [
+        ('2:4', ';'),      # int x = 10
+        ('2:14', ')'),     # if (x > 5 {
+        ('5:27', ')'),     # for (...; i++ {
+        ('6:15', ';'),     # 9.22
+        ('9:0', 'type'),   # main() sem tipo de retorno
+        ('13:0', '}'),     # fim do ficheiro dentro de tail
+    ]
+    assert [f.name for f in ast.functions] == ['main', 'ok', 'tail']
+    assert ast.functions[0].body.statements == [Return(Literal(0))]
+    assert ast.functions[2].body.statements == [ExprStmt(Assignment('x', Literal(1)))]
+
+
+def test_parse_code_reports_furthest_failure():
+    with pytest.raises(ParseError) as info:
+        parse_code("int f() { { int x = 10; return 0; }")
+    assert info.value.expected == ['expression', '}']
+    assert info.value.index == len("int f() { { int x = 10; return 0; }")
+
+
+def _all_nodes(node):
+    yield node
+    for name in node.__dataclass_fields__:
+        value = getattr(node, name)
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, (Expr, Stmt, Function)):
+                yield from _all_nodes(child)
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES)
+def test_spans_cover_every_node(code):
+    ast, spans = parse_code_with_spans(code)
+    assert ast == parse_code(code)
+    nodes = list(_all_nodes(ast))
+    assert len(spans) == len(nodes)
+    for node in nodes:
+        start, end = spans.span(node)
+        assert 0 <= start <= end <= len(code)
+        assert code[start:end].strip() == code[start:end]
+
+
+def test_spans_slice_the_source():
+    code = "int main() {\n    int x = (1 + 2) * f(a, -3);\n    if (x) print(x); else x++;\n}\n"
+    ast, spans = parse_code_with_spans(code)
+    text = lambda node: code[slice(*spans.span(node))]
+    decl, if_stmt = ast.functions[0].body.statements
+    assert text(decl) == "int x = (1 + 2) * f(a, -3);"
+    assert text(decl.init) == "(1 + 2) * f(a, -3)"
+    assert text(decl.init.left) == "1 + 2"
+    assert text(decl.init.right.args[1]) == "-3"
+    assert text(if_stmt.else_branch) == "x++;"
+    assert text(ast.functions[0]) == code.strip()
+    assert spans.location(if_stmt) == '2:4'
+    assert spans.line_col(len(code)) == (4, 0)
+    assert spans.node_id(ast) == len(spans) - 1
+    assert spans.span(Literal(1)) is None
+
+
+def test_spans_forget_backtracked_nodes():
+    # `int = 5;` falha como declaração e é relida como atribuição
+    ast, spans = parse_code_with_spans("int f() { int = 5; if (x) y; else; }")
+    assert len(spans) == len(list(_all_nodes(ast)))
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES + [
+    "int f() { int = 5; if (x) y; else; }",
+    "int main() { " + "{ x = -1; " * 3000 + "}" * 3000 + " }",     # StackParser
+])
+def test_span_ids_are_node_table_ids(code):
+    ast, spans = parse_code_with_spans(code)
+    table = NodeTable(ast)
+    assert len(table) == len(spans)
+    for i in range(len(table)):
+        assert spans.node_id(table.node_at(i)) == i
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES)
+def test_lazy_mode_same_ast(code):
+    assert parse_code_lazy(code) == parse_code(code)
+
+
+def test_lazy_bodies_are_parsed_on_first_access():
+    code = "int f() { return 1 + ; }\nint main() { return 2; }"
+    ast = parse_code_lazy(code)
+    assert [f.name for f in ast.functions] == ['f', 'main']
+    assert not any(f.body_loaded for f in ast.functions)
+    assert evaluate(ast, []) == 2
+    assert ast.functions[1].body_loaded and not ast.functions[0].body_loaded
+    with pytest.raises(ParseError) as info:
+        ast.functions[0].body
+    assert info.value.loc() == '0:21'
+    with pytest.raises(ParseError):
+        parse_code_lazy("int f() { { return 1; }")
+
+
+@pytest.mark.parametrize("run", [
+    lambda ast: evaluate(ast, []),
+    lambda ast: evaluate(ast, [], lexical=True),
+    lambda ast: evaluate_with_trace(ast, [], lexical=True)[0],
+    lambda ast: lang_compile.evaluate(ast, []),
+    lambda ast: lang_vm.evaluate(ast, []),
+    lambda ast: lang_codegen.evaluate(ast, []),
+], ids=['interpreter', 'lexical', 'trace', 'closures', 'vm', 'codegen'])
+def test_backends_only_read_the_bodies_they_call(run):
+    ast = parse_code_lazy("int f() { return 1 + ; }\nint g() { return 3; }\nint main() { return 2; }")
+    assert run(ast) == 2
+    assert [f.body_loaded for f in ast.functions] == [False, False, True]
+    # o corpo partido só é parseado (e o erro levantado) quando é chamado
+    with pytest.raises(ParseError):
+        run(parse_code_lazy("int f() { return 1 + ; }\nint main() { return f(); }"))
+
+
+def test_lazy_functions_copy_and_pickle_with_body():
+    ast = parse_code_lazy(testcases.programa3)
+    assert copy.deepcopy(ast) == parse_code(testcases.programa3)
+    assert pickle.loads(pickle.dumps(parse_code_lazy(testcases.programa3))) == ast
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES)
+def test_interned_mode_same_ast(code):
+    assert parse_code_interned(code) == parse_code(code)
+
+
+def test_interned_mode_shares_nodes_between_calls():
+    interner = Interner()
+    first = parse_code_interned(testcases.programa3, interner)
+    second = parse_code_interned(testcases.programa3, interner)
+    assert first == second
+    assert first.functions[0].body is second.functions[0].body
+
+
+@pytest.mark.parametrize("code", [testcases.programa3,
+                                  "int main() { " + "{ x = -1; " * 3000 + "}" * 3000 + " }"])
+def test_interned_mode_builds_canonical_nodes(code):
+    # o Parser já constrói os nós pelo Interner: o pós-processamento não muda nada
+    interner = Interner()
+    ast = parse_code_interned(code, interner)
+    assert interner.tree(ast) is ast
+    with pytest.raises(ValueError):
+        Parser(Lexer(code).tokenize(), code, spans=True, interner=interner)
+
+
+def _stack_parse(code, **options):
+    parser = StackParser(Lexer(code).tokenize(), code, **options)
+    return parser.parse_program(), parser
+
+
+@pytest.mark.parametrize("code", VALID_PROGRAMS + EDGE_CASES)
+def test_stack_parser_same_ast(code):
+    ast, parser = _stack_parse(code, spans=True)
+    assert ast == parse_code(code)
+    expected, spans = parse_code_with_spans(code)[1], parser.source_map(ast)
+    assert len(spans) == len(expected)
+    assert [spans.span_at(i) for i in range(len(spans))] == [expected.span_at(i) for i in range(len(expected))]
+
+
+@pytest.mark.parametrize("code", INVALID_PROGRAMS + [MANY_ERRORS])
+def test_stack_parser_same_errors(code):
+    with pytest.raises(ParseError) as expected:
+        parse_code(code)
+    with pytest.raises(ParseError) as info:
+        _stack_parse(code)
+    assert (info.value.index, info.value.expected) == (expected.value.index, expected.value.expected)
+    ast, parser = _stack_parse(code, recover=True)
+    expected_ast, expected_diagnostics = parse_code_with_diagnostics(code)
+    assert ast == expected_ast
+    assert [(e.index, e.expected) for e in parser.diagnostics] == \
+        [(e.index, e.expected) for e in expected_diagnostics]
+
+
+def _same_tree(a, b):
+    # comparação iterativa: o __eq__ das dataclasses recursaria tanto quanto o parser
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if isinstance(a, list):
+            if not isinstance(b, list) or len(a) != len(b):
+                return False
+            stack.extend(zip(a, b))
+        elif isinstance(a, (Expr, Stmt, Function, Program)):
+            if type(a) is not type(b):
+                return False
+            stack.extend((getattr(a, f), getattr(b, f)) for f in a.__dataclass_fields__)
+        elif a != b:
+            return False
+    return True
+
+
+DEPTH = 10000
+
+
+def test_deeply_nested_expressions():
+    code = "int main() { return " + "(" * DEPTH + "-1" + ")" * DEPTH + " + x; }"
+    assert parse_code(code).functions[0].body.statements == [
+        Return(BinaryOp(Literal(-1), '+', Variable('x')))
+    ]
+    code = "int main() { return " + "f(!(" * DEPTH + "x" + "))" * DEPTH + "; }"
+    expected = Variable('x')
+    for _ in range(DEPTH):
+        expected = FunctionCall('f', [UnaryOp('!', expected, prefix=True)])
+    ast = parse_code(code)
+    assert _same_tree(ast.functions[0].body.statements[0].value, expected)
+    assert _same_tree(parse_code_with_diagnostics(code)[0], ast)
+
+
+def test_deeply_nested_blocks_and_statements():
+    code = "int main() { " + "{ if (x) " * DEPTH + "return 1;" + " }" * DEPTH + " }"
+    expected = Return(Literal(1))
+    for _ in range(DEPTH):
+        expected = Block([If(Variable('x'), expected)])
+    ast = parse_code(code)
+    assert _same_tree(ast.functions[0].body, Block([expected]))
+    assert _same_tree(parse_code_lazy(code).functions[0].body, Block([expected]))
+    ast, spans = parse_code_with_spans(code)
+    assert spans.span(ast.functions[0].body) == (code.index('{'), len(code))
@@ -0,0 +1,65 @@
+import json
+
+import lang_parser
+import testcases
+from lang_parser import Parser, StackParser, parse_code, parse_code_combinator
+from lang_profile import RuleProfiler
+
+
+def test_profiles_combinator_rules_and_helpers():
+    with RuleProfiler() as profiler:
+        ast = parse_code_combinator(testcases.programa3)
+    assert ast == parse_code(testcases.programa3)
+    stats = profiler.stats
+    assert stats['parse_program'].calls == 1
+    assert stats['parse_function'].ok == 2
+    assert stats['attempt(parse_var_decl)'].failed > 0
+    assert stats['primary_alternatives'].calls == stats['parse_primary'].calls
+    program = stats['parse_program']
+    assert program.cumulative >= max(s.cumulative for s in stats.values()) - 1e-9
+    assert sum(s.self_time for s in stats.values()) <= program.cumulative + 1e-6
+
+
+def test_profiles_recursive_parser():
+    with RuleProfiler() as profiler:
+        parse_code("int f() { int = 5; if (x) y = 1; return f(1); }")
+    stats = profiler.stats
+    assert stats['Parser.parse_program'].calls == 1
+    assert stats['Parser.parse_var_decl'].failed == 1   # `int = 5;` recua para atribuição
+    assert stats['Parser.parse_if'].ok == 1
+    assert stats['Parser.rollback'].calls >= 1
+
+
+def test_profiles_stack_parser_on_deep_nesting():
+    depth = 3000
+    code = ("int main() { if (x) { y = 1; } return " + "(" * depth + "1" + ")" * depth + "; }")
+    with RuleProfiler() as profiler:
+        ast = parse_code(code)
+    assert ast.function('main') is not None
+    stats = profiler.stats
+    assert stats['StackParser._primary'].calls == depth + 3   # x, o 1 de y = 1 e os depth + 1 do return
+    assert stats['StackParser._if'].ok == 1
+    assert stats['StackParser._function'].calls == 1
+    assert profiler._frames == []
+    outer = stats['StackParser._function']
+    assert outer.cumulative >= stats['StackParser._expr'].cumulative
+
+
+def test_disabled_profiler_restores_original_rules():
+    rules = [lang_parser.parse_expr.parser, lang_parser.parse_unary.fn, Parser.parse_expr,
+             Parser._keyword_rules, StackParser._expr, StackParser._stack_rules]
+    with RuleProfiler():
+        assert Parser.parse_expr is not rules[2]
+        assert StackParser._expr is not rules[4]
+    assert [lang_parser.parse_expr.parser, lang_parser.parse_unary.fn, Parser.parse_expr,
+            Parser._keyword_rules, StackParser._expr, StackParser._stack_rules] == rules
+
+
+def test_reports():
+    with RuleProfiler() as profiler:
+        parse_code(testcases.programa1)
+    table = profiler.table(sort='calls')
+    assert table.splitlines()[0].split() == ['rule', 'calls', 'ok', 'failed', 'cum', '(ms)', 'self', '(ms)']
+    data = json.loads(profiler.to_json())
+    assert set(data['Parser.parse_expr']) == {'calls', 'ok', 'failed', 'cumulative', 'self_time'}
+    assert 'parse_unary' not in data  # regras não chamadas ficam de fora
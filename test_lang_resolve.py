@@ -0,0 +1,140 @@
+import contextlib
+import io
+
+import pytest
+
+import testcases
+from lang_evaluate import evaluate
+from lang_instrumentation import evaluate_with_trace, instrumentation
+from lang_parser import parse_code
+from lang_resolve import (InputVariable, LocalDecl, LocalIncrement, ScopedBlock,
+                          ScopedFor, UnboundVariable, resolve)
+from langAST import Visitor
+
+CASES = [
+    (testcases.programa1, [[("num", 1)], [("num", 5)], [("num", 10)]]),
+    (testcases.programa2, [[("n", 2)], [("n", 7)], [("n", 40)]]),
+    (testcases.programa3, [[("number", 1)], [("number", 15)], [("number", 97)]]),
+    (testcases.programa4, [[("x", 10), ("y", 5), ("z", 0)], [("x", -5), ("y", 2), ("z", 10)]]),
+]
+
+SCOPING = [
+    '''int bump(int x) { x++; return x; }
+       int main(int n) {
+         int total = 0;
+         for (int i = 0; i < n; ++i) {
+           int sq = i * i;
+           { if (sq % 2 == 0) { total = total + sq / 2; } }
+         }
+         { int total = 100; print(total); total = 1; }
+         print(total); print(bump(total)); print(total++); print(++n);
+         return total;
+       }''',
+    "int main(int c) { print(c); int c = c + 1; if (c < 4) { return main(c); } return c; }",
+    "int f(int a, int a) { return a; } int main(int c) { return f(1, c); }",
+    "int main(int c) { while (c < 3) { c++; } }",
+    "int main(int c) { if (c > 1) int y = 2; return y; }",
+    "int main() { return y; }",
+    "int main() { y = 1; }",
+    "int main(int c) { return c; }",
+    "int f(int a) { return a; } int main() { return f(1, 2); }",
+    # só f precisa dos Environment; main e g continuam em frames
+    '''int g(int a) { int b = a * 2; return b; }
+       int f(int c) { if (c > 1) int y = g(c); { int z = 1; y = y + z; } return y; }
+       int main(int c) { return g(c) + f(c + 2) + f(c); }''',
+]
+INPUTS = [[("c", 2), ("n", 4)], [("c", 0), ("n", 0)], []]
+
+
+def run(evaluate, ast, inputs, **kwargs):
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            result = evaluate(ast, inputs, **kwargs)
+    except Exception as e:
+        result = ('erro', str(e))
+    return result, output.getvalue()
+
+
+class Addresses(Visitor):
+    def __init__(self):
+        self.found = []
+
+    def visit_LocalVariable(self, expr):
+        self.found.append((type(expr).__name__, expr.name, expr.depth, expr.slot))
+
+    def visit_UnboundVariable(self, expr):
+        self.found.append((type(expr).__name__, expr.name))
+
+
+def test_addresses_and_frame_sizes():
+    resolution = resolve(parse_code('''
+        int f(int a) { int b = a; { print(b); { int a = 2; print(a + b); } } return a; }
+        int main() { int s = 0; for (int i = 0; i < n; i++) { s = s + i; } return s + z; }'''))
+    f = resolution.program.function('f')
+    assert isinstance(f.params[0], LocalDecl) and f.params[0].slot == 1
+    assert isinstance(f.body, ScopedBlock) and f.body.size == 2
+    inner = f.body.statements[1]
+    # o bloco sem declarações não cria frame nem conta para a profundidade
+    assert inner.size == 0 and inner.statements[1].size == 1
+    addresses = Addresses()
+    addresses.visit(f)
+    assert addresses.found == [
+        ('LocalVariable', 'a', 0, 1), ('LocalVariable', 'b', 0, 2),
+        ('LocalVariable', 'a', 0, 1), ('LocalVariable', 'b', 1, 2), ('LocalVariable', 'a', 0, 1)]
+
+    loop = resolution.entry.statements[1]
+    assert isinstance(loop, ScopedFor) and loop.size == 1
+    assert isinstance(loop.increment, LocalIncrement)
+    assert isinstance(loop.condition.right, InputVariable)
+    assert (loop.condition.right.depth, loop.condition.right.slot) == (1, resolution.inputs['n'])
+    assert set(resolution.inputs) == {'n', 'z'}
+    assert resolution.entry.size == 3
+    # fora do main um nome sem declaração não tem endereço
+    main = resolution.program.function('main')
+    assert isinstance(main.body.statements[-1].value.right, UnboundVariable)
+
+
+def test_branch_declaration_is_not_resolved():
+    ast = parse_code("int main(int c) { if (c > 1) int y = 2; return y; }")
+    assert resolve(ast) is None
+    assert evaluate(ast, [("c", 2)], lexical=True) == 2
+    # fora do main só a função com a declaração solta fica por resolver
+    ast = parse_code("int f(int c) { if (c > 1) int y = 2; return y; }"
+                     "int main(int c) { return f(c + 1) + 1; }")
+    resolution = resolve(ast)
+    f = resolution.program.function('f')
+    assert isinstance(f.params[0], LocalDecl)
+    assert f.body is ast.function('f').body
+    assert isinstance(resolution.program.function('main').body, ScopedBlock)
+    assert evaluate(ast, [("c", 2)], lexical=True) == 3
+
+
+@pytest.mark.parametrize("code, inputs_list", CASES)
+def test_test_programs_match_environments(code, inputs_list):
+    ast = parse_code(code)
+    assert resolve(ast) is not None
+    for inputs in inputs_list:
+        assert run(evaluate, ast, inputs, lexical=True) == run(evaluate, ast, inputs)
+        assert (run(evaluate_with_trace, ast, inputs, lexical=True)
+                == run(evaluate_with_trace, ast, inputs))
+
+
+@pytest.mark.parametrize("code", SCOPING)
+def test_scoping_and_errors_match_environments(code):
+    for ast in (parse_code(code), instrumentation(parse_code(code))):
+        for inputs in INPUTS:
+            assert run(evaluate, ast, inputs, lexical=True) == run(evaluate, ast, inputs)
+            assert (run(evaluate_with_trace, ast, inputs, lexical=True)
+                    == run(evaluate_with_trace, ast, inputs))
+
+
+def test_missing_input_and_partial_call():
+    ast = parse_code("int main(int c) { return c; }")
+    assert run(evaluate, ast, [], lexical=True) == (('erro', "Variável 'c' não definida."), '')
+    # o TraceInterpreter aceita chamadas com menos argumentos; o parâmetro fica por definir
+    ast = parse_code("int f(int a, int b) { return a; } int g(int a, int b) { return b; }"
+                     "int main() { print(f(1)); return g(1); }")
+    lexical = run(evaluate_with_trace, ast, [], lexical=True)
+    assert lexical == run(evaluate_with_trace, ast, [])
+    assert lexical[0] == ('erro', "Variável 'b' não definida.")
@@ -0,0 +1,55 @@
+import pytest
+from parsec import ParseError
+
+import testcases
+from lang_parser import parse_code
+from lang_stream import iter_functions
+
+CODE = testcases.programa1 + testcases.programa3 + '  int f() { print("{ }"); return 0; } int g() { return 1; }\n'
+
+
+def test_same_functions_as_parse_code(tmp_path):
+    path = tmp_path / 'prog.c'
+    path.write_text(CODE, encoding='utf-8')
+    assert list(iter_functions(str(path))) == parse_code(CODE).functions
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.c'
+    path.write_text('')
+    assert list(iter_functions(str(path))) == []
+
+
+def test_yields_before_reaching_a_syntax_error(tmp_path):
+    code = testcases.programa1 + 'int broken() {\n  return 0\n}\n'
+    path = tmp_path / 'prog.c'
+    path.write_text(code)
+    functions = iter_functions(str(path))
+    assert next(functions).name == 'factorial'
+    assert next(functions).name == 'main'
+    with pytest.raises(ParseError) as info:
+        next(functions)
+    with pytest.raises(ParseError) as full:
+        parse_code(code)
+    assert info.value.loc() == full.value.loc()
+
+
+@pytest.mark.parametrize("tail", ['int h() {', 'int h() { } }', 'x'])
+def test_unbalanced_or_trailing_text_is_an_error(tmp_path, tail):
+    path = tmp_path / 'prog.c'
+    path.write_text(testcases.programa2 + tail)
+    with pytest.raises(ParseError):
+        list(iter_functions(str(path)))
+
+
+def test_error_offset_is_the_position_in_the_file(tmp_path):
+    code = 'int f(int a) {\n  int b = a * 2;\n  return b;\n}\nint g() { return 1 +; }\n'
+    path = tmp_path / 'prog.c'
+    path.write_text(code)
+    with pytest.raises(ParseError) as info:
+        list(iter_functions(str(path)))
+    with pytest.raises(ParseError) as full:
+        parse_code(code)
+    error = info.value
+    assert (error.index, error.loc()) == (full.value.index, full.value.loc())
+    assert error.text[error.index - error.chunk_start] == code[error.index] == ';'
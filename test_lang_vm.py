@@ -0,0 +1,103 @@
+import sys
+
+import pytest
+
+import lang_vm
+import testcases
+from lang_evaluate import evaluate as interpret
+from lang_parser import parse_code
+from lang_vm import BINARY_OP, CALL, LOAD_FAST, OPNAMES, compile_program, disassemble, evaluate
+
+CASES = [
+    (testcases.programa1, [[("num", 1)], [("num", 5)], [("num", 10)]]),
+    (testcases.programa2, [[("n", 2)], [("n", 7)], [("n", 40)]]),
+    (testcases.programa3, [[("number", 1)], [("number", 15)], [("number", 97)]]),
+    (testcases.programa4, [[("x", 10), ("y", 5), ("z", 0)], [("x", -5), ("y", 2), ("z", 10)]]),
+]
+
+
+def outcome(run, ast, inputs, capsys):
+    try:
+        result = run(ast, inputs)
+    except Exception as e:
+        result = ('erro', str(e))
+    return result, capsys.readouterr().out
+
+
+@pytest.mark.parametrize("code, inputs_list", CASES)
+def test_same_result_and_output_as_interpreter(code, inputs_list, capsys):
+    ast = parse_code(code)
+    program = compile_program(ast)
+    for inputs in inputs_list:
+        expected = outcome(interpret, ast, inputs, capsys)
+        assert outcome(lambda _, i: program.evaluate(i), ast, inputs, capsys) == expected
+
+
+@pytest.mark.parametrize("code", [
+    # âmbitos, sombras e operadores
+    '''int bump(int x) { x++; }
+       int main(int n) {
+         int total = 0;
+         for (int i = 0; i < n; ++i) {
+           int sq = i * i;
+           if (sq % 2 == 0 || i == 3) { total = total + sq / 2; }
+         }
+         { int total = 100; print(total); total = 1; }
+         print(0 - total); print(!(total > 1) && true); print(bump(total));
+         print(total++); print(++total); print(n = 2);
+       }''',
+    # a entrada pode ser redeclarada e o main chamado como função
+    '''int main(int c) { print(c); int c = c + 1; if (c < 4) { return main(c); } return c; }''',
+    # VarDecl solto como ramo: só declara se for executado
+    "int main(int c) { { if (c) int y = 1; } return y; }",
+    "int main(int c) { int y = 7; { if (c) int y = 1; y = y + 10; print(y); } return y; }",
+    "int main(int c) { while (c < 3) int c = c + 1; return c; }",
+    "int main(int c) { for (c = 0; c < 2; c++) int y = c; return y; }",
+    "int main(int c) { int y = 5; for (int i = 0; i < 3; i++) if (i == c) int y = i; else print(y); return y; }",
+    "int main(int c) { if (c) int c = 10; c = c + 1; return c; }",
+    # erros
+    "int main() { return y; }",
+    "int main() { y = 1; }",
+    "int main() { return f(1); }",
+    "int f(int a) { return a; } int main() { return f(1, 2); }",
+    "int f() { return c; } int main(int c) { return f(); }",
+    "int helper() { return 1; }",
+])
+def test_scoping_and_errors_match_interpreter(code, capsys):
+    ast = parse_code(code)
+    for inputs in ([("c", 0)], [("c", 1)], [("c", 1), ("n", 5)]):
+        assert outcome(evaluate, ast, inputs, capsys) == outcome(interpret, ast, inputs, capsys)
+
+
+def test_calls_use_frames_not_python_recursion():
+    ast = parse_code('''
+    int depth(int n) { if (n == 0) { return 0; } return 1 + depth(n - 1); }
+    int main(int n) { return depth(n); }''')
+    n = sys.getrecursionlimit() * 2
+    assert evaluate(ast, [("n", n)]) == n
+
+
+def test_call_depth_is_limited(monkeypatch):
+    monkeypatch.setattr(lang_vm, 'MAX_CALL_DEPTH', 50)
+    ast = parse_code('''
+    int depth(int n) { if (n == 0) { return 0; } return 1 + depth(n - 1); }
+    int main(int n) { return depth(n); }''')
+    assert evaluate(ast, [("n", 49)]) == 49
+    with pytest.raises(RecursionError):
+        evaluate(ast, [("n", 50)])
+    # recursão infinita: RecursionError em vez de crescer até um MemoryError
+    monkeypatch.undo()
+    with pytest.raises(RecursionError):
+        evaluate(parse_code("int f(int n) { return f(n + 1); } int main() { return f(0); }"), [])
+
+
+def test_disassembler_lists_every_instruction():
+    program = compile_program(parse_code(testcases.programa1))
+    listing = disassemble(program)
+    factorial = program.code(0)
+    assert listing.startswith("factorial(n): 2 slots")
+    assert "main() (entrada)" in listing
+    assert f"{OPNAMES[CALL]:<18}    0  (factorial)" in listing
+    assert f"{OPNAMES[BINARY_OP]:<18}    9  (<=)" in listing
+    assert disassemble(factorial).count('\n') == len(factorial.code)
+    assert factorial.code[0] == (LOAD_FAST, 0)